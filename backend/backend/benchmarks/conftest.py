@@ -0,0 +1,66 @@
+"""
+Бенчмарки горячих путей (pytest-benchmark) на синтетических данных
+`easybook.synthetic`. Не входят в обычный прогон (testpaths = tests):
+
+    # прогон с сохранением результатов в .benchmarks/
+    pytest benchmarks/ --benchmark-autosave
+
+    # сравнение с последним сохранённым, падение при регрессии медианы
+    pytest benchmarks/ --benchmark-compare --benchmark-compare-fail=median:20%
+
+Масштаб задают переменные BENCH_COMPANIES, BENCH_RESOURCES, BENCH_USERS,
+BENCH_BOOKINGS и BENCH_SEED; по умолчанию 1 000 ресурсов и 200 000 броней,
+целевой масштаб — BENCH_RESOURCES=10000 BENCH_BOOKINGS=10000000. Данные
+создаются один раз на сессию в тестовой базе (с --reuse-db — и между
+сессиями: сид пропускается, если данные для него уже есть).
+"""
+import os
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from easybook import synthetic
+from easybook.models import Booking, Company, Resource
+
+
+SEED = int(os.environ.get('BENCH_SEED', '0'))
+SCALE = synthetic.Scale(
+    companies=int(os.environ.get('BENCH_COMPANIES', '50')),
+    resources=int(os.environ.get('BENCH_RESOURCES', '1000')),
+    users=int(os.environ.get('BENCH_USERS', '10000')),
+    bookings=int(os.environ.get('BENCH_BOOKINGS', '200000')),
+)
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        if not Company.objects.filter(slug__startswith=f'synthetic-{SEED}-').exists():
+            synthetic.generate(SCALE, seed=SEED)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+
+@pytest.fixture(scope='session')
+def sample(django_db_setup, django_db_blocker):
+    """
+    Типичные объекты для запросов: ресурс со штатом, ресурс без него,
+    неделя в середине истории и первый свободный момент после неё.
+    """
+    with django_db_blocker.unblock():
+        resources = Resource.objects.filter(
+            company__slug__startswith=f'synthetic-{SEED}-'
+        ).order_by('pk')
+        today = timezone.localdate()
+        return {
+            'resource': resources.filter(requires_staff=False).first(),
+            'staffed': resources.filter(requires_staff=True).first(),
+            'company': resources.first().company,
+            'week': (today - timedelta(days=7), today - timedelta(days=1)),
+            'free_from': Booking.objects.aggregate(
+                last=Max('timerange__endswith')
+            )['last'] + timedelta(days=1),
+        }
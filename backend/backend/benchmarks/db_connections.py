@@ -0,0 +1,79 @@
+"""
+Задержка «запроса» с новым соединением к Postgres против постоянного.
+
+Цикл эмулирует обработку запроса Django: request_started → один
+короткий запрос к базе → request_finished (после которого
+`close_old_connections` закрывает соединение, если CONN_MAX_AGE = 0).
+
+    python benchmarks/db_connections.py                  # текущие настройки
+    DATABASE_POOL=1 python benchmarks/db_connections.py  # пул psycopg 3
+
+Режимы:
+    per-request   CONN_MAX_AGE = 0, без пула — соединение на каждый запрос;
+    configured    DATABASES из settings (CONN_MAX_AGE / пул / PgBouncer).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'booking_system.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.signals import request_finished, request_started  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from easybook.models import Resource  # noqa: E402
+
+
+def measure(iterations):
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        request_started.send(sender=None)
+        Resource.objects.filter(pk=1).exists()
+        request_finished.send(sender=None)
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+    return latencies
+
+
+def report(name, latencies):
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f'{name:12} mean {statistics.mean(latencies) * 1000:7.2f} ms'
+        f'  p50 {quantiles[49] * 1000:7.2f}  p95 {quantiles[94] * 1000:7.2f}'
+        f'  p99 {quantiles[98] * 1000:7.2f}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    settings_dict = connection.settings_dict
+    configured = (settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS'].get('pool'))
+    print(
+        f"driver {connection.Database.__name__}, CONN_MAX_AGE={configured[0]}, "
+        f"pool={bool(configured[1])}"
+    )
+
+    settings_dict['CONN_MAX_AGE'], pool = 0, settings_dict['OPTIONS'].pop('pool', None)
+    connection.close()
+    report('per-request', measure(args.iterations))
+
+    settings_dict['CONN_MAX_AGE'] = configured[0]
+    if pool is not None:
+        settings_dict['OPTIONS']['pool'] = pool
+    report('configured', measure(args.iterations))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Нагрузочный тест HTTP-эндпоинтов: sync (WSGI) против async (ASGI).
+
+Запускает `--concurrency` клиентов с keep-alive соединениями, каждый
+по очереди бьёт в URL, и печатает пропускную способность и перцентили
+задержки для каждого URL.
+
+Сравнение профилей:
+
+    # WSGI, sync-воркеры
+    docker compose up django-web
+    python benchmarks/load.py http://localhost:8000/resources/1/calendar/
+
+    # ASGI, uvicorn-воркеры
+    docker compose --profile asgi up django-asgi
+    python benchmarks/load.py http://localhost:8001/async/resources/1/calendar/
+
+Медленных клиентов и ожидание базы sync-воркер переживает, держа поток;
+под ASGI одно соединение с базой ждут корутины, поэтому разница видна
+при concurrency заметно больше числа воркеров.
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+def worker(url, deadline, requests, latencies, errors, lock):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' \
+        else http.client.HTTPConnection
+    connection = connection_class(parts.netloc, timeout=30)
+    local, failed = [], 0
+    while time.monotonic() < deadline and (requests is None or len(local) + failed < requests):
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                failed += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            connection.close()
+            connection = connection_class(parts.netloc, timeout=30)
+            continue
+        local.append(time.perf_counter() - started)
+    connection.close()
+    with lock:
+        latencies.extend(local)
+        errors[0] += failed
+
+
+def run(url, concurrency, duration, requests_per_client):
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(
+                worker, url, deadline, requests_per_client, latencies, errors, lock
+            )
+    elapsed = time.perf_counter() - started
+    return latencies, errors[0], elapsed
+
+
+def report(url, latencies, errors, elapsed):
+    print(url)
+    if not latencies:
+        print(f'  no successful requests, {errors} errors')
+        return
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f'  {len(latencies)} ok, {errors} errors in {elapsed:.1f}s '
+        f'→ {len(latencies) / elapsed:.1f} req/s'
+    )
+    print(
+        f'  latency ms: p50 {quantiles[49] * 1000:.1f}  p95 {quantiles[94] * 1000:.1f}'
+        f'  p99 {quantiles[98] * 1000:.1f}  max {max(latencies) * 1000:.1f}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('-c', '--concurrency', type=int, default=50)
+    parser.add_argument('-d', '--duration', type=float, default=20.0, help='seconds')
+    parser.add_argument(
+        '-n', '--requests', type=int, default=None,
+        help='stop each client after this many requests',
+    )
+    args = parser.parse_args()
+    for url in args.urls:
+        report(url, *run(url, args.concurrency, args.duration, args.requests))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Горячие пути: разрешение правил, проверки пересечений, приём брони под
+ограничениями (в том числе конкурентный), списки API и пакетная отправка
+писем.
+Запуск — см. benchmarks/conftest.py.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import count
+
+import pytest
+from django.core import mail as django_mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from easybook import admission, availability, mail
+from easybook.models import AvailabilityRule, Booking, BookingEvent, User
+
+
+pytestmark = pytest.mark.django_db
+
+CLIENTS = 16
+
+
+def week_range(sample):
+    first, last = sample['week']
+    return DateTimeTZRange(
+        datetime.combine(first, time(), tzinfo=dt_timezone.utc),
+        datetime.combine(last + timedelta(days=1), time(), tzinfo=dt_timezone.utc),
+    )
+
+
+def test_effective_rules_for_day(benchmark, sample):
+    day = sample['week'][0]
+
+    rules = benchmark(
+        lambda: list(AvailabilityRule.objects.effective_for_day(sample['resource'], day))
+    )
+    assert rules is not None
+
+
+def test_week_slots_cold_cache(benchmark, sample):
+    first, last = sample['week']
+
+    def slots():
+        cache.clear()
+        return availability.resource_slots(sample['resource'], first, last)
+
+    assert len(benchmark(slots).start)
+
+
+def test_remaining_capacity(benchmark, sample):
+    capacity, used = benchmark(
+        admission.remaining_capacity, sample['resource'], week_range(sample)
+    )
+    assert used >= 0
+
+
+def test_staff_overlap_exists(benchmark, sample):
+    bookings = Booking.objects.overlapping(week_range(sample)).filter(
+        staff__resources=sample['staffed']
+    )
+    benchmark(bookings.exists)
+
+
+def test_admit_booking(benchmark, sample):
+    """
+    Приём в свободный слот: блокировки, проверка вместимости и вставка
+    под ограничениями-исключениями.
+    """
+    user = User.objects.filter(email__startswith='synthetic-').first()
+    hours = count()
+
+    def booking():
+        start = sample['free_from'] + timedelta(hours=next(hours))
+        return (Booking(
+            user=user, resource=sample['resource'],
+            timerange=DateTimeTZRange(start, start + timedelta(hours=1)),
+        ),), {}
+
+    benchmark.pedantic(admission.admit, setup=booking, rounds=200)
+
+
+def in_threads(function, args):
+    """
+    Вызывает function по аргументу в пуле потоков; у каждого потока своё
+    соединение с автокоммитом, закрываемое после вызова.
+    """
+    def call(arg):
+        try:
+            return function(arg)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=CLIENTS) as pool:
+        return list(pool.map(call, args))
+
+
+@pytest.mark.parametrize('contention', ['same_slot', 'disjoint'])
+def test_concurrent_admission(benchmark, sample, contention):
+    """
+    CLIENTS клиентов одновременно бронируют один слот (упираются в
+    блокировки и вместимость) или соседние слоты (должны идти параллельно).
+    Брони из потоков закоммичены, поэтому удаляются после прогона.
+    """
+    users = list(User.objects.filter(email__startswith='synthetic-')[:CLIENTS])
+    days = count()
+    created = []
+
+    def book(args):
+        user, start = args
+        try:
+            booking = admission.admit(Booking(
+                user=user, resource=sample['resource'],
+                timerange=DateTimeTZRange(start, start + timedelta(hours=1)),
+            ))
+        except ValidationError:
+            return None
+        return booking.pk
+
+    def round_():
+        start = sample['free_from'] + timedelta(days=next(days))
+        if contention == 'same_slot':
+            starts = [start] * len(users)
+        else:
+            starts = [start + timedelta(hours=i) for i in range(len(users))]
+        created.extend(pk for pk in in_threads(book, zip(users, starts)) if pk)
+
+    def cleanup(pks):
+        Booking.objects.filter(pk__in=pks).delete()
+        BookingEvent.objects.filter(booking_id__in=pks).delete()
+
+    try:
+        benchmark.pedantic(round_, rounds=20)
+    finally:
+        in_threads(cleanup, [created])
+    assert created
+
+
+@pytest.mark.parametrize('compact', ['0', '1'])
+def test_booking_list(benchmark, sample, compact):
+    client = APIClient()
+    url = reverse('booking-list')
+    params = {'resource': sample['resource'].pk, 'page_size': 50, 'compact': compact}
+
+    response = benchmark(client.get, url, params)
+    assert response.status_code == 200
+
+
+def test_resource_list(benchmark, sample):
+    client = APIClient()
+    params = {'company': sample['company'].pk, 'compact': '1'}
+
+    response = benchmark(client.get, reverse('resource-list'), params)
+    assert response.status_code == 200
+
+
+def test_calendar(benchmark, sample):
+    client = APIClient()
+    first, last = sample['week']
+    url = reverse('calendar', args=[sample['resource'].pk])
+
+    response = benchmark(client.get, url, {'start': first, 'end': last})
+    assert response.status_code == 200
+
+
+def test_send_email_batch(benchmark, settings):
+    """
+    EMAIL_BATCH_SIZE писем через одно соединение (locmem):
+    писем в секунду — OPS × размер пачки.
+    """
+    settings.EMAIL_RATE_LIMIT = 0
+    batch = [
+        (f'Subject {i}', 'Body', f'user{i}@example.com')
+        for i in range(settings.EMAIL_BATCH_SIZE)
+    ]
+
+    def setup():
+        django_mail.outbox = []
+        return (batch,), {}
+
+    result = benchmark.pedantic(mail.send_batch, setup=setup, rounds=50)
+    assert result['sent'] == len(batch)
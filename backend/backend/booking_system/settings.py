@@ -47,6 +47,11 @@ EMAIL_PORT           = int(env("EMAIL_PORT",       default="1025" if DEBUG else
 EMAIL_HOST_USER      = env("EMAIL_HOST_USER",      default="")
 EMAIL_HOST_PASSWORD  = env("EMAIL_HOST_PASSWORD",  default="")
 EMAIL_USE_TLS        = env("EMAIL_USE_TLS",        default="True").lower() == "true"
+# Пакетная отправка (см. easybook/mail.py): писем на одно соединение и
+# не больше EMAIL_RATE_LIMIT писем получателю за EMAIL_RATE_WINDOW секунд
+EMAIL_BATCH_SIZE     = int(env("EMAIL_BATCH_SIZE",     default="100"))
+EMAIL_RATE_LIMIT     = int(env("EMAIL_RATE_LIMIT",     default="20"))
+EMAIL_RATE_WINDOW    = int(env("EMAIL_RATE_WINDOW",    default="3600"))
 
 
 
@@ -70,6 +75,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'easybook.middleware.MetricsMiddleware',
+    'easybook.middleware.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -111,8 +118,45 @@ DATABASES = {
         'PASSWORD': env('DATABASE_PASSWORD'),
         'HOST': env('DATABASE_HOST'),
         'PORT': env('DATABASE_PORT'),
+        # Постоянные соединения: сколько секунд держать соединение между
+        # запросами (0 — закрывать после каждого), с проверкой перед использованием.
+        # Только для WSGI: под ASGI соединения привязаны к потокам
+        # sync_to_async и не переиспользуются между запросами, так что
+        # CONN_MAX_AGE > 0 лишь копит открытые соединения. ASGI-профиль
+        # работает с DATABASE_POOL=1 (или DATABASE_CONN_MAX_AGE=0)
+        'CONN_MAX_AGE': int(env('DATABASE_CONN_MAX_AGE', default='60')),
+        'CONN_HEALTH_CHECKS': env('DATABASE_CONN_HEALTH_CHECKS', default='1') == '1',
+        'OPTIONS': {},
     }
 }
+# Пул соединений psycopg 3 внутри процесса (несовместим с CONN_MAX_AGE)
+if env('DATABASE_POOL', default='0') == '1':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(env('DATABASE_POOL_MIN_SIZE', default='2')),
+        'max_size': int(env('DATABASE_POOL_MAX_SIZE', default='10')),
+        'timeout': int(env('DATABASE_POOL_TIMEOUT', default='10')),
+    }
+# За PgBouncer в режиме transaction pooling: именованные курсоры WITH HOLD
+# не переживают смену серверного соединения — выключаем их
+# (easybook/export.py тогда читает страницами по ключу)
+if env('DATABASE_PGBOUNCER', default='0') == '1':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+# Реплика для чтений (см. easybook/routers.py): задаётся DATABASE_REPLICA_HOST,
+# остальные параметры по умолчанию как у primary
+if env('DATABASE_REPLICA_HOST', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': env('DATABASE_REPLICA_HOST'),
+        'PORT': env('DATABASE_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'NAME': env('DATABASE_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_DATABASE = 'replica' if 'replica' in DATABASES else None
+# Сколько секунд после записи клиент читает с primary
+REPLICA_STICKY_SECONDS = int(env('REPLICA_STICKY_SECONDS', default='5'))
+DATABASE_ROUTERS = ['easybook.routers.ReplicaRouter']
 """if env('IN_DOCKER', default="True") == "True":
     DATABASES = {
         'default': {
@@ -183,6 +227,109 @@ CSRF_TRUSTED_ORIGINS = ["http://localhost:80"]
 
 CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default="")
+# Как часто ретранслятор outbox раздаёт события броней (см. easybook/outbox.py)
+BOOKING_OUTBOX_RELAY_SECONDS = int(env("BOOKING_OUTBOX_RELAY_SECONDS", default="10"))
+# Напоминания (см. easybook/reminders.py): за сколько часов до начала брони,
+# 0 — выключено, и как часто их искать
+BOOKING_REMINDER_HOURS = int(env("BOOKING_REMINDER_HOURS", default="24"))
+BOOKING_REMINDER_SWEEP_SECONDS = int(env("BOOKING_REMINDER_SWEEP_SECONDS", default="300"))
+CELERY_BEAT_SCHEDULE = {
+    # События броней: письма, вебхуки, пересчёт материализованных слотов
+    "relay-booking-events": {
+        "task": "easybook.tasks.relay_booking_events_task",
+        "schedule": BOOKING_OUTBOX_RELAY_SECONDS,
+    },
+    # Сдвигает горизонт материализованных слотов (no-op, если выключено)
+    "rebuild-availability": {
+        "task": "easybook.tasks.rebuild_availability_task",
+        "schedule": 24 * 60 * 60,
+    },
+    # Напоминания о бронях, начинающихся в ближайшие BOOKING_REMINDER_HOURS
+    "send-booking-reminders": {
+        "task": "easybook.tasks.send_booking_reminders_task",
+        "schedule": BOOKING_REMINDER_SWEEP_SECONDS,
+    },
+    # Секции Booking на месяцы вперёд и отсоединение старых (no-op без секций)
+    "maintain-booking-partitions": {
+        "task": "easybook.tasks.maintain_booking_partitions_task",
+        "schedule": 24 * 60 * 60,
+    },
+    # Перенос прошедших броней в архив (no-op, если выключено)
+    "archive-bookings": {
+        "task": "easybook.tasks.archive_bookings_task",
+        "schedule": 24 * 60 * 60,
+    },
+}
+
+# Общий кэш воркеров — Redis (REDIS_CACHE_URL, например redis://redis:6379/1);
+# без него — LocMem в каждом процессе (разработка, тесты)
+REDIS_CACHE_URL = env("REDIS_CACHE_URL", default="")
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+            "KEY_PREFIX": env("CACHE_KEY_PREFIX", default="easybook"),
+            "TIMEOUT": 300,
+            "OPTIONS": {
+                "socket_connect_timeout": 1,
+                "socket_timeout": 1,
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Время жизни записей cache-aside моделей, секунд (см. easybook/model_cache.py)
+MODEL_CACHE_TTL = int(env("MODEL_CACHE_TTL", default="600"))
+
+# Время жизни каталога компании в кэше, секунд (см. easybook/catalog.py)
+CATALOG_CACHE_TTL = int(env("CATALOG_CACHE_TTL", default="3600"))
+
+# Материализованная таблица свободных слотов (см. easybook/materialization.py)
+AVAILABILITY_MATERIALIZATION = env("AVAILABILITY_MATERIALIZATION", default="0") == "1"
+AVAILABILITY_MATERIALIZATION_DAYS = int(env("AVAILABILITY_MATERIALIZATION_DAYS", default="90"))
+
+# Гранулярность блокировок при приёме бронирований (см. easybook/admission.py)
+ADMISSION_BUCKET_MINUTES = int(env("ADMISSION_BUCKET_MINUTES", default="15"))
+ADMISSION_MAX_BUCKETS = int(env("ADMISSION_MAX_BUCKETS", default="96"))
+
+# Секционирование Booking по месяцам (см. easybook/partitioning.py):
+# сколько месяцев секций держать вперёд и сколько хранить (0 — всё)
+BOOKING_PARTITION_MONTHS_AHEAD = int(env("BOOKING_PARTITION_MONTHS_AHEAD", default="3"))
+BOOKING_PARTITION_RETENTION_MONTHS = int(env("BOOKING_PARTITION_RETENTION_MONTHS", default="0"))
+# Максимальная длительность брони в днях, 0 — без ограничения; позволяет
+# запросам пересечений отсекать прошлые секции. Перед включением —
+# `manage.py check --database default`: ошибка easybook.E001, если в базе
+# уже есть брони длиннее
+BOOKING_MAX_DURATION_DAYS = int(env("BOOKING_MAX_DURATION_DAYS", default="0"))
+
+# Через сколько дней после окончания брони переносятся в архив
+# (см. easybook/archive.py), 0 — не архивировать. Больше ICS_FEED_PAST_DAYS,
+# иначе события пропадут из календарных лент раньше срока
+BOOKING_ARCHIVE_AFTER_DAYS = int(env("BOOKING_ARCHIVE_AFTER_DAYS", default="0"))
+
+# Запросы дольше стольких миллисекунд пишутся в лог easybook.slow_requests
+# вместе с самыми долгими SQL (см. easybook/metrics.py), 0 — выключено
+SLOW_REQUEST_MS = int(env("SLOW_REQUEST_MS", default="0"))
+# Кому отдавать /metrics: сети через запятую и/или bearer-токен
+METRICS_ALLOWED_NETWORKS = [
+    network
+    for network in env("METRICS_ALLOWED_NETWORKS", default="127.0.0.1/32,::1/128").split(",")
+    if network
+]
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
+# Вебхуки событий броней: адреса через запятую и секрет подписи
+# HMAC-SHA256 (заголовок X-Easybook-Signature); обработанные события
+# outbox хранятся BOOKING_OUTBOX_RETENTION_DAYS дней
+BOOKING_WEBHOOK_URLS = [url for url in env("BOOKING_WEBHOOK_URLS", default="").split(",") if url]
+BOOKING_WEBHOOK_SECRET = env("BOOKING_WEBHOOK_SECRET", default="")
+BOOKING_OUTBOX_RETENTION_DAYS = int(env("BOOKING_OUTBOX_RETENTION_DAYS", default="7"))
 
 
 """if not DEBUG and EMAIL_BACKEND is None:
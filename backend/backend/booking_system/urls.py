@@ -27,6 +27,7 @@ router = routers.DefaultRouter()
 router.register(r'users', views.UserViewSet, basename='user')
 router.register(r'resources', views.ResourceViewSet, basename='resource')
 router.register(r'bookings', views.BookingViewSet, basename='booking')
+router.register(r'archived-bookings', views.ArchivedBookingViewSet, basename='archived-booking')
 
 
 
@@ -38,7 +39,14 @@ urlpatterns = [
     path('users/<int:userID>/bookings/', views.user_bookings, name="user_bookings"),
     path('resources/<int:resourceID>/info/', views.resource_info, name="resource_info"),
     path('resources/<int:resourceID>/calendar/', views.calendar, name="calendar"),
-    path('send/', views.send_email_confirmation, name="send_email_confirmation"),
+    path('async/resources/<int:resourceID>/calendar/', views.calendar_async, name="calendar_async"),
+    path('async/bookings/', views.create_booking_async, name="create_booking_async"),
+    path('resources/<int:resourceID>/calendar.ics', views.resource_ics, name="resource_ics"),
+    path('staff/<int:staffID>/calendar.ics', views.staff_ics, name="staff_ics"),
+    path('companies/<slug:slug>/catalog/', views.company_catalog, name="company_catalog"),
+    path('search/', views.search, name="search"),
+    path('bookings/export/', views.export_bookings, name="export_bookings"),
+    path('metrics', views.prometheus_metrics, name="metrics"),
     path('', include(router.urls)),
 
 ]
@@ -162,6 +162,7 @@ class BookingAdmin(admin.ModelAdmin):
         'quantity'
     )
     list_filter = ('resource', 'user')
+    list_select_related = ('user', 'resource')
 
 
 @admin.register(AvailabilityRule)
@@ -0,0 +1,198 @@
+"""
+Приём бронирований с учётом вместимости.
+
+Сумма `quantity` пересекающихся бронирований не должна превышать
+вместимость: минимум пересекающихся CapacityWindow, а если окна покрывают
+бронь не целиком — не больше Resource.max_capacity (как в календаре,
+`availability.window_capacity`).
+
+Проверка и вставка идут в одной транзакции под advisory-блокировками
+Postgres, поэтому конкурентные запросы не могут вместе превысить лимит.
+Чтобы не сериализовать все записи по ресурсу, блокируются только
+интервалы времени ("корзины"), которых касается бронь:
+
+- короткая бронь: shared-блокировки дней + exclusive-блокировки корзин
+  по ADMISSION_BUCKET_MINUTES;
+- длинная бронь (больше ADMISSION_MAX_BUCKETS корзин): exclusive-
+  блокировки дней.
+
+Любые две пересекающиеся брони делят хотя бы одну корзину или день
+в несовместимых режимах, а непересекающиеся почти всегда идут
+параллельно. Блокировки берутся в одном порядке (дни, затем корзины,
+по возрастанию времени), что исключает взаимные блокировки.
+
+Теми же блокировками по ключу сотрудника (после блокировок ресурса)
+защищена проверка пересечений пользователя и сотрудника
+(`overlapping_bookings`): у секционированной таблицы
+(`easybook.partitioning`) ограничения-исключения действуют только внутри
+месяца, и пересечение через границу секций ловит лишь она.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q, Sum
+
+from easybook.availability import to_us, window_capacity
+from easybook.models import Booking, CapacityWindow, Resource
+
+
+DAY_US = 24 * 60 * 60 * 1_000_000
+# Ключи advisory-блокировок — int4, ресурс отображаем в этот диапазон
+INT4_MOD = 2 ** 31
+
+
+def _bucket_us() -> int:
+    return getattr(settings, 'ADMISSION_BUCKET_MINUTES', 15) * 60 * 1_000_000
+
+
+def _max_buckets() -> int:
+    return getattr(settings, 'ADMISSION_MAX_BUCKETS', 96)
+
+
+def resource_key(resource_id) -> int:
+    return resource_id % INT4_MOD
+
+
+def staff_key(staff_id) -> int:
+    # Сотрудники — отрицательные ключи, не пересекаются с ресурсами
+    return -1 - staff_id % INT4_MOD
+
+
+def lock_timerange(resource_id, timerange, staff_id=None):
+    """
+    Берёт advisory-блокировки ресурса, затем сотрудника, до конца
+    текущей транзакции.
+    """
+    _lock_key(resource_key(resource_id), timerange)
+    if staff_id is not None:
+        _lock_key(staff_key(staff_id), timerange)
+
+
+def day_numbers(timerange) -> range:
+    """
+    Номера дней (по UTC), которых касается интервал, — вторые половины
+    ключей блокировок дней (со знаком минус).
+    """
+    lower, upper = to_us(timerange.lower), to_us(timerange.upper)
+    return range(lower // DAY_US + 1, (upper - 1) // DAY_US + 2)
+
+
+def lock_days(keys_and_days):
+    """
+    Exclusive-блокировки дней, как у длинной брони, для пар (ключ, день)
+    из `resource_key`/`staff_key` и `day_numbers`. Берутся по возрастанию,
+    ключи ресурсов раньше ключей сотрудников — в порядке `lock_timerange`.
+    """
+    pairs = sorted(set(keys_and_days), key=lambda pair: (pair[0] < 0, pair))
+    if not pairs:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(k, -d)"
+            " FROM unnest(%s::int[], %s::int[]) AS t(k, d)",
+            [[key for key, _ in pairs], [day for _, day in pairs]],
+        )
+
+
+def _lock_key(key, timerange):
+    lower, upper = to_us(timerange.lower), to_us(timerange.upper)
+    # Дни — отрицательные номера, корзины — положительные
+    days = day_numbers(timerange)
+    first_bucket, last_bucket = lower // _bucket_us(), (upper - 1) // _bucket_us()
+    long_booking = last_bucket - first_bucket + 1 > _max_buckets()
+
+    with connection.cursor() as cursor:
+        day_lock = 'pg_advisory_xact_lock' if long_booking \
+            else 'pg_advisory_xact_lock_shared'
+        cursor.execute(
+            f"SELECT {day_lock}(%s, -d::int)"
+            " FROM generate_series(%s::bigint, %s::bigint) AS d",
+            [key, days[0], days[-1]],
+        )
+        if not long_booking:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(%s, b::int)"
+                " FROM generate_series(%s::bigint, %s::bigint) AS b",
+                [key, first_bucket, last_bucket],
+            )
+
+
+def remaining_capacity(resource, timerange, exclude_pk=None) -> tuple[int, int]:
+    """
+    (вместимость, занято) ресурса на интервале. Вместимость — как
+    в календаре (`availability.window_capacity`): часть интервала вне окон
+    ограничена Resource.max_capacity.
+    """
+    windows = list(CapacityWindow.objects.filter(
+        resource=resource, timerange__overlap=timerange
+    ).values_list('timerange', 'capacity'))
+    capacity = window_capacity(
+        windows, timerange.lower, timerange.upper, resource.max_capacity
+    )
+    bookings = Booking.objects.overlapping(timerange).filter(resource=resource)
+    if exclude_pk is not None:
+        bookings = bookings.exclude(pk=exclude_pk)
+    used = bookings.aggregate(used=Sum('quantity'))['used'] or 0
+    return capacity, used
+
+
+def overlapping_bookings(booking):
+    """
+    Брони того же пользователя на том же ресурсе или того же сотрудника,
+    пересекающиеся с `booking`.
+    """
+    conflicts = Q(user_id=booking.user_id, resource_id=booking.resource_id)
+    if booking.staff_id is not None:
+        conflicts |= Q(staff_id=booking.staff_id)
+    bookings = Booking.objects.overlapping(booking.timerange).filter(conflicts)
+    if booking.pk is not None:
+        bookings = bookings.exclude(pk=booking.pk)
+    return bookings
+
+
+def admit(booking: Booking) -> Booking:
+    """
+    Проверяет вместимость и сохраняет бронь атомарно.
+
+    Бросает ValidationError, если мест не хватает или бронь нарушает
+    ограничения пересечений пользователя/сотрудника.
+    """
+    timerange = booking.timerange
+    if timerange is None or timerange.lower is None or timerange.upper is None:
+        raise ValidationError('`timerange` must be set with both start and end times.')
+    if timerange.lower >= timerange.upper:
+        raise ValidationError('`timerange.start` must be less than `timerange.end`.')
+    # В том числе BOOKING_MAX_DURATION_DAYS
+    booking.clean()
+
+    with transaction.atomic():
+        lock_timerange(booking.resource_id, timerange, booking.staff_id)
+        if overlapping_bookings(booking).exists():
+            raise ValidationError('Booking overlaps an existing booking.')
+        capacity, used = remaining_capacity(
+            booking.resource, timerange, exclude_pk=booking.pk
+        )
+        if used + booking.quantity > capacity:
+            raise ValidationError(
+                f'Not enough capacity: requested {booking.quantity}, '
+                f'already used {used}, limit {capacity}'
+            )
+        try:
+            with transaction.atomic():
+                booking.save()
+        except IntegrityError as e:
+            raise ValidationError(f'Booking overlaps an existing booking: {e}')
+    return booking
+
+
+def admit_booking(*, user, resource, timerange, quantity=1, staff=None, **fields) -> Booking:
+    if not isinstance(resource, Resource):
+        resource = Resource.objects.get(pk=resource)
+    return admit(Booking(
+        user=user,
+        resource=resource,
+        timerange=timerange,
+        quantity=quantity,
+        staff=staff,
+        **fields
+    ))
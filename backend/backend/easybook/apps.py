@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class EasybookConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'easybook'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from easybook import checks, metrics, signals  # noqa: F401
+
+        connection_created.connect(metrics.install, dispatch_uid='easybook.metrics')
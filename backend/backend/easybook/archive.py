@@ -0,0 +1,122 @@
+"""
+Архивация прошедших бронирований.
+
+Брони, закончившиеся раньше BOOKING_ARCHIVE_AFTER_DAYS дней назад,
+переносятся из Booking в ArchivedBooking — живая таблица с её
+GiST-индексами и ограничениями-исключениями остаётся маленькой, а
+история пользователя читается из архива (`ArchivedBookingViewSet`).
+
+Перенос идёт пачками: `DELETE … RETURNING` и `INSERT` одним запросом в
+короткой транзакции, строки выбираются `FOR UPDATE SKIP LOCKED`, так что
+архивация не ждёт параллельных изменений и может идти на живой базе.
+Отсоединённые секции (`easybook.partitioning`) переносятся целиком и
+удаляются.
+
+Запускается командой `archive_bookings` или beat-задачей
+`archive_bookings_task`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from easybook import feeds, partitioning
+from easybook.models import ArchivedBooking, Booking
+
+
+BATCH_SIZE = 1000
+
+BOOKING_TABLE = Booking._meta.db_table
+ARCHIVE_TABLE = ArchivedBooking._meta.db_table
+ARCHIVE_COLUMNS = (
+    '"id", "user_id", "resource_id", "staff_id", "start", "end",'
+    ' "quantity", "is_confirmed", "additional_info", "archived_at"'
+)
+SOURCE_COLUMNS = (
+    '"id", "user_id", "resource_id", "staff_id",'
+    ' lower("timerange"), upper("timerange"),'
+    ' "quantity", "is_confirmed", "additional_info"'
+)
+
+# lower(timerange) в условии — диапазон по booking_start_id_idx
+# и отсечение секций
+MOVE_SQL = f"""
+WITH moved AS (
+    DELETE FROM "{BOOKING_TABLE}" WHERE "id" IN (
+        SELECT "id" FROM "{BOOKING_TABLE}"
+        WHERE lower("timerange") < %(before)s AND upper("timerange") <= %(before)s
+        ORDER BY lower("timerange"), "id"
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING {SOURCE_COLUMNS}
+)
+INSERT INTO "{ARCHIVE_TABLE}" ({ARCHIVE_COLUMNS})
+SELECT *, now() FROM moved
+RETURNING "resource_id", "staff_id"
+"""
+
+
+def _archive_after_days() -> int:
+    return getattr(settings, 'BOOKING_ARCHIVE_AFTER_DAYS', 0)
+
+
+def horizon(days=None):
+    """
+    Момент, раньше которого закончившиеся брони уходят в архив;
+    None, если архивация выключена.
+    """
+    days = _archive_after_days() if days is None else days
+    if not days:
+        return None
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_bookings(before, batch_size=BATCH_SIZE) -> int:
+    """
+    Переносит в архив брони, закончившиеся не позже `before`.
+    Возвращает число перенесённых.
+    """
+    total = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(MOVE_SQL, {'before': before, 'limit': batch_size})
+            rows = cursor.fetchall()
+            # Из ICS-лент пропадают прошедшие события — меняем их ETag
+            feeds.touch({row[0] for row in rows}, {row[1] for row in rows})
+        total += len(rows)
+        if len(rows) < batch_size:
+            return total
+
+
+def archive_detached_partitions() -> dict[str, int]:
+    """
+    Переносит в архив отсоединённые секции Booking и удаляет их.
+    """
+    archived = {}
+    for table in partitioning.detached_partitions():
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO "{ARCHIVE_TABLE}" ({ARCHIVE_COLUMNS})'
+                f' SELECT {SOURCE_COLUMNS}, now() FROM "{table}"'
+                f' WHERE "timerange" IS NOT NULL'
+            )
+            archived[table] = cursor.rowcount
+            cursor.execute(f'DROP TABLE "{table}"')
+    return archived
+
+
+def run(days=None, batch_size=BATCH_SIZE):
+    """
+    Архивация по настройкам: отсоединённые секции и брони старше горизонта.
+    None, если архивация выключена.
+    """
+    before = horizon(days)
+    if before is None:
+        return None
+    partitions = archive_detached_partitions()
+    return {
+        'bookings': archive_bookings(before, batch_size),
+        'partitions': partitions,
+    }
@@ -0,0 +1,397 @@
+"""
+Движок свободных слотов.
+
+Раскрывает AvailabilityRule ресурса в слоты на диапазон дат и вычитает
+из вместимости (CapacityWindow / Resource.max_capacity) суммарный
+`quantity` пересекающихся бронирований.
+
+Вся выборка укладывается в фиксированное число запросов (правила, окна
+вместимости, бронирования), а пересечения считаются над массивами NumPy,
+поэтому стоимость не растёт с количеством дней в календаре.
+
+Время внутри модуля хранится как int64 — микросекунды от эпохи (UTC).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import NamedTuple
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from easybook import model_cache
+from easybook.models import AvailabilityRule, Booking, CapacityWindow
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ONE_US = timedelta(microseconds=1)
+# Границы для бесконечных диапазонов (lower/upper = None)
+MIN_US = np.iinfo(np.int64).min
+MAX_US = np.iinfo(np.int64).max
+
+
+class Slots(NamedTuple):
+    """
+    Слоты ресурса в виде параллельных массивов.
+    """
+    start: np.ndarray     # int64, мкс от эпохи
+    end: np.ndarray       # int64, мкс от эпохи
+    capacity: np.ndarray  # int64
+    booked: np.ndarray    # int64
+
+    @property
+    def free(self) -> np.ndarray:
+        return np.maximum(self.capacity - self.booked, 0)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+
+def to_us(value: datetime) -> int:
+    return (value - EPOCH) // ONE_US
+
+
+def from_us(value: int, tz=None) -> datetime:
+    return (EPOCH + timedelta(microseconds=int(value))).astimezone(
+        tz or timezone.get_current_timezone()
+    )
+
+
+def day_bounds(start_date, end_date, tz=None) -> tuple[datetime, datetime]:
+    """
+    Aware-границы [start_date 00:00, end_date + 1 00:00) в зоне `tz`.
+    """
+    tz = tz or timezone.get_current_timezone()
+    lower = timezone.make_aware(datetime.combine(start_date, datetime.min.time()), tz)
+    upper = timezone.make_aware(
+        datetime.combine(end_date + timedelta(days=1), datetime.min.time()), tz
+    )
+    return lower, upper
+
+
+def ranges_to_arrays(ranges) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Список DateTimeTZRange -> (lower, upper) массивы в мкс.
+    """
+    lower = np.fromiter(
+        (MIN_US if r.lower is None else to_us(r.lower) for r in ranges),
+        dtype=np.int64, count=len(ranges),
+    )
+    upper = np.fromiter(
+        (MAX_US if r.upper is None else to_us(r.upper) for r in ranges),
+        dtype=np.int64, count=len(ranges),
+    )
+    return lower, upper
+
+
+def rules_queryset(start_date, end_date):
+    """
+    Все правила, которые могут действовать в диапазоне дат:
+    еженедельные + разовые на даты из диапазона.
+    """
+    return AvailabilityRule.objects.filter(
+        Q(specific_date__isnull=True, weekday__isnull=False) |
+        Q(specific_date__range=(start_date, end_date))
+    )
+
+
+def expand_rules(rules, start_date, end_date, tz=None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Раскрывает правила в слоты на каждый день диапазона (включительно).
+
+    `rules` — итерируемое кортежей
+    (weekday, specific_date, start_time, end_time, slot_size).
+    Если на дату есть разовые правила — действуют только они,
+    иначе еженедельные (как в `AvailabilityRuleQuerySet.effective_for_day`).
+    Правило без `slot_size` даёт один слот на весь интервал.
+    """
+    tz = tz or timezone.get_current_timezone()
+    weekly, specific = {}, {}
+    for weekday, specific_date, start_time, end_time, slot_size in rules:
+        if specific_date is not None:
+            specific.setdefault(specific_date, []).append(
+                (start_time, end_time, slot_size)
+            )
+        else:
+            weekly.setdefault(weekday, []).append(
+                (start_time, end_time, slot_size)
+            )
+
+    starts, ends = [], []
+    day = start_date
+    while day <= end_date:
+        for start_time, end_time, slot_size in (
+            specific.get(day) or weekly.get(day.weekday(), ())
+        ):
+            lower = to_us(timezone.make_aware(datetime.combine(day, start_time), tz))
+            upper = to_us(timezone.make_aware(datetime.combine(day, end_time), tz))
+            if slot_size:
+                step = slot_size * 60 * 1_000_000
+                slot_starts = np.arange(lower, upper - step + 1, step, dtype=np.int64)
+                starts.append(slot_starts)
+                ends.append(slot_starts + step)
+            elif lower < upper:
+                starts.append(np.array([lower], dtype=np.int64))
+                ends.append(np.array([upper], dtype=np.int64))
+        day += timedelta(days=1)
+
+    if not starts:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    start, end = np.concatenate(starts), np.concatenate(ends)
+    order = np.argsort(start, kind='stable')
+    return start[order], end[order]
+
+
+def overlap_sum(start, end, lower, upper, values) -> np.ndarray:
+    """
+    Для каждого интервала [start, end) — сумма `values` пересекающихся
+    интервалов [lower, upper).
+
+    Пересекаются те, у кого lower < end и upper > start. Интервалы
+    с upper <= start — подмножество интервалов с lower < end, поэтому
+    сумма считается разностью двух префиксных сумм.
+    """
+    if len(lower) == 0:
+        return np.zeros(len(start), dtype=np.int64)
+    by_lower = np.argsort(lower, kind='stable')
+    by_upper = np.argsort(upper, kind='stable')
+    cum_lower = np.concatenate(([0], np.cumsum(values[by_lower])))
+    cum_upper = np.concatenate(([0], np.cumsum(values[by_upper])))
+    started = np.searchsorted(lower[by_lower], end, side='left')
+    finished = np.searchsorted(upper[by_upper], start, side='right')
+    return cum_lower[started] - cum_upper[finished]
+
+
+def overlap_min(start, end, lower, upper, values, default) -> np.ndarray:
+    """
+    Для каждого интервала [start, end) — минимум `values` пересекающихся
+    непересекающихся между собой интервалов [lower, upper)
+    (как у CapacityWindow). Часть интервала, не покрытая ни одним из них,
+    даёт `default`.
+    """
+    default = np.broadcast_to(np.asarray(default, dtype=np.int64), start.shape)
+    result = default.copy()
+    if len(lower) == 0:
+        return result
+    order = np.argsort(lower, kind='stable')
+    lower, upper, values = lower[order], upper[order], values[order]
+    # Окна не пересекаются, поэтому подходящие образуют отрезок [first, last)
+    first = np.searchsorted(upper, start, side='right')
+    last = np.searchsorted(lower, end, side='left')
+    count = last - first
+    covered = np.zeros(start.shape, dtype=np.int64)
+    for k in range(int(count.max(initial=0))):
+        more = count > k
+        index = first[more] + k
+        window_value = values[index]
+        result[more] = window_value if k == 0 else np.minimum(result[more], window_value)
+        covered[more] += (
+            np.minimum(upper[index], end[more]) - np.maximum(lower[index], start[more])
+        )
+    partial = (count > 0) & (covered < end - start)
+    result[partial] = np.minimum(result[partial], default[partial])
+    return result
+
+
+def _slots(resource, rules, windows, bookings, start_date, end_date, tz) -> Slots:
+    start, end = expand_rules(rules, start_date, end_date, tz)
+    w_lower, w_upper = ranges_to_arrays([w[0] for w in windows])
+    capacity = overlap_min(
+        start, end, w_lower, w_upper,
+        np.fromiter((w[1] for w in windows), dtype=np.int64, count=len(windows)),
+        resource.max_capacity,
+    )
+    b_lower, b_upper = ranges_to_arrays([b[0] for b in bookings])
+    booked = overlap_sum(
+        start, end, b_lower, b_upper,
+        np.fromiter((b[1] for b in bookings), dtype=np.int64, count=len(bookings)),
+    )
+    return Slots(start, end, capacity, booked)
+
+
+def _window_querysets(resource, start_date, end_date, tz):
+    lower, upper = day_bounds(start_date, end_date, tz)
+    window = DateTimeTZRange(lower, upper)
+    return (
+        CapacityWindow.objects.filter(
+            resource=resource, timerange__overlap=window
+        ).values_list('timerange', 'capacity'),
+        Booking.objects.overlapping(window).filter(
+            resource=resource
+        ).values_list('timerange', 'quantity'),
+    )
+
+
+def resource_slots(resource, start_date, end_date, tz=None) -> Slots:
+    """
+    Слоты ресурса на даты [start_date, end_date] c вместимостью и занятостью.
+
+    Три запроса независимо от длины диапазона (правила — из
+    `easybook.model_cache`, при попадании в кэш — два).
+    """
+    rules = model_cache.availability_rule_rows(resource.pk, start_date, end_date)
+    windows, bookings = _window_querysets(resource, start_date, end_date, tz)
+    return _slots(
+        resource, rules, list(windows), list(bookings), start_date, end_date, tz
+    )
+
+
+async def aresource_slots(resource, start_date, end_date, tz=None) -> Slots:
+    """
+    Асинхронный вариант `resource_slots` на async ORM.
+    """
+    rules = await sync_to_async(model_cache.availability_rule_rows)(
+        resource.pk, start_date, end_date
+    )
+    windows, bookings = _window_querysets(resource, start_date, end_date, tz)
+    return _slots(
+        resource,
+        rules,
+        [row async for row in windows],
+        [row async for row in bookings],
+        start_date,
+        end_date,
+        tz,
+    )
+
+
+def _free(slots, tz) -> list[dict]:
+    free = slots.free
+    return [
+        {
+            'start': from_us(slots.start[i], tz),
+            'end': from_us(slots.end[i], tz),
+            'capacity': int(slots.capacity[i]),
+            'free': int(free[i]),
+        }
+        for i in np.flatnonzero(free > 0)
+    ]
+
+
+def free_slots(resource, start_date, end_date, tz=None) -> list[dict]:
+    """
+    Свободные слоты ресурса (free > 0) в виде списка словарей.
+    """
+    return _free(resource_slots(resource, start_date, end_date, tz), tz)
+
+
+async def afree_slots(resource, start_date, end_date, tz=None) -> list[dict]:
+    return _free(await aresource_slots(resource, start_date, end_date, tz), tz)
+
+
+def covers(lower, upper, starts, ends) -> bool:
+    """
+    Покрывает ли объединение интервалов [starts, ends) отрезок [lower, upper).
+    Интервалы отсортированы по началу.
+    """
+    reached = lower
+    for start, end in zip(starts, ends):
+        if start > reached:
+            break
+        reached = max(reached, end)
+        if reached >= upper:
+            return True
+    return False
+
+
+def window_capacity(windows, lower, upper, default) -> int:
+    """
+    Вместимость на [lower, upper) по окнам [(timerange, capacity), ...]:
+    минимум окон, а если окна покрывают отрезок не целиком — не больше
+    `default`.
+    """
+    if not windows:
+        return default
+    start = np.array([to_us(lower)], dtype=np.int64)
+    end = np.array([to_us(upper)], dtype=np.int64)
+    w_lower, w_upper = ranges_to_arrays([timerange for timerange, _ in windows])
+    values = np.fromiter((c for _, c in windows), dtype=np.int64, count=len(windows))
+    return int(overlap_min(start, end, w_lower, w_upper, values, default)[0])
+
+
+def window_usage(resource_ids, lower, upper) -> dict:
+    """
+    {resource_id: (вместимость, занято)} на окне [lower, upper) по тем же
+    правилам, что и приём брони (`admission.remaining_capacity`):
+    вместимость — `window_capacity`, занято — сумма всех пересекающих
+    окно броней. Общая для поиска по правилам и по материализованным
+    слотам. Два запроса.
+    """
+    window = DateTimeTZRange(lower, upper)
+    booked = dict(
+        Booking.objects.overlapping(window).filter(
+            resource_id__in=resource_ids
+        ).values('resource_id').annotate(
+            booked=Sum('quantity')
+        ).values_list('resource_id', 'booked')
+    )
+    windows = {}
+    for resource_id, timerange, capacity in CapacityWindow.objects.filter(
+        resource_id__in=resource_ids, timerange__overlap=window
+    ).values_list('resource_id', 'timerange', 'capacity'):
+        windows.setdefault(resource_id, []).append((timerange, capacity))
+    return {
+        resource_id: (
+            window_capacity(windows.get(resource_id, ()), lower, upper, max_capacity),
+            booked.get(resource_id, 0),
+        )
+        for resource_id, max_capacity in resource_ids.items()
+    }
+
+
+def available(resources, usage, quantity) -> list[tuple]:
+    """
+    (resource, вместимость, свободно) ресурсов, где свободно не меньше
+    `quantity`; `usage` — результат `window_usage`.
+    """
+    result = []
+    for resource in resources:
+        capacity, booked = usage[resource.pk]
+        if capacity - booked >= quantity:
+            result.append((resource, capacity, capacity - booked))
+    return result
+
+
+def search_available(resources, lower, upper, quantity=1, tz=None) -> list[tuple]:
+    """
+    Ресурсы, открытые на всём окне [lower, upper) и имеющие в нём
+    не меньше `quantity` свободных мест.
+
+    Возвращает список (resource, capacity, free). Число запросов
+    не зависит от количества ресурсов: сами ресурсы, правила и
+    `window_usage` для ресурсов, открытых на всём окне.
+    """
+    tz = tz or timezone.get_current_timezone()
+    start_date = timezone.localtime(lower, tz).date()
+    end_date = timezone.localtime(upper, tz).date()
+
+    resources = list(resources)
+    if not resources:
+        return []
+    ids = [resource.pk for resource in resources]
+
+    rules = {}
+    for resource_id, *rule in rules_queryset(start_date, end_date).filter(
+        resource_id__in=ids
+    ).values_list(
+        'resource_id', 'weekday', 'specific_date', 'start_time', 'end_time'
+    ):
+        # Для поиска важно только покрытие окна, слоты не нарезаем
+        rules.setdefault(resource_id, []).append((*rule, None))
+
+    lower_us, upper_us = to_us(lower), to_us(upper)
+    covered = []
+    for resource in resources:
+        if resource.pk not in rules:
+            continue
+        starts, ends = expand_rules(rules[resource.pk], start_date, end_date, tz)
+        if covers(lower_us, upper_us, starts, ends):
+            covered.append(resource)
+    if not covered:
+        return []
+    usage = window_usage(
+        {resource.pk: resource.max_capacity for resource in covered}, lower, upper
+    )
+    return available(covered, usage, quantity)
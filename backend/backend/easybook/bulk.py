@@ -0,0 +1,452 @@
+"""
+Массовый импорт бронирований (миграция из старых систем).
+
+Строки (NDJSON или CSV) проверяются в памяти по заранее загруженным
+пользователям и ValidationContext (Resource / Staff / ResourceStaff) —
+по одному запросу на модель и пачку, — после чего пачка вставляется через COPY во временную
+таблицу и один INSERT ... ON CONFLICT DO NOTHING. Нарушения exclusion-
+ограничений не прерывают пачку, а возвращаются по строкам.
+
+Перед вставкой под exclusive-блокировками дней `easybook.admission` (одна
+на ресурс или сотрудника и день пачки) строки принимаются по тем же
+правилам, что и одиночная бронь: пересечения по пользователю и сотруднику
+(у секционированной таблицы ограничения-исключения не видят брони из
+соседних секций) и вместимость ресурса.
+
+Формат строки:
+    {"user": <id или email>, "resource": <id>, "staff": <id или null>,
+     "start": "<ISO 8601>", "end": "<ISO 8601>", "quantity": 1,
+     "is_confirmed": false, "additional_info": ""}
+"""
+import csv
+import io
+import json
+from bisect import bisect_left, insort
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from easybook import admission, feeds, materialization
+from easybook.availability import window_capacity
+from easybook.models import (
+    Booking, CapacityWindow, Resource, User, ValidationContext, booking_max_duration,
+)
+
+
+DEFAULT_BATCH_SIZE = 5000
+COLUMNS = (
+    'id', 'user_id', 'resource_id', 'staff_id', 'timerange',
+    'is_confirmed', 'quantity', 'additional_info',
+)
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+OVERLAP_ERROR = 'Booking overlaps an existing booking.'
+
+
+def parse_ndjson(stream):
+    """
+    (номер строки, dict) из NDJSON. Ошибки разбора — (номер, str).
+    """
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, f'Invalid JSON: {e}'
+            continue
+        yield line_no, row if isinstance(row, dict) else 'Row must be an object.'
+
+
+def parse_csv(stream):
+    """
+    (номер строки, dict) из CSV с заголовком.
+    """
+    for line_no, row in enumerate(csv.DictReader(stream), start=2):
+        yield line_no, {key: value for key, value in row.items() if value != ''}
+
+
+def _preload(rows):
+    """
+    Пользователи и ValidationContext пачки — по одному запросу на модель.
+    """
+    user_keys = {row.get('user') for _, row in rows}
+    user_ids = {int(key) for key in user_keys if str(key).isdigit()}
+    emails = {key for key in user_keys if isinstance(key, str) and '@' in key}
+    users = {}
+    for pk, email in User.objects.filter(
+        Q(pk__in=user_ids) | Q(email__in=emails)
+    ).values_list('pk', 'email'):
+        users[pk] = users[str(pk)] = users[email] = pk
+
+    return users, load_context(row for _, row in rows)
+
+
+def load_context(rows):
+    """
+    ValidationContext для ресурсов и сотрудников строк.
+    """
+    rows = list(rows)
+    return ValidationContext.load(
+        resource_ids=(_int(row.get('resource')) for row in rows),
+        staff_ids=(_int(row.get('staff')) for row in rows),
+    )
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _datetime(value):
+    value = parse_datetime(value) if isinstance(value, str) else None
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _timerange_errors(start, end) -> list:
+    max_duration = booking_max_duration()
+    if start is None or end is None:
+        return ['`start` and `end` must be ISO 8601 datetimes.']
+    if start >= end:
+        return ['`timerange.start` must be less than `timerange.end`.']
+    if max_duration is not None and end - start > max_duration:
+        return ['Booking is longer than the allowed maximum duration.']
+    return []
+
+
+def _staff_errors(row, resource_id, staff_id, context) -> list:
+    """
+    Проверки сотрудника `Booking.clean` по ValidationContext.
+    """
+    if row.get('staff') is not None and context.staff_company(staff_id) is None:
+        return ['Unknown staff.']
+    resource = context.resource(resource_id)
+    if resource is None:
+        return []
+    company_id, requires_staff = resource
+    if staff_id is None:
+        return ['This resource requires selecting a staff member.'] if requires_staff else []
+    if context.staff_company(staff_id) != company_id:
+        return ['Selected staff must belong to the same company as the resource.']
+    if not context.is_assigned(resource_id, staff_id):
+        return ['Selected staff is not assigned to this resource.']
+    return []
+
+
+def validate_row(row, users, context):
+    """
+    Проверки `Booking.clean` без обращений к базе.
+    Возвращает (значения колонок без id, список ошибок).
+    """
+    errors = []
+    user_id = users.get(row.get('user'))
+    if user_id is None:
+        errors.append('Unknown user.')
+
+    resource_id = _int(row.get('resource'))
+    if context.resource(resource_id) is None:
+        errors.append('Unknown resource.')
+
+    start, end = _datetime(row.get('start')), _datetime(row.get('end'))
+    errors.extend(_timerange_errors(start, end))
+
+    quantity = _int(row.get('quantity', 1))
+    if quantity is None or quantity < 1:
+        errors.append('`quantity` must be a positive integer.')
+
+    staff_id = _int(row.get('staff'))
+    errors.extend(_staff_errors(row, resource_id, staff_id, context))
+
+    if errors:
+        return None, errors
+    return (
+        user_id,
+        resource_id,
+        staff_id,
+        DateTimeTZRange(start, end),
+        str(row.get('is_confirmed', False)).lower() in TRUE_VALUES,
+        quantity,
+        row.get('additional_info', ''),
+    ), []
+
+
+def copy_rows(cursor, table, columns, buffer):
+    """
+    COPY CSV из `buffer` в таблицу бронирований (пустой staff_id — NULL).
+    """
+    raw = cursor.cursor
+    sql = (
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN "
+        f"WITH (FORMAT csv, FORCE_NULL (staff_id))"
+    )
+    if hasattr(raw, 'copy_expert'):  # psycopg2
+        raw.copy_expert(sql, buffer)
+    else:  # psycopg 3
+        with raw.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+# Бронь b пересекает строку импорта i по пользователю или сотруднику
+OVERLAP_SQL = (
+    "b.timerange && i.timerange AND ("
+    "(b.user_id = i.user_id AND b.resource_id = i.resource_id)"
+    " OR (i.staff_id IS NOT NULL AND b.staff_id = i.staff_id))"
+)
+
+
+def lock_batch(values):
+    """
+    Блокировки дней ресурсов и сотрудников строк пачки.
+    """
+    keys_and_days = []
+    for _, (_, resource_id, staff_id, timerange, *_) in values:
+        keys = [admission.resource_key(resource_id)]
+        if staff_id is not None:
+            keys.append(admission.staff_key(staff_id))
+        keys_and_days.extend(
+            (key, day) for key in keys for day in admission.day_numbers(timerange)
+        )
+    admission.lock_days(keys_and_days)
+
+
+def _overlaps_accepted(accepted, timerange) -> bool:
+    """
+    Пересекает ли `timerange` один из непересекающихся интервалов
+    `accepted` [(lower, upper), ...], упорядоченных по lower.
+    """
+    # Последний интервал, начинающийся раньше конца timerange
+    index = bisect_left(accepted, (timerange.upper,)) - 1
+    return index >= 0 and accepted[index][1] > timerange.lower
+
+
+def _partition_bounds():
+    """
+    Условие на lower(b.timerange), ограничивающее секции при соединении
+    броней b со строками импорта i (как в BookingQuerySet.overlapping).
+    """
+    bounds = "lower(b.timerange) < upper(i.timerange)"
+    params = []
+    max_duration = booking_max_duration()
+    if max_duration is not None:
+        bounds += " AND lower(b.timerange) > lower(i.timerange) - %s"
+        params.append(max_duration)
+    return bounds, params
+
+
+def stored_conflicts(cursor, table):
+    """
+    Что сохранённые брони значат для строк временной таблицы:
+    (id строк, пересекающих их по пользователю или сотруднику,
+    {id: (Resource.max_capacity, занято)}, {id: [(timerange, capacity), ...]}).
+    """
+    bounds, params = _partition_bounds()
+    cursor.execute(
+        f"SELECT i.id FROM {table}_import i WHERE EXISTS ("
+        f"SELECT 1 FROM {table} b WHERE {OVERLAP_SQL} AND {bounds})",
+        params,
+    )
+    overlapping = {pk for pk, in cursor.fetchall()}
+    cursor.execute(
+        f"SELECT i.id, r.max_capacity, COALESCE(SUM(b.quantity), 0)"
+        f" FROM {table}_import i"
+        f" JOIN {Resource._meta.db_table} r ON r.id = i.resource_id"
+        f" LEFT JOIN {table} b ON b.resource_id = i.resource_id"
+        f" AND b.timerange && i.timerange AND {bounds}"
+        f" GROUP BY i.id, r.max_capacity",
+        params,
+    )
+    usage = {pk: (max_capacity, used) for pk, max_capacity, used in cursor.fetchall()}
+    cursor.execute(
+        f"SELECT i.id, w.timerange, w.capacity FROM {table}_import i"
+        f" JOIN {CapacityWindow._meta.db_table} w ON w.resource_id = i.resource_id"
+        f" AND w.timerange && i.timerange"
+    )
+    windows = {}
+    for pk, timerange, capacity in cursor.fetchall():
+        windows.setdefault(pk, []).append((timerange, capacity))
+    return overlapping, usage, windows
+
+
+def admit_rows(rows, overlapping, usage, windows) -> dict:
+    """
+    Построчный приём [(id, значения), ...] в порядке id по правилам
+    `admission.admit_booking`: строка отклоняется, если пересекает
+    сохранённую или ранее принятую бронь того же пользователя на том же
+    ресурсе или того же сотрудника, либо если ей не хватает мест
+    (`admission.remaining_capacity` с учётом принятых строк). Отклонённая
+    строка не влияет на следующие. Возвращает {id: ошибка}.
+    """
+    accepted = {}
+    booked = {}
+    rejected = {}
+    for pk, (user_id, resource_id, staff_id, timerange, _, quantity, _) in rows:
+        keys = [('user', user_id, resource_id)]
+        if staff_id is not None:
+            keys.append(('staff', staff_id))
+        if pk in overlapping or any(
+            _overlaps_accepted(accepted.get(key, []), timerange) for key in keys
+        ):
+            rejected[pk] = OVERLAP_ERROR
+            continue
+
+        max_capacity, used = usage[pk]
+        used += sum(
+            other for lower, upper, other in booked.get(resource_id, ())
+            if lower < timerange.upper and timerange.lower < upper
+        )
+        capacity = window_capacity(
+            windows.get(pk), timerange.lower, timerange.upper, max_capacity
+        )
+        if used + quantity > capacity:
+            rejected[pk] = (
+                f'Not enough capacity: requested {quantity}, '
+                f'already used {used}, limit {capacity}'
+            )
+            continue
+
+        for key in keys:
+            insort(accepted.setdefault(key, []), (timerange.lower, timerange.upper))
+        booked.setdefault(resource_id, []).append(
+            (timerange.lower, timerange.upper, quantity)
+        )
+    return rejected
+
+
+def reject_rows(cursor, table, rows) -> dict:
+    """
+    Удаляет из временной таблицы строки [(id, значения), ...], не
+    прошедшие `admit_rows`, и возвращает {id: ошибка}.
+    """
+    rejected = admit_rows(rows, *stored_conflicts(cursor, table))
+    if rejected:
+        cursor.execute(
+            f"DELETE FROM {table}_import WHERE id = ANY(%s)", [list(rejected)]
+        )
+    return rejected
+
+
+def insert_batch(values):
+    """
+    Вставляет [(line_no, значения), ...] через COPY.
+    Возвращает [(line_no, ошибка), ...] отклонённых строк.
+    """
+    table = Booking._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id'))"
+            " FROM generate_series(1, %s)",
+            [table, len(values)],
+        )
+        ids = [pk for pk, in cursor.fetchall()]
+        line_by_id = dict(zip(ids, (line_no for line_no, _ in values)))
+
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {table}_import"
+            f" (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        for pk, (_, row) in zip(ids, values):
+            user_id, resource_id, staff_id, timerange, *rest = row
+            writer.writerow((
+                pk, user_id, resource_id, staff_id,
+                f'[{timerange.lower.isoformat()},{timerange.upper.isoformat()})',
+                *rest,
+            ))
+        buffer.seek(0)
+        copy_rows(cursor, f'{table}_import', COLUMNS, buffer)
+
+        lock_batch(values)
+        rejected = reject_rows(
+            cursor, table, [(pk, row) for pk, (_, row) in zip(ids, values)]
+        )
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(COLUMNS)})"
+            f" SELECT {', '.join(COLUMNS)} FROM {table}_import ORDER BY id"
+            f" ON CONFLICT DO NOTHING RETURNING id"
+        )
+        inserted = {pk for pk, in cursor.fetchall()}
+        cursor.execute(f"TRUNCATE {table}_import")
+    return [
+        (line_by_id[pk], rejected.get(pk, OVERLAP_ERROR))
+        for pk in ids if pk not in inserted
+    ]
+
+
+def _validate_batch(batch, report) -> list:
+    """
+    Разбирает и проверяет пачку; ошибки пишет в `report`.
+    Возвращает [(line_no, значения), ...] прошедших проверку строк.
+    """
+    parsed = []
+    for line_no, row in batch:
+        if isinstance(row, str):
+            report['errors'].append({'line': line_no, 'errors': [row]})
+        else:
+            parsed.append((line_no, row))
+
+    users, context = _preload(parsed)
+    valid = []
+    for line_no, row in parsed:
+        values, errors = validate_row(row, users, context)
+        if errors:
+            report['errors'].append({'line': line_no, 'errors': errors})
+        else:
+            valid.append((line_no, values))
+    return valid
+
+
+def _import_batch(batch, report, touched, touched_staff):
+    """
+    Проверяет и вставляет пачку, дополняя `report` и затронутые
+    интервалы ресурсов `touched` и сотрудников `touched_staff`.
+    """
+    valid = _validate_batch(batch, report)
+    if not valid:
+        return
+
+    rejected = insert_batch(valid)
+    report['created'] += len(valid) - len(rejected)
+    report['errors'].extend(
+        {'line': line_no, 'errors': [error]} for line_no, error in rejected
+    )
+    rejected = {line_no for line_no, _ in rejected}
+    for line_no, (_, resource_id, staff_id, timerange, *_) in valid:
+        if line_no not in rejected:
+            touched_staff.add(staff_id)
+            lower, upper = touched.get(resource_id, (timerange.lower, timerange.upper))
+            touched[resource_id] = (
+                min(lower, timerange.lower), max(upper, timerange.upper)
+            )
+
+
+def import_bookings(rows, batch_size=DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Импортирует (line_no, dict) пачками.
+
+    Возвращает {'created': N, 'errors': [{'line': n, 'errors': [...]}, ...]}.
+    """
+    report = {'created': 0, 'errors': []}
+    touched, touched_staff = {}, set()
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        _import_batch(batch, report, touched, touched_staff)
+
+    # COPY обходит сигналы — счётчики фидов и материализованные слоты обновляем сами
+    feeds.touch(touched, touched_staff)
+    if materialization.is_enabled():
+        for resource_id, (lower, upper) in touched.items():
+            dates = materialization.dates_of(DateTimeTZRange(lower, upper))
+            if dates is not None:
+                materialization.schedule_refresh(resource_id, *dates)
+
+    report['errors'].sort(key=lambda error: error['line'])
+    return report
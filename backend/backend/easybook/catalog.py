@@ -0,0 +1,120 @@
+"""
+Каталог компании для публичной страницы бронирования:
+дерево категорий, активные ресурсы с ценами и назначенные сотрудники.
+
+Каталог собирается несколькими запросами и кладётся в кэш Django
+готовой JSON-строкой под ключом `catalog:v<CATALOG_VERSION>:<slug>`,
+так что попадание — один GET из кэша без обращения к базе. Номер версии
+в ключе меняется вместе с форматом, чтобы новые воркеры не читали старые
+блобы. Сигналы (`easybook.signals`) удаляют ключ после коммита изменений
+Company, Category, Resource, Staff, ResourceCategory и ResourceStaff;
+CATALOG_CACHE_TTL ограничивает жизнь блоба, пропущенного инвалидацией.
+"""
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from easybook import metrics, model_cache
+from easybook.routers import use_primary
+from easybook.models import Category, Company, Resource, ResourceCategory, ResourceStaff, Staff
+
+
+CATALOG_VERSION = 1
+
+
+def _ttl() -> int:
+    return getattr(settings, 'CATALOG_CACHE_TTL', 60 * 60)
+
+
+def cache_key(slug) -> str:
+    return f'catalog:v{CATALOG_VERSION}:{slug}'
+
+
+def build(company) -> dict:
+    resources = list(
+        Resource.objects.filter(company=company, is_active=True).order_by('name').values(
+            'id', 'name', 'description', 'price', 'old_price', 'pricing_type',
+            'max_capacity', 'requires_staff',
+        )
+    )
+    resource_ids = [resource['id'] for resource in resources]
+
+    staff_by_resource, category_resources = {}, {}
+    for resource_id, staff_id in ResourceStaff.objects.filter(
+        resource_id__in=resource_ids, staff__is_active=True
+    ).values_list('resource_id', 'staff_id'):
+        staff_by_resource.setdefault(resource_id, []).append(staff_id)
+    for category_id, resource_id in ResourceCategory.objects.filter(
+        resource_id__in=resource_ids
+    ).values_list('category_id', 'resource_id'):
+        category_resources.setdefault(category_id, []).append(resource_id)
+    for resource in resources:
+        resource['staff'] = sorted(staff_by_resource.get(resource['id'], []))
+
+    categories = list(
+        Category.objects.filter(company=company, is_active=True).order_by(
+            'sort_order', 'name'
+        ).values('id', 'parent_id', 'name', 'slug', 'description', 'sort_order')
+    )
+    for category in categories:
+        category['parent'] = category.pop('parent_id')
+        category['resources'] = sorted(category_resources.get(category['id'], []))
+
+    staff = list(
+        Staff.objects.filter(company=company, is_active=True).order_by(
+            'display_name'
+        ).values('id', 'display_name')
+    )
+    return {
+        'company': {
+            'id': company.pk,
+            'name': company.name,
+            'slug': company.slug,
+            'description': company.description,
+        },
+        'categories': categories,
+        'resources': resources,
+        'staff': staff,
+        'generated_at': timezone.now(),
+    }
+
+
+def get_json(slug):
+    """
+    JSON каталога активной компании или None, если её нет.
+    """
+    key = cache_key(slug)
+    data = cache.get(key)
+    if data is not None:
+        metrics.cache_lookup('catalog', hits=1)
+        return data
+    metrics.cache_lookup('catalog', misses=1)
+    company = model_cache.company_by_slug(slug)
+    if company is None:
+        return None
+    with use_primary():
+        data = json.dumps(build(company), cls=DjangoJSONEncoder, ensure_ascii=False)
+    cache.set(key, data, _ttl())
+    return data
+
+
+def invalidate(company_ids=(), slugs=()):
+    """
+    Удаляет каталоги компаний после коммита текущей транзакции.
+    """
+    company_ids = {pk for pk in company_ids if pk is not None}
+    slugs = set(slugs)
+
+    def delete():
+        keys = set(slugs)
+        if company_ids:
+            keys.update(
+                Company.objects.filter(pk__in=company_ids).values_list('slug', flat=True)
+            )
+        cache.delete_many([cache_key(slug) for slug in keys])
+
+    transaction.on_commit(delete)
@@ -0,0 +1,35 @@
+"""
+Проверки `manage.py check --database default` (и `migrate`).
+"""
+from django.core.checks import Error, Tags, register
+from django.db.models import DurationField, ExpressionWrapper, F
+
+from easybook.models import Booking, booking_max_duration
+
+
+@register(Tags.database)
+def check_booking_max_duration(app_configs, databases=None, **kwargs):
+    """
+    BOOKING_MAX_DURATION_DAYS нельзя включать, пока в базе есть брони
+    длиннее: запросы пересечений (`BookingQuerySet.overlapping`) их
+    не увидят. Читает всю таблицу броней.
+    """
+    max_duration = booking_max_duration()
+    if max_duration is None or not databases:
+        return []
+    errors = []
+    for alias in databases:
+        longer = Booking.objects.using(alias).alias(
+            duration=ExpressionWrapper(
+                F('timerange__endswith') - F('timerange__startswith'),
+                output_field=DurationField(),
+            )
+        ).filter(duration__gt=max_duration).count()
+        if longer:
+            errors.append(Error(
+                f'{longer} booking(s) in database "{alias}" are longer than '
+                f'BOOKING_MAX_DURATION_DAYS.',
+                hint='Shorten or archive them, or raise BOOKING_MAX_DURATION_DAYS.',
+                id='easybook.E001',
+            ))
+    return errors
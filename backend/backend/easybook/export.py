@@ -0,0 +1,115 @@
+"""
+Потоковая выгрузка бронирований (NDJSON / CSV).
+
+Строки читаются server-side курсором (`.iterator(chunk_size=...)`) в виде
+кортежей `values_list` — экземпляры моделей не создаются, и память не
+зависит от размера выгрузки. Порядок — (lower(timerange), id), по индексу
+`booking_start_id_idx`.
+"""
+import csv
+import io
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+
+from easybook.models import Booking
+
+
+DEFAULT_CHUNK_SIZE = 2000
+COLUMNS = (
+    'id', 'company', 'resource', 'staff', 'user', 'user_email',
+    'start', 'end', 'quantity', 'is_confirmed', 'additional_info',
+)
+FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def bookings_rows(company=None, resource=None, staff=None, start=None, end=None,
+                  chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Кортежи в порядке COLUMNS. `company` — slug; `start`/`end` задают окно,
+    с которым бронь должна пересекаться.
+    """
+    queryset = Booking.objects.filter(timerange__isnull=False)
+    if company is not None:
+        queryset = queryset.filter(resource__company__slug=company)
+    if resource is not None:
+        queryset = queryset.filter(resource_id=resource)
+    if staff is not None:
+        queryset = queryset.filter(staff_id=staff)
+    if start is not None or end is not None:
+        queryset = queryset.filter(timerange__overlap=DateTimeTZRange(start, end))
+    queryset = queryset.annotate(
+        start=F('timerange__startswith'),
+        end=F('timerange__endswith'),
+    ).order_by('start', 'id').values_list(
+        'id', 'resource__company_id', 'resource_id', 'staff_id', 'user_id',
+        'user__email', 'start', 'end', 'quantity', 'is_confirmed', 'additional_info',
+    )
+    if connections[queryset.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        return _keyset_pages(queryset, chunk_size)
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def _keyset_pages(queryset, chunk_size):
+    """
+    Без server-side курсоров (PgBouncer) `.iterator()` получил бы весь
+    результат в память драйвера — читаем страницами по (start, id).
+    """
+    page = queryset
+    while True:
+        rows = list(page[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        start, pk = rows[-1][6], rows[-1][0]
+        page = queryset.filter(Q(start__gt=start) | Q(start=start, id__gt=pk))
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def to_ndjson(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Строки NDJSON, склеенные по `chunk_size` — по одной записи в ответ на пачку.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in _chunks(rows, chunk_size):
+        yield ''.join(
+            encoder.encode(dict(zip(COLUMNS, row))) + '\n' for row in chunk
+        )
+
+
+def _iso(value):
+    return value and value.isoformat()
+
+
+def to_csv(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for chunk in _chunks(rows, chunk_size):
+        writer.writerows(
+            (*row[:6], _iso(row[6]), _iso(row[7]), *row[8:])
+            for row in chunk
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def render(rows, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    if fmt == 'csv':
+        return to_csv(rows, chunk_size)
+    return to_ndjson(rows, chunk_size)
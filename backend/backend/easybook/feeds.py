@@ -0,0 +1,122 @@
+"""
+iCalendar-фиды бронирований ресурса и сотрудника.
+
+У Resource и Staff есть счётчик изменений `schedule_version` и время
+`schedule_changed_at`; их увеличивают сигналы Booking (и массовый
+импорт) после коммита. ETag / Last-Modified фида строятся только по ним,
+поэтому на опрос без изменений отвечаем `304 Not Modified` одним
+запросом по первичному ключу, не читая бронирования.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import F
+from django.utils import timezone
+
+from easybook.models import Booking, Resource, Staff
+
+
+PRODID = '-//easybook//bookings//EN'
+
+
+def _past_days() -> int:
+    return getattr(settings, 'ICS_FEED_PAST_DAYS', 30)
+
+
+def touch(resource_ids=(), staff_ids=()):
+    """
+    Увеличивает счётчики изменений после коммита текущей транзакции —
+    строка ресурса не блокируется на всё время приёма брони.
+    """
+    resource_ids = {pk for pk in resource_ids if pk is not None}
+    staff_ids = {pk for pk in staff_ids if pk is not None}
+
+    def bump():
+        now = timezone.now()
+        for model, ids in ((Resource, resource_ids), (Staff, staff_ids)):
+            if ids:
+                model.objects.filter(pk__in=ids).update(
+                    schedule_version=F('schedule_version') + 1,
+                    schedule_changed_at=now,
+                )
+
+    transaction.on_commit(bump)
+
+
+def etag(kind, pk, version) -> str:
+    return f'"{kind}-{pk}-{version}"'
+
+
+def _escape(text) -> str:
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def _fold(line) -> str:
+    """
+    Перенос строк длиннее 75 октетов (RFC 5545, 3.1).
+    """
+    raw = line.encode()
+    if len(raw) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(raw):
+        end = min(start + limit, len(raw))
+        # не режем многобайтный символ UTF-8
+        while end < len(raw) and raw[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(raw[start:end].decode())
+        start, limit = end, 74
+    return '\r\n '.join(parts)
+
+
+def _utc(value) -> str:
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def render(bookings, name, stamp) -> str:
+    """
+    VCALENDAR из кортежей (id, timerange, resource, staff, quantity, is_confirmed).
+    """
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_escape(name)}',
+    ]
+    for pk, timerange, resource, staff, quantity, is_confirmed in bookings:
+        summary = resource if quantity == 1 else f'{resource} ×{quantity}'
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:booking-{pk}@easybook',
+            f'DTSTAMP:{_utc(stamp)}',
+            f'DTSTART:{_utc(timerange.lower)}',
+            f'DTEND:{_utc(timerange.upper)}',
+            f'SUMMARY:{_escape(summary)}',
+            'STATUS:CONFIRMED' if is_confirmed else 'STATUS:TENTATIVE',
+        ]
+        if staff:
+            lines.append(f'DESCRIPTION:{_escape(staff)}')
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return ''.join(_fold(line) + '\r\n' for line in lines)
+
+
+def bookings_for(**filters):
+    """
+    Бронирования фида: не раньше ICS_FEED_PAST_DAYS дней назад.
+    """
+    since = timezone.now() - timedelta(days=_past_days())
+    # `&&` с [since, ∞) вместо upper(timerange) > since — так фильтр
+    # берёт GiST-индекс (resource, timerange) / (staff, timerange)
+    return Booking.objects.filter(
+        timerange__isnull=False, timerange__overlap=DateTimeTZRange(since, None), **filters
+    ).order_by('timerange').values_list(
+        'id', 'timerange', 'resource__name', 'staff__display_name',
+        'quantity', 'is_confirmed',
+    )
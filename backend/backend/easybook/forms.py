@@ -17,8 +17,6 @@ class CustomUserCreationForm(UserCreationForm):
             "password",
             "phone_number",
             "date_of_birth",
-            "organization_name",
-            "organization_description",
             "is_staff",
             "is_active",
             "groups",
@@ -38,8 +36,6 @@ class CustomUserChangeForm(UserChangeForm):
             "password",
             "phone_number",
             "date_of_birth",
-            "organization_name",
-            "organization_description",
             "is_staff",
             "is_active",
             "groups",
@@ -0,0 +1,108 @@
+"""
+Пакетная отправка писем.
+
+`send_batch()` отправляет пачку (тема, текст, получатель) через одно
+соединение `get_connection()`: для SMTP это одно подключение и одна
+аутентификация на пачку вместо отдельных на каждое письмо. Письма уходят
+по одному через `send_messages`, чтобы при обрыве знать, какие не ушли, —
+задача `send_email_task` повторяет только их с экспоненциальной задержкой.
+
+Получателю уходит не больше EMAIL_RATE_LIMIT писем за EMAIL_RATE_WINDOW
+секунд (счётчики в общем кэше); лишние откладываются до следующего окна.
+Место в лимите занимается до отправки и освобождается, если письмо
+не ушло, — повтор задачи не расходует лимит получателя дважды.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+
+
+BATCH_SIZE = 100
+KEY_PREFIX = 'easybook:mail-rate'
+
+
+def rate_limit() -> int:
+    return getattr(settings, 'EMAIL_RATE_LIMIT', 20)
+
+
+def rate_window() -> int:
+    return getattr(settings, 'EMAIL_RATE_WINDOW', 3600)
+
+
+def batch_size() -> int:
+    return getattr(settings, 'EMAIL_BATCH_SIZE', BATCH_SIZE)
+
+
+def allow(recipient) -> bool:
+    """
+    Засчитывает письмо получателю; False, если лимит окна исчерпан.
+    """
+    limit = rate_limit()
+    if not limit:
+        return True
+    key = f'{KEY_PREFIX}:{recipient.lower()}'
+    # add() задаёт окно только первому письму; incr() его не продлевает
+    cache.add(key, 0, rate_window())
+    try:
+        return cache.incr(key) <= limit
+    except ValueError:
+        # Окно истекло между add() и incr()
+        cache.add(key, 1, rate_window())
+        return True
+
+
+def release(recipient):
+    """
+    Возвращает место, занятое `allow()` под неотправленное письмо.
+    """
+    if not rate_limit():
+        return
+    try:
+        cache.decr(f'{KEY_PREFIX}:{recipient.lower()}')
+    except ValueError:
+        # Окно уже истекло
+        pass
+
+
+def batches(messages, size=None):
+    size = size or batch_size()
+    for i in range(0, len(messages), size):
+        yield messages[i:i + size]
+
+
+def send_batch(messages, connection=None) -> dict:
+    """
+    Отправляет [(тема, текст, получатель), ...] через одно соединение.
+
+    Возвращает {'sent': N, 'skipped': N, 'deferred': [...]}, где deferred —
+    письма сверх лимита получателя. При ошибке отправки у исключения есть
+    атрибут `unsent` — письма, которые не ушли (включая сбойное).
+    """
+    result = {'sent': 0, 'skipped': 0, 'deferred': []}
+    outgoing = []
+    for subject, body, recipient in messages:
+        if not (subject and body and recipient):
+            result['skipped'] += 1
+        elif allow(recipient):
+            outgoing.append((subject, body, recipient))
+        else:
+            result['deferred'].append((subject, body, recipient))
+    if not outgoing:
+        return result
+
+    connection = connection or get_connection(fail_silently=False)
+    from_email = settings.EMAIL_HOST_USER or None
+    with connection:
+        for index, (subject, body, recipient) in enumerate(outgoing):
+            message = EmailMessage(
+                subject, body, from_email, [recipient], connection=connection
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                for _, _, unsent in outgoing[index:]:
+                    release(unsent)
+                exc.unsent = outgoing[index:] + result['deferred']
+                raise
+            result['sent'] += 1
+    return result
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from easybook import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move bookings that ended more than --days ago, and detached booking "
+        "partitions, into the archive table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help="Archive bookings that ended this many days ago "
+                 "(default: BOOKING_ARCHIVE_AFTER_DAYS).",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=archive.BATCH_SIZE,
+            help="Bookings moved per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        result = archive.run(options['days'], options['batch_size'])
+        if result is None:
+            raise CommandError(
+                "Archiving is disabled; pass --days or set BOOKING_ARCHIVE_AFTER_DAYS."
+            )
+        for table, count in result['partitions'].items():
+            self.stdout.write(f"Archived {count} bookings from {table}")
+        self.stdout.write(self.style.SUCCESS(f"Archived {result['bookings']} bookings."))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from easybook import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain monthly partitions of the booking table: create upcoming "
+        "partitions and detach expired ones. With --convert, first turn the "
+        "table into a partitioned one (locks it for the duration)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help="Convert the booking table to monthly range partitions.",
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            help="Months of partitions to keep ahead "
+                 "(default: BOOKING_PARTITION_MONTHS_AHEAD).",
+        )
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            help="Detach partitions older than this many months, 0 keeps all "
+                 "(default: BOOKING_PARTITION_RETENTION_MONTHS).",
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help="Drop detached partitions instead of keeping them as tables.",
+        )
+
+    def handle(self, *args, **options):
+        if options['convert']:
+            created = partitioning.convert(options['months_ahead'])
+            self.stdout.write(f"Converted with {len(created)} monthly partitions.")
+        result = partitioning.maintain(
+            options['months_ahead'], options['retention_months'], options['drop']
+        )
+        if result is None:
+            raise CommandError(
+                "The booking table is not partitioned; run with --convert first."
+            )
+        for name in result['created']:
+            self.stdout.write(f"Created {name}")
+        for name in result['detached']:
+            self.stdout.write(f"{'Dropped' if options['drop'] else 'Detached'} {name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(result['created'])} created, {len(result['detached'])} detached."
+        ))
@@ -0,0 +1,65 @@
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from easybook import export
+
+
+def aware_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class Command(BaseCommand):
+    help = "Stream bookings to an NDJSON or CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o',
+            default='-',
+            help="Output file, '-' for stdout (default).",
+        )
+        parser.add_argument(
+            '--format',
+            choices=export.FORMATS,
+            help="Output format (guessed from the file extension by default).",
+        )
+        parser.add_argument('--company', help="Company slug.")
+        parser.add_argument('--resource', type=int)
+        parser.add_argument('--staff', type=int)
+        parser.add_argument(
+            '--start', type=aware_datetime,
+            help="Only bookings overlapping [start, end), ISO 8601.",
+        )
+        parser.add_argument('--end', type=aware_datetime)
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=export.DEFAULT_CHUNK_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        path = options['output']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        try:
+            # OutputWrapper дописывает перевод строки к каждому write()
+            stream = nullcontext(self.stdout._out) if path == '-' \
+                else open(path, 'w', newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(e)
+
+        rows = export.bookings_rows(
+            company=options['company'],
+            resource=options['resource'],
+            staff=options['staff'],
+            start=options['start'],
+            end=options['end'],
+            chunk_size=options['chunk_size'],
+        )
+        with stream as out:
+            for chunk in export.render(rows, fmt, options['chunk_size']):
+                out.write(chunk)
@@ -0,0 +1,43 @@
+import json
+import sys
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from easybook import bulk
+
+
+class Command(BaseCommand):
+    help = "Bulk import bookings from an NDJSON or CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, '-' for stdin.")
+        parser.add_argument(
+            '--format',
+            choices=('ndjson', 'csv'),
+            help="Input format (guessed from the file extension by default).",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=bulk.DEFAULT_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        parse = bulk.parse_csv if fmt == 'csv' else bulk.parse_ndjson
+        try:
+            stream = nullcontext(sys.stdin) if path == '-' \
+                else open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(e)
+
+        with stream as rows:
+            report = bulk.import_bookings(parse(rows), options['batch_size'])
+
+        for error in report['errors']:
+            self.stderr.write(json.dumps(error, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} bookings, {len(report['errors'])} rows rejected."
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from easybook import materialization
+
+
+class Command(BaseCommand):
+    help = "Fully rebuild the materialized slot availability table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resource',
+            type=int,
+            action='append',
+            dest='resources',
+            help="Rebuild only this resource id (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        total = materialization.rebuild(options['resources'])
+        first, last = materialization.horizon()
+        self.stdout.write(
+            self.style.SUCCESS(f"Materialized {total} slots for {first}..{last}.")
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from easybook.models import Category
+
+
+class Command(BaseCommand):
+    help = "Recompute materialized paths of the category tree."
+
+    def handle(self, *args, **options):
+        fixed = Category.objects.rebuild_paths()
+        orphaned = Category.objects.filter(path=[]).count()
+        self.stdout.write(self.style.SUCCESS(f"Updated {fixed} category paths."))
+        if orphaned:
+            self.stderr.write(self.style.WARNING(
+                f"{orphaned} categories are part of a parent cycle and have no path."
+            ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from easybook import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Return booking events that exhausted their delivery attempts to the "
+        "outbox queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'ids',
+            nargs='*',
+            type=int,
+            help="Event ids to requeue (default: all dead events).",
+        )
+
+    def handle(self, *args, **options):
+        count = outbox.requeue(options['ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f"Requeued {count} booking events."))
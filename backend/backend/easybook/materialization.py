@@ -0,0 +1,184 @@
+"""
+Материализация свободной вместимости в таблицу SlotAvailability.
+
+Включается настройкой AVAILABILITY_MATERIALIZATION. Таблица покрывает
+горизонт [сегодня, сегодня + AVAILABILITY_MATERIALIZATION_DAYS) и
+пересчитывается кусками (ресурс, диапазон дат) при изменении Booking,
+CapacityWindow и AvailabilityRule (см. `easybook.signals`), полная
+перестройка — `manage.py rebuild_availability`.
+
+Чтение календаря и поиска при этом — индексный проход по
+(resource, start) вместо интервальной арифметики на лету.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import ExpressionWrapper, DurationField, F, Sum
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from easybook.availability import (
+    available, day_bounds, from_us, resource_slots, window_usage,
+)
+from easybook.models import Resource, SlotAvailability
+
+
+def is_enabled() -> bool:
+    return getattr(settings, 'AVAILABILITY_MATERIALIZATION', False)
+
+
+def horizon():
+    """
+    Материализуемые даты [today, last_day] включительно.
+    """
+    today = timezone.localdate()
+    days = getattr(settings, 'AVAILABILITY_MATERIALIZATION_DAYS', 90)
+    return today, today + timedelta(days=days - 1)
+
+
+def in_horizon(start_date, end_date) -> bool:
+    first, last = horizon()
+    return first <= start_date and end_date <= last
+
+
+def dates_of(timerange):
+    """
+    Локальные даты, которых касается диапазон [lower, upper),
+    обрезанные по горизонту. None, если пересечения с горизонтом нет.
+    """
+    first, last = horizon()
+    if timerange is None:
+        return None
+    start_date = first if timerange.lower is None else max(
+        first, timezone.localtime(timerange.lower).date()
+    )
+    end_date = last if timerange.upper is None else min(
+        last, timezone.localtime(timerange.upper - timedelta(microseconds=1)).date()
+    )
+    if start_date > end_date:
+        return None
+    return start_date, end_date
+
+
+def refresh(resource_id, start_date=None, end_date=None):
+    """
+    Пересчитывает слоты ресурса на даты [start_date, end_date]
+    (по умолчанию — весь горизонт) под advisory-блокировкой ресурса.
+    """
+    first, last = horizon()
+    start_date = max(start_date or first, first)
+    end_date = min(end_date or last, last)
+    if start_date > end_date:
+        return 0
+
+    lower, upper = day_bounds(start_date, end_date)
+    with transaction.atomic():
+        # Параллельные пересчёты ресурса (beat, сигналы, rebuild) иначе
+        # удаляют и вставляют одни и те же слоты вперемешку. Ключ — один
+        # bigint: это пространство не пересекается с парами int4 из
+        # easybook.admission.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [resource_id])
+        # Внутри транзакции — чтения с primary (см. easybook.routers)
+        resource = Resource.objects.filter(pk=resource_id).first()
+        SlotAvailability.objects.filter(
+            resource_id=resource_id, start__gte=lower, start__lt=upper
+        ).delete()
+        if resource is None:
+            return 0
+        slots = resource_slots(resource, start_date, end_date)
+        SlotAvailability.objects.bulk_create(
+            SlotAvailability(
+                resource_id=resource_id,
+                start=from_us(start),
+                end=from_us(end),
+                capacity=int(capacity),
+                booked=int(booked),
+            )
+            for start, end, capacity, booked in zip(*slots)
+        )
+    return len(slots)
+
+
+def rebuild(resource_ids=None):
+    """
+    Полная перестройка горизонта. Заодно удаляет прошедшие слоты.
+    """
+    first, _ = horizon()
+    SlotAvailability.objects.filter(end__lt=day_bounds(first, first)[0]).delete()
+    if resource_ids is None:
+        resource_ids = Resource.objects.values_list('pk', flat=True).iterator()
+    total = 0
+    for resource_id in resource_ids:
+        total += refresh(resource_id)
+    return total
+
+
+def schedule_refresh(resource_id, start_date=None, end_date=None):
+    """
+    Ставит пересчёт в Celery после коммита текущей транзакции.
+    """
+    from easybook.tasks import refresh_availability_task
+
+    args = (
+        resource_id,
+        start_date and start_date.isoformat(),
+        end_date and end_date.isoformat(),
+    )
+    transaction.on_commit(lambda: refresh_availability_task.delay(*args))
+
+
+def _free_rows(resource, start_date, end_date):
+    lower, upper = day_bounds(start_date, end_date)
+    return SlotAvailability.objects.filter(
+        resource=resource,
+        start__gte=lower,
+        start__lt=upper,
+        booked__lt=F('capacity'),
+    ).order_by('start').values_list('start', 'end', 'capacity', 'booked')
+
+
+def _slot(start, end, capacity, booked) -> dict:
+    return {
+        'start': timezone.localtime(start),
+        'end': timezone.localtime(end),
+        'capacity': capacity,
+        'free': capacity - booked,
+    }
+
+
+def free_slots(resource, start_date, end_date) -> list[dict]:
+    """
+    То же, что `easybook.availability.free_slots`, но из таблицы.
+    """
+    return [_slot(*row) for row in _free_rows(resource, start_date, end_date)]
+
+
+async def afree_slots(resource, start_date, end_date) -> list[dict]:
+    return [_slot(*row) async for row in _free_rows(resource, start_date, end_date)]
+
+
+def search_available(resources, lower, upper, quantity=1) -> list[tuple]:
+    """
+    То же, что `easybook.availability.search_available`, но покрытие окна
+    слотами берётся из таблицы (один агрегирующий запрос). Вместимость и
+    занятость — общая `availability.window_usage`, чтобы результат не
+    зависел от AVAILABILITY_MATERIALIZATION.
+    """
+    covered = ExpressionWrapper(
+        Least(F('end'), upper) - Greatest(F('start'), lower),
+        output_field=DurationField()
+    )
+    open_ids = SlotAvailability.objects.filter(
+        resource__in=resources, start__lt=upper, end__gt=lower
+    ).values('resource_id').annotate(
+        covered=Sum(covered),
+    ).filter(covered__gte=upper - lower).values_list('resource_id', flat=True)
+    found = list(resources.filter(pk__in=open_ids))
+    if not found:
+        return []
+    usage = window_usage(
+        {resource.pk: resource.max_capacity for resource in found}, lower, upper
+    )
+    return available(found, usage, quantity)
@@ -0,0 +1,167 @@
+"""
+Метрики запросов в формате Prometheus (`/metrics`).
+
+`MetricsMiddleware` на каждый запрос считает число SQL-запросов, время в
+базе, попадания и промахи кэшей и полную задержку и пишет их с меткой
+`view` — именем разрешённого URL (`booking-list`, `calendar`, …).
+
+SQL считает обёртка `execute_wrapper`, которую получает каждое новое
+соединение (сигнал `connection_created`), поэтому учитываются все базы,
+включая реплику, и запросы async-представлений из `sync_to_async`:
+статистика лежит в contextvar и видна из потоков. Кэши отчитываются
+через `cache_lookup()`.
+
+Медленные запросы (дольше SLOW_REQUEST_MS, 0 — выключено) пишутся в
+лог `easybook.slow_requests` вместе с SQL_SLOW_STATEMENTS самыми долгими
+SQL-выражениями (без параметров).
+
+Под gunicorn с несколькими воркерами задайте PROMETHEUS_MULTIPROC_DIR —
+`/metrics` тогда собирает значения всех процессов.
+"""
+import heapq
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from itertools import count
+
+from django.conf import settings
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess,
+)
+
+
+logger = logging.getLogger('easybook.slow_requests')
+
+SQL_SLOW_STATEMENTS = 5
+SQL_MAX_LENGTH = 2000
+UNRESOLVED = '<unresolved>'
+
+REQUESTS = Counter(
+    'easybook_http_requests_total', 'HTTP requests.', ['view', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'easybook_http_request_duration_seconds', 'Request latency.', ['view'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Histogram(
+    'easybook_db_queries_per_request', 'SQL queries per request.', ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+DB_TIME = Histogram(
+    'easybook_db_time_seconds', 'Time spent in SQL per request.', ['view'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE = Counter(
+    'easybook_cache_lookups_total', 'Cache lookups.', ['view', 'cache', 'result'],
+)
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_time: float = 0.0
+    # {(кэш, 'hit' | 'miss'): число}
+    cache: dict = field(default_factory=dict)
+    # куча (время, порядковый номер, sql) самых долгих выражений
+    slowest: list | None = None
+    _seq: count = field(default_factory=count)
+
+    def record_sql(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if self.slowest is None:
+            return
+        item = (duration, next(self._seq), sql)
+        if len(self.slowest) < SQL_SLOW_STATEMENTS:
+            heapq.heappush(self.slowest, item)
+        else:
+            heapq.heappushpop(self.slowest, item)
+
+
+_stats: ContextVar[RequestStats | None] = ContextVar('easybook_request_stats', default=None)
+
+
+def _slow_request_seconds() -> float:
+    return getattr(settings, 'SLOW_REQUEST_MS', 0) / 1000
+
+
+def _record_sql(execute, sql, params, many, context):
+    stats = _stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_sql(sql, time.perf_counter() - started)
+
+
+def install(sender, connection, **kwargs):
+    """
+    Обработчик `connection_created`: обёртка переживает переподключения,
+    поэтому ставится один раз на объект соединения.
+    """
+    if _record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_sql)
+
+
+def cache_lookup(name, hits=0, misses=0):
+    stats = _stats.get()
+    if stats is None:
+        return
+    for result, value in (('hit', hits), ('miss', misses)):
+        if value:
+            key = (name, result)
+            stats.cache[key] = stats.cache.get(key, 0) + value
+
+
+@contextmanager
+def request_scope():
+    stats = RequestStats(slowest=[] if _slow_request_seconds() else None)
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+def view_name(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name if match else None) or UNRESOLVED
+
+
+def observe(request, response, stats, duration):
+    view = view_name(request)
+    REQUESTS.labels(view, request.method, str(response.status_code)).inc()
+    LATENCY.labels(view).observe(duration)
+    DB_QUERIES.labels(view).observe(stats.queries)
+    DB_TIME.labels(view).observe(stats.db_time)
+    for (name, result), value in stats.cache.items():
+        CACHE.labels(view, name, result).inc(value)
+
+    if stats.slowest is not None and duration >= _slow_request_seconds():
+        statements = '\n'.join(
+            f'  {sql_duration * 1000:.1f} ms: {sql[:SQL_MAX_LENGTH]}'
+            for sql_duration, _, sql in sorted(stats.slowest, reverse=True)
+        )
+        logger.warning(
+            'Slow request %s %s (%s): %.0f ms, %d queries, %.0f ms in DB\n%s',
+            request.method, request.path, view, duration * 1000,
+            stats.queries, stats.db_time * 1000, statements,
+        )
+
+
+def render() -> tuple[bytes, str]:
+    """
+    Текст метрик и его Content-Type.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,78 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+
+from easybook import metrics, routers
+
+
+class MetricsMiddleware:
+    """
+    Число SQL-запросов, время в базе, обращения к кэшам и задержка
+    запроса — в метрики Prometheus (см. `easybook.metrics`).
+
+    Стоит первым, чтобы учесть работу остальных middleware. У потоковых
+    ответов учитывается время до первого байта.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with metrics.request_scope() as stats:
+            response = self.get_response(request)
+        metrics.observe(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with metrics.request_scope() as stats:
+            response = await self.get_response(request)
+        metrics.observe(request, response, stats, time.perf_counter() - started)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes для `easybook.routers.ReplicaRouter`: если запрос
+    что-то записал, клиент получает cookie и следующие
+    REPLICA_STICKY_SECONDS секунд читает с primary.
+    """
+    sync_capable = True
+    async_capable = True
+    cookie_name = 'db_pin_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routers.track_writes(self.cookie_name in request.COOKIES) as state:
+            response = self.get_response(request)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        with routers.track_writes(self.cookie_name in request.COOKIES) as state:
+            response = await self.get_response(request)
+        return self.pin(response, state)
+
+    def pin(self, response, state):
+        if state['wrote'] and routers.replica_alias():
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 5),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
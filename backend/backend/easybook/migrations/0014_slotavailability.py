@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 18:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('easybook', '0013_alter_resource_old_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('capacity', models.PositiveIntegerField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_availability', to='easybook.resource')),
+            ],
+            options={
+                'verbose_name_plural': 'Slot availability',
+                'indexes': [models.Index(fields=['resource', 'start'], name='easybook_sl_resourc_830b29_idx'), models.Index(fields=['start', 'end'], name='easybook_sl_start_7cfc42_idx')],
+            },
+        ),
+    ]
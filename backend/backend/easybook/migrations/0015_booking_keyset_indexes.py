@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('easybook', '0014_slotavailability'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(models.F('timerange__startswith'), models.F('id'), name='booking_start_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(models.F('resource'), models.F('timerange__startswith'), models.F('id'), name='booking_resource_start_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('easybook', '0015_booking_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='schedule_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='schedule_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='staff',
+            name='schedule_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='staff',
+            name='schedule_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 18:53
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+BACKFILL_PATHS = """
+    WITH RECURSIVE tree (id, path) AS (
+        SELECT id, ARRAY[id] FROM easybook_category WHERE parent_id IS NULL
+        UNION ALL
+        SELECT c.id, tree.path || c.id
+        FROM easybook_category c JOIN tree ON c.parent_id = tree.id
+    )
+    UPDATE easybook_category SET path = tree.path
+    FROM tree WHERE easybook_category.id = tree.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('easybook', '0016_schedule_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['path'], name='category_path_gin'),
+        ),
+        migrations.RunSQL(BACKFILL_PATHS, migrations.RunSQL.noop),
+    ]
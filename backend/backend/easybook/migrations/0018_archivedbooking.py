@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 19:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('easybook', '0017_category_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('is_confirmed', models.BooleanField(default=False)),
+                ('additional_info', models.TextField(blank=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='easybook.resource')),
+                ('staff', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_bookings', to='easybook.staff')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'start', 'id'], name='archivedbooking_user_start_idx')],
+            },
+        ),
+    ]
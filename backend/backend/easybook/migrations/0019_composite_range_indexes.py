@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 19:12
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('easybook', '0018_archivedbooking'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='availabilityrule',
+            name='easybook_av_weekday_c3774d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='availabilityrule',
+            name='easybook_av_specifi_284c21_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='easybook_bo_timeran_caa26e_gist',
+        ),
+        migrations.RemoveIndex(
+            model_name='capacitywindow',
+            name='easybook_ca_timeran_5fe546_gist',
+        ),
+        migrations.AddIndex(
+            model_name='availabilityrule',
+            index=models.Index(fields=['resource', 'weekday'], name='rule_resource_weekday_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='availabilityrule',
+            index=models.Index(fields=['resource', 'specific_date'], name='rule_resource_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['resource', 'timerange'], name='booking_resource_range_gist'),
+        ),
+    ]
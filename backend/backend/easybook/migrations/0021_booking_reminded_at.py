@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('easybook', '0020_bookingevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='reminded_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(models.F('timerange__startswith'), models.F('id'), condition=models.Q(('reminded_at__isnull', True)), name='booking_remind_start_idx'),
+        ),
+    ]
@@ -0,0 +1,172 @@
+"""
+Cache-aside для часто читаемых моделей в общем кэше Django (Redis,
+см. CACHES): Company по slug, Resource по id и набор правил доступности
+ресурса.
+
+Ключи версионируются поколением: значение лежит под
+`mc:<имя>:<ident>:<поколение>`, а инвалидация (сигналы в
+`easybook.signals`) после коммита транзакции увеличивает счётчик
+`mc:gen:<имя>:<ident>`. Запись, посчитанная по данным до коммита,
+попадает под старое поколение и никем больше не читается; до коммита
+новых данных никто, кроме самой транзакции, не видит. Начальное
+значение счётчика — текущее время, чтобы после вытеснения счётчика не
+оживали старые значения.
+
+От «stampede» при истечении дорогих записей защищают:
+- вероятностное раннее обновление (XFetch): чем ближе истечение и чем
+  дольше считалось значение, тем вероятнее один из читателей пересчитает
+  его заранее;
+- блокировка `cache.add`: пересчитывает один процесс, остальные отдают
+  старое значение или недолго ждут нового.
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from easybook import metrics
+from easybook.models import AvailabilityRule, Company, Resource
+from easybook.routers import use_primary
+
+
+KEY_PREFIX = 'mc'
+# Сколько ждать значения, которое считает другой процесс, секунд
+LOCK_WAIT = 2.0
+LOCK_POLL = 0.05
+
+
+def _ttl() -> int:
+    return getattr(settings, 'MODEL_CACHE_TTL', 10 * 60)
+
+
+def _generation_key(name, ident) -> str:
+    return f'{KEY_PREFIX}:gen:{name}:{ident}'
+
+
+def generation(name, ident) -> int:
+    key = _generation_key(name, ident)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def invalidate(name, ident):
+    """
+    Сдвигает поколение после коммита текущей транзакции: сдвиг до коммита
+    дал бы параллельному читателю закэшировать старые данные под новым
+    поколением.
+    """
+    key = _generation_key(name, ident)
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            # счётчика нет — новое поколение заведомо больше прежних
+            cache.set(key, time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def get_or_compute(key, compute, ttl=None, beta=1.0):
+    """
+    Значение по ключу или результат `compute()` с защитой от stampede.
+
+    В кэше хранится (значение, время расчёта, момент истечения).
+    """
+    ttl = ttl or _ttl()
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        # XFetch: -delta * beta * ln(U) — случайное «досрочное» окно
+        if time.time() - delta * beta * math.log(1.0 - random.random()) < expires_at:
+            metrics.cache_lookup('model', hits=1)
+            return value
+    metrics.cache_lookup('model', misses=1)
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, timeout=max(1, int(LOCK_WAIT * 5))):
+        if entry is not None:
+            return entry[0]
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        # Держатель блокировки не успел — считаем сами
+        with use_primary():
+            return compute()
+
+    try:
+        started = time.monotonic()
+        # Кэш заполняется с primary — отставание реплики не закэшируется
+        with use_primary():
+            value = compute()
+        delta = time.monotonic() - started
+        cache.set(key, (value, delta, time.time() + ttl), ttl)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def cached(name, ident, compute, ttl=None):
+    key = f'{KEY_PREFIX}:{name}:{ident}:{generation(name, ident)}'
+    return get_or_compute(key, compute, ttl)
+
+
+def company_by_slug(slug):
+    """
+    Активная компания по slug или None. None тоже кэшируется — до
+    сохранения компании с этим slug (см. `easybook.signals`).
+    """
+    return cached(
+        'company', slug,
+        lambda: Company.objects.filter(slug=slug, is_active=True).first(),
+    )
+
+
+def resource_by_id(pk):
+    return cached('resource', pk, lambda: Resource.objects.filter(pk=pk).first())
+
+
+RULE_FIELDS = ('weekday', 'specific_date', 'start_time', 'end_time', 'slot_size')
+
+
+def _rule_rows(resource_id):
+    return list(
+        AvailabilityRule.objects.filter(resource_id=resource_id).filter(
+            Q(specific_date__isnull=True, weekday__isnull=False) |
+            Q(specific_date__gte=timezone.localdate())
+        ).values_list(*RULE_FIELDS)
+    )
+
+
+def availability_rule_rows(resource_id, start_date, end_date):
+    """
+    Кортежи RULE_FIELDS правил ресурса, действующих на [start_date, end_date]
+    (формат `easybook.availability.expand_rules`).
+
+    Кэшируются еженедельные и будущие разовые правила; диапазоны в прошлом
+    читаются из базы.
+    """
+    if start_date < timezone.localdate():
+        return list(
+            AvailabilityRule.objects.filter(resource_id=resource_id).filter(
+                Q(specific_date__isnull=True, weekday__isnull=False) |
+                Q(specific_date__range=(start_date, end_date))
+            ).values_list(*RULE_FIELDS)
+        )
+    # Набор мог быть посчитан вчера — он шире нужного, но не уже
+    rows = cached('rules', resource_id, lambda: _rule_rows(resource_id))
+    return [
+        row for row in rows
+        if row[1] is None or start_date <= row[1] <= end_date
+    ]
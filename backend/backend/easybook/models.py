@@ -1,10 +1,14 @@
-from django.db import models
+from contextvars import ContextVar
+from datetime import timedelta
+from django.db import connection, models, transaction
 from django.contrib.postgres.constraints import ExclusionConstraint
-from django.contrib.postgres.fields import DateTimeRangeField
-from django.contrib.postgres.indexes import GistIndex
+from django.contrib.postgres.fields import ArrayField, DateTimeRangeField
+from django.contrib.postgres.indexes import GinIndex, GistIndex
 from django.core.exceptions import ValidationError
-from django.db.models import Case, When, IntegerField, Q
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Case, When, F, IntegerField, Q
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 #from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.base_user import BaseUserManager
@@ -166,7 +170,29 @@ class CompanyMembership(models.Model):
         return f'{self.user} @ {self.company} ({self.role})'
     
 
-class Staff(models.Model):
+class ScheduleVersionMixin:
+    """
+    `schedule_version` и `schedule_changed_at` меняются только
+    F()-обновлением в `easybook.feeds.touch`. Обычный save() их не пишет:
+    иначе сохранение устаревшего экземпляра откатит счётчик, и фид
+    вернёт прежний ETag.
+    """
+    SCHEDULE_FIELDS = ('schedule_version', 'schedule_changed_at')
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not args and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.SCHEDULE_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class Staff(ScheduleVersionMixin, models.Model):
     class Meta:
         app_label = 'easybook'
         indexes = [
@@ -197,17 +223,201 @@ class Staff(models.Model):
     company_email = models.EmailField(blank=True)
     company_phone = models.CharField(max_length=30, blank=True)
     is_active = models.BooleanField(default=True)
+    # Счётчик изменений бронирований сотрудника — ETag ICS-фида (easybook.feeds)
+    schedule_version = models.PositiveIntegerField(default=0, editable=False)
+    schedule_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self) -> str:
         return f'{self.display_name} ({self.company})'
 
 
+class ValidationContext:
+    """
+    Заранее загруженные связи для `clean()` у Booking, ResourceCategory,
+    ResourceStaff и Category.
+
+    Без контекста каждая проверка ходит в базу за ресурсом, сотрудником,
+    компанией и ResourceStaff. Внутри `with ValidationContext.for_instances(objs):`
+    эти данные берутся из словарей, загруженных одним запросом на модель,
+    поэтому проверка N объектов стоит O(1) запросов.
+    """
+    _current: ContextVar['ValidationContext | None'] = ContextVar(
+        'easybook_validation_context', default=None
+    )
+
+    def __init__(self, resources=None, staff=None, categories=None,
+                 assigned=None, complete=False):
+        # resource_id -> (company_id, requires_staff)
+        self.resources = resources or {}
+        # staff_id -> company_id
+        self.staff = staff or {}
+        # category_id -> (company_id, parent_id, path)
+        self.categories = categories or {}
+        # {(resource_id, staff_id)} из ResourceStaff
+        self.assigned = assigned or set()
+        # Загружен заранее: отсутствие ключа означает, что объекта нет
+        self.complete = complete
+        self._token = None
+
+    @classmethod
+    def load(cls, resource_ids=(), staff_ids=(), category_ids=()):
+        resource_ids, staff_ids = set(resource_ids) - {None}, set(staff_ids) - {None}
+        category_ids = set(category_ids) - {None}
+        resources = {
+            pk: (company_id, requires_staff)
+            for pk, company_id, requires_staff in Resource.objects.filter(
+                pk__in=resource_ids
+            ).values_list('pk', 'company_id', 'requires_staff')
+        } if resource_ids else {}
+        staff = dict(
+            Staff.objects.filter(pk__in=staff_ids).values_list('pk', 'company_id')
+        ) if staff_ids else {}
+        categories = {
+            pk: (company_id, parent_id, path)
+            for pk, company_id, parent_id, path in Category.objects.filter(
+                pk__in=category_ids
+            ).values_list('pk', 'company_id', 'parent_id', 'path')
+        } if category_ids else {}
+        assigned = set(
+            ResourceStaff.objects.filter(
+                resource_id__in=resource_ids, staff_id__in=staff_ids
+            ).values_list('resource_id', 'staff_id')
+        ) if resource_ids and staff_ids else set()
+        return cls(resources, staff, categories, assigned, complete=True)
+
+    @classmethod
+    def for_instances(cls, instances):
+        """
+        Контекст для списка Booking / ResourceCategory / ResourceStaff / Category.
+        """
+        instances = list(instances)
+        return cls.load(
+            resource_ids=(getattr(obj, 'resource_id', None) for obj in instances),
+            staff_ids=(getattr(obj, 'staff_id', None) for obj in instances),
+            category_ids=(
+                getattr(obj, attr, None)
+                for obj in instances
+                for attr in ('category_id', 'parent_id')
+            ),
+        )
+
+    @classmethod
+    def current(cls):
+        """
+        Активный контекст или пустой, догружающий объекты по одному.
+        """
+        return cls._current.get() or cls()
+
+    def __enter__(self):
+        self._token = self._current.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._current.reset(self._token)
+
+    def resource(self, pk):
+        if pk not in self.resources and not self.complete:
+            self.resources.update(self.load(resource_ids=[pk]).resources)
+        return self.resources.get(pk)
+
+    def staff_company(self, pk):
+        if pk not in self.staff and not self.complete:
+            self.staff.update(self.load(staff_ids=[pk]).staff)
+        return self.staff.get(pk)
+
+    def category(self, pk):
+        if pk not in self.categories and not self.complete:
+            self.categories.update(self.load(category_ids=[pk]).categories)
+        return self.categories.get(pk)
+
+    def is_assigned(self, resource_id, staff_id):
+        if not self.complete:
+            return ResourceStaff.objects.filter(
+                resource_id=resource_id,
+                staff_id=staff_id
+            ).exists()
+        return (resource_id, staff_id) in self.assigned
+
+
+class CategoryQuerySet(models.QuerySet):
+    def subtree(self, category_id):
+        """
+        Категория и все её потомки — один запрос по GIN-индексу `path`.
+        """
+        return self.filter(path__contains=[category_id])
+
+    def subtree_ids(self, category_id):
+        """
+        id категории и всех её потомков.
+        """
+        return list(self.subtree(category_id).values_list('id', flat=True))
+
+    def ancestors(self, category_id, include_self=True):
+        """
+        Предки категории от корня. Один запрос: id берутся из `path`
+        самой категории подзапросом.
+        """
+        ids = self.model.objects.filter(pk=category_id).annotate(
+            ancestor_id=models.Func(F('path'), function='unnest')
+        ).values('ancestor_id')
+        queryset = self.filter(pk__in=ids)
+        if not include_self:
+            queryset = queryset.exclude(pk=category_id)
+        return queryset.order_by(models.Func(F('path'), function='cardinality'))
+
+    def rebuild_paths(self):
+        """
+        Пересчитывает `path` всего дерева одним рекурсивным UPDATE
+        (для данных, записанных в обход `Category.save`).
+        Возвращает число исправленных строк.
+        """
+        table = self.model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(REBUILD_CATEGORY_PATHS_SQL.format(table=table))
+            return cursor.rowcount
+
+
+# Категории из циклов недостижимы от корней и получают пустой path
+REBUILD_CATEGORY_PATHS_SQL = """
+    WITH RECURSIVE tree (id, path) AS (
+        SELECT id, ARRAY[id] FROM {table} WHERE parent_id IS NULL
+        UNION ALL
+        SELECT c.id, tree.path || c.id
+        FROM {table} c JOIN tree ON c.parent_id = tree.id
+    ), target AS (
+        SELECT c.id, COALESCE(tree.path, '{{}}') AS path
+        FROM {table} c LEFT JOIN tree ON tree.id = c.id
+    )
+    UPDATE {table} SET path = target.path
+    FROM target
+    WHERE {table}.id = target.id AND {table}.path IS DISTINCT FROM target.path
+"""
+
+
+class CategoryManager(models.Manager):
+    def get_queryset(self):
+        return CategoryQuerySet(self.model, using=self._db)
+
+    def subtree(self, category_id):
+        return self.get_queryset().subtree(category_id)
+
+    def subtree_ids(self, category_id):
+        return self.get_queryset().subtree_ids(category_id)
+
+    def ancestors(self, category_id, include_self=True):
+        return self.get_queryset().ancestors(category_id, include_self)
+
+    def rebuild_paths(self):
+        return self.get_queryset().rebuild_paths()
+
+
 class Category(models.Model):
     class Meta:
         app_label = 'easybook'
         verbose_name_plural = "Categories"
         indexes = [
             models.Index(fields=('company', 'parent', 'is_active', 'sort_order')),
+            GinIndex(fields=('path',), name='category_path_gin'),  # поддеревья
             # models.Index(fields=('company', 'is_active')),
             # models.Index(fields=('company', 'sort_order')),
         ]
@@ -237,42 +447,91 @@ class Category(models.Model):
     # Приоритет - по возрастанию
     sort_order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    # Материализованный путь: id от корня до самой категории включительно
+    path = ArrayField(models.BigIntegerField(), default=list, blank=True, editable=False)
+
+    objects = CategoryManager()
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            # Сначала родитель, потом сама категория — в том же порядке
+            # блокирует строки перенос родителя (он сам, затем поддерево),
+            # поэтому параллельные переносы ждут друг друга, а не читают
+            # устаревшие пути.
+            parent_path = []
+            if self.parent_id:
+                parent_path = Category.objects.select_for_update().filter(
+                    pk=self.parent_id
+                ).values_list('path', flat=True).first() or []
+            if self.pk is not None:
+                # Путь экземпляра мог устареть после переноса предка
+                current = Category.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('path', flat=True).first()
+                if current is not None:
+                    self.path = current
+            super().save(*args, **kwargs)
+            new_path = [*parent_path, self.pk]
+            if new_path == self.path:
+                return
+            if self.path:
+                # Перенос: у всего поддерева заменяем префикс пути одним UPDATE
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"UPDATE {self._meta.db_table}"
+                        " SET path = %s::bigint[] || path[%s:]"
+                        " WHERE path @> ARRAY[%s]::bigint[]",
+                        [new_path, len(self.path) + 1, self.pk],
+                    )
+            else:
+                Category.objects.filter(pk=self.pk).update(path=new_path)
+            self.path = new_path
+
+    def ancestors(self, include_self=True):
+        """
+        Хлебные крошки от корня — по уже загруженному `path`.
+        """
+        ids = self.path if include_self else self.path[:-1]
+        position = {pk: i for i, pk in enumerate(ids)}
+        return sorted(
+            Category.objects.filter(pk__in=ids), key=lambda category: position[category.pk]
+        )
+
+    def descendants(self, include_self=True):
+        queryset = Category.objects.subtree(self.pk)
+        return queryset if include_self else queryset.exclude(pk=self.pk)
 
     def clean(self):
+        parent = self.parent_id and ValidationContext.current().category(self.parent_id)
         if (
-            self.parent 
-            and self.parent.company # Preventing 500 Error when company is not set
-            and self.parent.company != self.company
+            parent
+            and parent[0] # Preventing 500 Error when company is not set
+            and parent[0] != self.company_id
         ):
             raise ValidationError(
                 'Parent category must belong to the same company.'
             )
 
-        if self.parent:
-            self._check_for_cycles()
+        if parent:
+            self._check_for_cycles(parent[2])
 
-    def _check_for_cycles(self):
-        if self.parent == self:
+    def _check_for_cycles(self, parent_path):
+        if self.parent_id == self.pk:
             raise ValidationError(
                 'A category cannot be its own parent.'
             )
-        visited = set()
-        current = self
-
-        while current is not None:
-            if current.id in visited:
-                raise ValidationError(
-                    'Circular reference detected in category hierarchy. '
-                    'Set another parent.'
-                )
-            visited.add(current.id)
-            current = current.parent
+        # Цикл — если новый родитель лежит в нашем же поддереве
+        if self.pk is not None and self.pk in parent_path:
+            raise ValidationError(
+                'Circular reference detected in category hierarchy. '
+                'Set another parent.'
+            )
 
     def __str__(self) -> str:
         return f'{self.name} ({self.company})'    
 
 
-class Resource(models.Model):
+class Resource(ScheduleVersionMixin, models.Model):
     """
     Базовая сущность, которую можно бронировать.
     """
@@ -341,6 +600,9 @@ class Resource(models.Model):
         blank=True
     )
     is_active = models.BooleanField(default=True)
+    # Счётчик изменений бронирований ресурса — ETag ICS-фида (easybook.feeds)
+    schedule_version = models.PositiveIntegerField(default=0, editable=False)
+    schedule_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
     # is_full_name_required = models.BooleanField(default=False)
     # Список сотрудников, которые оказывают услугу
     staff_members = models.ManyToManyField(
@@ -378,10 +640,12 @@ class ResourceCategory(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
 
     def clean(self):
-        if (
-            self.resource_id and self.category_id # Prevents 500 error
-            and self.resource.company != self.category.company
-        ):
+        if not (self.resource_id and self.category_id): # Prevents 500 error
+            return
+        context = ValidationContext.current()
+        resource = context.resource(self.resource_id)
+        category = context.category(self.category_id)
+        if resource and category and resource[0] != category[0]:
             raise ValidationError(
                 'Resource and Category must belong to the same Company.'
             )
@@ -408,10 +672,11 @@ class ResourceStaff(models.Model):
     staff = models.ForeignKey(Staff, on_delete=models.CASCADE)
 
     def clean(self):
-        if (
-            self.resource_id and self.staff_id # Prevents 500 error
-            and self.resource.company != self.staff.company
-        ):
+        if not (self.resource_id and self.staff_id): # Prevents 500 error
+            return
+        context = ValidationContext.current()
+        resource = context.resource(self.resource_id)
+        if resource and resource[0] != context.staff_company(self.staff_id):
             raise ValidationError(
                 'Resource and Staff must belong to the same Company.'
             )
@@ -450,11 +715,18 @@ class AvailabilityRuleQuerySet(models.QuerySet):
         - Если есть хотя бы одно правило на конкретную дату
                — возвращаем только их.
         - Иначе — weekly-rules.
+
+        Выбор делается в SQL через NOT EXISTS, поэтому это один запрос.
+        Не кэшируется: слоты календаря и поиска читают правила через
+        `model_cache.availability_rule_rows`.
         """
-        qs = self.for_resource(resource).for_day(day)
-        if qs and qs.first().priority == 0:
-            return qs.filter(priority=0)
-        return qs  
+        has_specific = self.model.objects.filter(
+            resource=resource,
+            specific_date=day
+        )
+        return self.for_resource(resource).for_day(day).filter(
+            Q(specific_date=day) | ~models.Exists(has_specific)
+        )
         
 
 class AvailabilityRuleManager(models.Manager):
@@ -472,8 +744,9 @@ class AvailabilityRule(models.Model):
     class Meta:
         app_label = 'easybook'
         indexes = [
-            models.Index(fields=('weekday',)),
-            models.Index(fields=('specific_date',)),
+            # правила всегда читаются по ресурсу: еженедельные и на даты
+            models.Index(fields=('resource', 'weekday'), name='rule_resource_weekday_idx'),
+            models.Index(fields=('resource', 'specific_date'), name='rule_resource_date_idx'),
         ]
 
     resource = models.ForeignKey(
@@ -520,7 +793,8 @@ class CapacityWindow(models.Model):
     """
     class Meta:
         app_label = 'easybook'
-        indexes = [GistIndex(fields=('timerange',))]
+        # Запросы — `resource = X AND timerange && R`: их обслуживает
+        # GiST-индекс ограничения ниже, отдельный индекс по timerange не нужен.
         # Не допускаем пересечения окон на одном ресурсе, 
         # чтобы емкость была однозначной
         constraints = [
@@ -545,11 +819,62 @@ class CapacityWindow(models.Model):
         return f'{self.resource} {self.timerange} ({self.capacity})'
 
 
+class BookingQuerySet(models.QuerySet):
+    def overlapping(self, timerange):
+        """
+        Брони, пересекающие `timerange`.
+
+        Кроме `&&` условие ограничивает lower(timerange) — ключ
+        секционирования (см. easybook/partitioning.py): будущие секции
+        отсекаются всегда, прошлые — если задан BOOKING_MAX_DURATION_DAYS.
+        """
+        queryset = self.filter(
+            timerange__overlap=timerange, timerange__startswith__lt=timerange.upper
+        )
+        max_duration = booking_max_duration()
+        if max_duration is not None:
+            queryset = queryset.filter(
+                timerange__startswith__gt=timerange.lower - max_duration
+            )
+        return queryset
+
+
+class BookingManager(models.Manager):
+    def get_queryset(self):
+        return BookingQuerySet(self.model, using=self._db)
+
+    def overlapping(self, timerange):
+        return self.get_queryset().overlapping(timerange)
+
+
+def booking_max_duration():
+    days = getattr(settings, 'BOOKING_MAX_DURATION_DAYS', 0)
+    return timedelta(days=days) if days else None
+
+
 class Booking(models.Model):
     class Meta:
         app_label = 'easybook'
         indexes = [
-            GistIndex(fields=('timerange',)),  # ускоряет проверку пересечений
+            # `resource = X AND timerange && R` — доступность и приём броней;
+            # `staff = X AND timerange && R` обслуживает индекс ограничения
+            # prevent_staff_double_booking
+            GistIndex(fields=('resource', 'timerange'), name='booking_resource_range_gist'),
+            # keyset-пагинация API: ORDER BY lower(timerange), id
+            models.Index(
+                F('timerange__startswith'), F('id'),
+                name='booking_start_id_idx',
+            ),
+            models.Index(
+                F('resource'), F('timerange__startswith'), F('id'),
+                name='booking_resource_start_id_idx',
+            ),
+            # очередь напоминаний: только ещё не напомненные брони
+            models.Index(
+                F('timerange__startswith'), F('id'),
+                name='booking_remind_start_idx',
+                condition=Q(reminded_at__isnull=True),
+            ),
         ]
         constraints = [
             ExclusionConstraint(
@@ -591,37 +916,170 @@ class Booking(models.Model):
     is_confirmed = models.BooleanField(default=False)
     quantity = models.PositiveIntegerField(default=1)  # сколько мест из capacity заняли
     additional_info = models.TextField(blank=True)
+    # Когда отправлено напоминание (см. easybook.reminders)
+    reminded_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = BookingManager()
+
     def clean(self):
         """if self.timerange is None or self.timerange.start is None or self.timerange.end is None:
             raise ValidationError('`timerange` must be set with both start and end times.')
         if self.timerange.lower >= self.timerange.upper:
             raise ValidationError('`timerange.start` must be less than `timerange.end`.')
 """
+        timerange = self.timerange
+        max_duration = booking_max_duration()
+        # На этом пределе основано отсечение секций в BookingQuerySet.overlapping
+        if (
+            max_duration is not None
+            and timerange and timerange.lower and timerange.upper
+            and timerange.upper - timerange.lower > max_duration
+        ):
+            raise ValidationError('Booking is longer than the allowed maximum duration.')
+
+        context = ValidationContext.current()
+        resource = self.resource_id and context.resource(self.resource_id)
+
         # Если ресурс требует выбора сотрудника — staff обязателен
-        if self.resource_id and self.resource.requires_staff and not self.staff:
+        if resource and resource[1] and not self.staff_id:
             raise ValidationError(
                 'This resource requires selecting a staff member.'
             )
 
         # Если указан сотрудник — он должен быть из той же компании 
-        if self.staff:
-            if self.resource_id and self.resource.company != self.staff.company:
+        if self.staff_id:
+            if resource and resource[0] != context.staff_company(self.staff_id):
                 raise ValidationError(
                     'Selected staff must belong to the same company' \
                     ' as the resource.'
                     )
             
             # Проверка принадлежности сотрудника к услуге
-            if not ResourceStaff.objects.filter(
-                resource_id=self.resource,
-                staff_id=self.staff
-            ).exists():
+            if not context.is_assigned(self.resource_id, self.staff_id):
                 raise ValidationError(
                     'Selected staff is not assigned to this resource.'
                 )
-            
+
+    # Сигналы post_save/post_delete пишут BookingEvent (easybook.outbox) —
+    # они должны попасть в одну транзакцию с самой бронью и в autocommit
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            return super().delete(*args, **kwargs)
+
     def __str__(self) -> str:
         base = f'{self.resource}: {self.timerange} by {self.user}'
         if self.staff:
             base += f' (staff: {self.staff.display_name})'
-        return base
\ No newline at end of file
+        return base
+
+class ArchivedBooking(models.Model):
+    """
+    Прошедшее бронирование, вынесенное из Booking (см. `easybook.archive`).
+
+    Таблица только пополняется: без ограничений-исключений и GiST-индексов,
+    интервал хранится двумя колонками, id сохраняется прежним.
+    """
+    class Meta:
+        app_label = 'easybook'
+        indexes = [
+            # история пользователя: WHERE user_id = … ORDER BY start, id
+            models.Index(fields=('user', 'start', 'id'), name='archivedbooking_user_start_idx'),
+        ]
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_bookings'
+    )
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.CASCADE,
+        related_name='archived_bookings'
+    )
+    staff = models.ForeignKey(
+        Staff,
+        on_delete=models.SET_NULL,
+        related_name='archived_bookings',
+        null=True,
+        blank=True,
+    )
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    quantity = models.PositiveIntegerField(default=1)
+    is_confirmed = models.BooleanField(default=False)
+    additional_info = models.TextField(blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f'{self.resource}: [{self.start}, {self.end}) by {self.user} (archived)'
+
+
+class BookingEvent(models.Model):
+    """
+    Событие жизненного цикла брони в outbox (см. `easybook.outbox`).
+
+    Пишется в той же транзакции, что и изменение брони; ретранслятор
+    раздаёт необработанные события потребителям и отмечает их.
+    """
+    class Meta:
+        app_label = 'easybook'
+        indexes = [
+            # очередь ретранслятора: WHERE processed_at IS NULL ORDER BY id
+            models.Index(
+                fields=('id',), name='bookingevent_pending_idx',
+                condition=Q(processed_at__isnull=True),
+            ),
+        ]
+
+    class Kind(models.TextChoices):
+        CREATED = "created", "Created"
+        CONFIRMED = "confirmed", "Confirmed"
+        UPDATED = "updated", "Updated"
+        DELETED = "deleted", "Deleted"
+
+    # Без FK: событие удаления переживает бронь
+    booking_id = models.BigIntegerField()
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.kind} booking {self.booking_id}'
+
+
+class SlotAvailability(models.Model):
+    """
+    Материализованная вместимость и занятость ресурса по слотам.
+
+    Необязательная таблица для нагруженных инсталляций
+    (settings.AVAILABILITY_MATERIALIZATION). Строится из AvailabilityRule,
+    CapacityWindow и Booking и поддерживается инкрементально,
+    см. `easybook.materialization`.
+    """
+    class Meta:
+        app_label = 'easybook'
+        verbose_name_plural = "Slot availability"
+        indexes = [
+            models.Index(fields=('resource', 'start')),
+            models.Index(fields=('start', 'end')),
+        ]
+
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.CASCADE,
+        related_name='slot_availability'
+    )
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    capacity = models.PositiveIntegerField()
+    booked = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.resource} {self.start}-{self.end} ({self.booked}/{self.capacity})'
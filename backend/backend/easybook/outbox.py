@@ -0,0 +1,306 @@
+"""
+Outbox событий бронирований.
+
+Сигналы Booking пишут BookingEvent (`record()`) в транзакции самого
+изменения: запрос брони не ждёт почту и вебхуки, а событие не теряется,
+если процесс упадёт между коммитом и постановкой задачи в брокер.
+
+`record()` ставит `relay_booking_events_task` после коммита транзакции;
+beat запускает ту же задачу каждые BOOKING_OUTBOX_RELAY_SECONDS секунд и
+подбирает то, что не удалось поставить. Задача разбирает очередь пачками (`FOR UPDATE SKIP LOCKED` — параллельные
+ретрансляторы не мешают друг другу) и отдаёт пачку потребителям CONSUMERS:
+
+- письмо пользователю о создании, подтверждении и удалении брони;
+- вебхуки BOOKING_WEBHOOK_URLS (доставка — отдельной задачей с повторами);
+- пересчёт материализованных слотов (`easybook.materialization`).
+
+Потребители только ставят задачи в Celery. Доставка at-least-once:
+
+- брокер недоступен (OSError, kombu OperationalError) — события остаются
+  в очереди без счёта попыток, проход повторится со следующим запуском
+  beat, без предела;
+- потребитель упал на пачке — она раздаётся повторно по одному событию,
+  чтобы одно «ядовитое» событие не задерживало соседей; попытка
+  засчитывается только упавшим событиям, после MAX_ATTEMPTS они остаются
+  необработанными для разбора вручную и возвращаются в очередь командой
+  `manage.py requeue_booking_events` (см. `requeue()`).
+
+Обработанные события хранятся BOOKING_OUTBOX_RETENTION_DAYS дней.
+
+Импорт через COPY (`easybook.bulk`) и архивация событий не порождают.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import urllib.request
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from kombu.exceptions import OperationalError as BrokerError
+
+from easybook import materialization
+from easybook.models import BookingEvent, Resource, User
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MAX_ATTEMPTS = 5
+WEBHOOK_TIMEOUT = 10
+# Сбои постановки задач, не связанные с самими событиями
+BROKER_ERRORS = (OSError, BrokerError)
+
+EMAIL_SUBJECTS = {
+    BookingEvent.Kind.CREATED: 'Booking created',
+    BookingEvent.Kind.CONFIRMED: 'Booking confirmed',
+    BookingEvent.Kind.DELETED: 'Booking cancelled',
+}
+
+
+def _payload(booking):
+    timerange = booking.timerange
+    return {
+        'user': booking.user_id,
+        'resource': booking.resource_id,
+        'staff': booking.staff_id,
+        'start': timerange and timerange.lower,
+        'end': timerange and timerange.upper,
+        'quantity': booking.quantity,
+        'is_confirmed': booking.is_confirmed,
+    }
+
+
+def record(kind, booking, previous_range=None):
+    """
+    Пишет событие брони; `previous_range` — (resource_id, timerange)
+    до переноса.
+    """
+    payload = _payload(booking)
+    if previous_range is not None:
+        resource_id, timerange = previous_range
+        payload['previous'] = {
+            'resource': resource_id,
+            'start': timerange and timerange.lower,
+            'end': timerange and timerange.upper,
+        }
+    BookingEvent.objects.create(booking_id=booking.pk, kind=kind, payload=payload)
+    transaction.on_commit(schedule_relay)
+
+
+def schedule_relay():
+    """
+    Ставит ретрансляцию в Celery, не дожидаясь beat. Недоступный брокер
+    запрос не роняет: событие уже в outbox и будет разобрано beat.
+    """
+    from easybook.tasks import relay_booking_events_task
+
+    try:
+        relay_booking_events_task.delay()
+    except BROKER_ERRORS:
+        logger.exception('Broker unavailable, booking events wait for beat')
+
+
+def notify_by_email(events):
+    from easybook import mail
+    from easybook.tasks import send_email_task
+
+    events = [event for event in events if event.kind in EMAIL_SUBJECTS]
+    emails = dict(User.objects.filter(
+        pk__in={event.payload['user'] for event in events}
+    ).values_list('pk', 'email'))
+    resources = dict(Resource.objects.filter(
+        pk__in={event.payload['resource'] for event in events}
+    ).values_list('pk', 'name'))
+    messages = []
+    for event in events:
+        # Пользователь удалён вместе с бронями — писать некому
+        recipient = emails.get(event.payload['user'])
+        if not recipient:
+            continue
+        payload = event.payload
+        message = (
+            f"{resources.get(payload['resource'], 'Resource')}: "
+            f"{payload['start']} - {payload['end']}, booking #{event.booking_id}"
+        )
+        messages.append((EMAIL_SUBJECTS[event.kind], message, recipient))
+    for batch in mail.batches(messages):
+        send_email_task.delay(batch)
+
+
+def webhook_body(events):
+    return [
+        {
+            'id': event.pk,
+            'booking': event.booking_id,
+            'kind': event.kind,
+            'created_at': event.created_at,
+            **event.payload,
+        }
+        for event in events
+    ]
+
+
+def call_webhooks(events):
+    from easybook.tasks import deliver_webhook_task
+
+    urls = getattr(settings, 'BOOKING_WEBHOOK_URLS', [])
+    if not urls:
+        return
+    body = json.loads(json.dumps(webhook_body(events), cls=DjangoJSONEncoder))
+    for url in urls:
+        deliver_webhook_task.delay(url, body)
+
+
+def post_webhook(url, body):
+    """
+    POST пачки событий; ошибки сети и ответы не 2xx — OSError.
+    С BOOKING_WEBHOOK_SECRET тело подписывается HMAC-SHA256
+    (заголовок X-Easybook-Signature).
+    """
+    data = json.dumps(body).encode()
+    request = urllib.request.Request(
+        url, data=data, method='POST', headers={'Content-Type': 'application/json'}
+    )
+    secret = getattr(settings, 'BOOKING_WEBHOOK_SECRET', '')
+    if secret:
+        request.add_header(
+            'X-Easybook-Signature',
+            hmac.new(secret.encode(), data, hashlib.sha256).hexdigest(),
+        )
+    with urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT) as response:
+        return response.status
+
+
+def refresh_materialized_slots(events):
+    """
+    Один пересчёт на ресурс — по объединению затронутых дат пачки.
+    """
+    if not materialization.is_enabled():
+        return
+    from easybook.tasks import refresh_availability_task
+
+    touched = {}
+    for event in events:
+        payload = event.payload
+        ranges = [(payload['resource'], payload['start'], payload['end'])]
+        if previous := payload.get('previous'):
+            ranges.append((previous['resource'], previous['start'], previous['end']))
+        for resource_id, start, end in ranges:
+            if start is None or end is None:
+                continue
+            dates = materialization.dates_of(
+                DateTimeTZRange(parse_datetime(start), parse_datetime(end))
+            )
+            if dates is None:
+                continue
+            first, last = touched.get(resource_id, dates)
+            touched[resource_id] = (min(first, dates[0]), max(last, dates[1]))
+    for resource_id, (start_date, end_date) in touched.items():
+        refresh_availability_task.delay(
+            resource_id, start_date.isoformat(), end_date.isoformat()
+        )
+
+
+CONSUMERS = (notify_by_email, call_webhooks, refresh_materialized_slots)
+
+
+def _pending(batch_size):
+    return list(
+        BookingEvent.objects.select_for_update(skip_locked=True).filter(
+            processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS,
+        ).order_by('id')[:batch_size]
+    )
+
+
+def _dispatch(events, consumers):
+    with transaction.atomic():
+        for consumer in consumers:
+            consumer(events)
+
+
+def _deliver(events, consumers):
+    """
+    Раздаёт пачку, а при ошибке потребителя — по одному событию.
+    Возвращает (обработанные, упавшие); ошибки брокера пробрасывает.
+    """
+    try:
+        _dispatch(events, consumers)
+        return events, []
+    except BROKER_ERRORS:
+        raise
+    except Exception:
+        logger.exception(
+            'Booking events %s..%s failed, retrying one by one',
+            events[0].pk, events[-1].pk,
+        )
+    done, failed = [], []
+    for event in events:
+        try:
+            _dispatch([event], consumers)
+        except BROKER_ERRORS:
+            raise
+        except Exception:
+            logger.exception('Booking event %s failed', event.pk)
+            failed.append(event)
+        else:
+            done.append(event)
+    return done, failed
+
+
+def relay(batch_size=BATCH_SIZE, consumers=CONSUMERS) -> int:
+    """
+    Раздаёт необработанные события потребителям. Возвращает число
+    обработанных; останавливается на пачке с ошибкой.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            events = _pending(batch_size)
+            if not events:
+                return total
+            try:
+                done, failed = _deliver(events, consumers)
+            except BROKER_ERRORS:
+                logger.exception('Broker unavailable, booking events stay pending')
+                return total
+            BookingEvent.objects.filter(pk__in=[event.pk for event in done]).update(
+                processed_at=timezone.now(), attempts=F('attempts') + 1,
+            )
+            BookingEvent.objects.filter(pk__in=[event.pk for event in failed]).update(
+                attempts=F('attempts') + 1,
+            )
+        total += len(done)
+        # Упавшие снова в очереди — до следующего запуска
+        if failed or len(events) < batch_size:
+            return total
+
+
+def requeue(ids=None) -> int:
+    """
+    Возвращает в очередь события, исчерпавшие MAX_ATTEMPTS
+    (все или с указанными id).
+    """
+    events = BookingEvent.objects.filter(
+        processed_at__isnull=True, attempts__gte=MAX_ATTEMPTS
+    )
+    if ids is not None:
+        events = events.filter(pk__in=ids)
+    return events.update(attempts=0)
+
+
+def purge(days=None) -> int:
+    """
+    Удаляет обработанные события старше BOOKING_OUTBOX_RETENTION_DAYS.
+    """
+    days = getattr(settings, 'BOOKING_OUTBOX_RETENTION_DAYS', 7) if days is None else days
+    deleted, _ = BookingEvent.objects.filter(
+        processed_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
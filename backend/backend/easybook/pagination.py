@@ -0,0 +1,106 @@
+"""
+Keyset-пагинация для REST viewset'ов.
+
+В отличие от LIMIT/OFFSET и от `CursorPagination` DRF (который при
+совпадающих значениях первого поля добирает смещение), курсор хранит
+значения всех полей сортировки последней строки, и следующая страница —
+это `WHERE (a, b) > (:a, :b) ORDER BY a, b LIMIT n`. Стоимость страницы
+не зависит от её номера и покрывается индексом по тем же полям.
+"""
+import base64
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    `ordering` — поля (или аннотации) по возрастанию, последнее уникально.
+    """
+    ordering = ('id',)
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+
+        page = list(queryset[:self.page_size + 1])
+        self.next_values = None
+        if len(page) > self.page_size:
+            page = page[:self.page_size]
+            self.next_values = [getattr(page[-1], field) for field in self.ordering]
+        return page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def after(self, values):
+        """
+        (f1, f2, ...) > (v1, v2, ...) в виде Q. Ведущее `f1 >= v1`
+        позволяет планировщику взять диапазон по индексу.
+        """
+        fields = self.ordering
+        condition = Q(**{f'{fields[-1]}__gt': values[-1]})
+        for field, value in zip(fields[-2::-1], values[-2::-1]):
+            condition = Q(**{f'{field}__gt': value}) | (Q(**{field: value}) & condition)
+        return Q(**{f'{fields[0]}__gte': values[0]}) & condition
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, cls=DjangoJSONEncoder).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_values)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class BookingPagination(KeysetPagination):
+    """
+    Бронирования — по началу интервала, затем по id
+    (аннотация `start` = lower(timerange) задаётся во viewset).
+    """
+    ordering = ('start', 'id')
@@ -0,0 +1,292 @@
+"""
+Секционирование Booking по месяцам lower(timerange).
+
+Необязательно для нагруженных инсталляций: таблица переводится в
+`PARTITION BY RANGE (lower(timerange))` командой
+`manage.py booking_partitions --convert`, дальше секции поддерживает
+`maintain()` (команда без флагов или beat-задача
+`maintain_booking_partitions_task`):
+
+- секции на BOOKING_PARTITION_MONTHS_AHEAD месяцев вперёд создаются
+  заранее; брони дальше горизонта и с пустым timerange лежат в секции
+  DEFAULT и переносятся в новую секцию при её создании;
+- секции старше BOOKING_PARTITION_RETENTION_MONTHS месяцев отсоединяются
+  (DETACH) и остаются отдельными таблицами `<таблица>_pYYYY_MM`, пока
+  их не перенесёт в архив `easybook.archive`; 0 — хранить всё.
+
+Ограничения секционированной таблицы:
+- ограничения-исключения Booking (ExclusionConstraint из Meta) и
+  первичный ключ действуют в пределах секции: пересечение двух броней
+  из соседних месяцев ловят только проверки под advisory-блокировками
+  в `easybook.admission` (API) и `easybook.bulk` (импорт); запись
+  в обход них (admin, прямой save()) через границу месяца не проверяется;
+- на Booking нельзя ссылаться внешним ключом;
+- запросы отсекают секции по условию на lower(timerange), см.
+  `BookingQuerySet.overlapping`.
+
+Границы секций — месяцы по UTC.
+"""
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.backends.utils import truncate_name
+from django.utils import timezone
+
+from easybook.models import Booking
+
+
+TABLE = Booking._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_RE = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def _months_ahead() -> int:
+    return getattr(settings, 'BOOKING_PARTITION_MONTHS_AHEAD', 3)
+
+
+def _retention_months() -> int:
+    return getattr(settings, 'BOOKING_PARTITION_RETENTION_MONTHS', 0)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month() -> date:
+    return timezone.now().astimezone(dt_timezone.utc).date().replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def _bound(month: date) -> str:
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat()
+
+
+def is_partitioned() -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table"
+            " WHERE partrelid = to_regclass(%s))",
+            [TABLE],
+        )
+        return cursor.fetchone()[0]
+
+
+def partitions() -> list[tuple[str, date]]:
+    """
+    Месячные секции (имя, первое число месяца) по возрастанию.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i"
+            " JOIN pg_class c ON c.oid = i.inhrelid"
+            " WHERE i.inhparent = to_regclass(%s)",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            months.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(months, key=lambda item: item[1])
+
+
+def detached_partitions() -> list[str]:
+    """
+    Отсоединённые месячные секции — обычные таблицы `<таблица>_pYYYY_MM`.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class"
+            " WHERE relkind = 'r' AND NOT relispartition"
+            " AND relnamespace = current_schema()::regnamespace AND relname ~ %s",
+            [PARTITION_RE.pattern],
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def _add_partition_constraints(cursor, table):
+    """
+    Первичный ключ и ограничения-исключения Booking на отдельной секции.
+    Они проверяют только строки этой секции; пересечения между секциями —
+    `easybook.admission.overlapping_bookings`.
+    """
+    qn = connection.ops.quote_name
+    cursor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY ("id")')
+    with connection.schema_editor(collect_sql=True) as editor:
+        for constraint in Booking._meta.constraints:
+            clone = constraint.clone()
+            clone.name = truncate_name(f'{table}_{constraint.name}', 63)
+            cursor.execute(
+                f'ALTER TABLE {qn(table)} ADD {clone.constraint_sql(Booking, editor)}'
+            )
+
+
+def create_partition(month: date) -> str:
+    """
+    Секция на месяц `month`; подходящие брони из DEFAULT переносятся в неё.
+    """
+    name = partition_name(month)
+    qn = connection.ops.quote_name
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    with transaction.atomic(), connection.cursor() as cursor:
+        # ALTER TABLE не выполняется при отложенных проверках FK в транзакции
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)}'
+            f' WHERE lower("timerange") >= %s AND lower("timerange") < %s RETURNING *)'
+            f' INSERT INTO {qn(name)} SELECT * FROM moved',
+            [lower, upper],
+        )
+        _add_partition_constraints(cursor, name)
+        cursor.execute(
+            f'ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)}'
+            f" FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+    return name
+
+
+def ensure_partitions(months_ahead=None) -> list[str]:
+    """
+    Создаёт недостающие секции от текущего месяца на `months_ahead` вперёд.
+    """
+    months_ahead = _months_ahead() if months_ahead is None else months_ahead
+    existing = {month for _, month in partitions()}
+    first = current_month()
+    return [
+        create_partition(month)
+        for month in (add_months(first, i) for i in range(months_ahead + 1))
+        if month not in existing
+    ]
+
+
+def detach_partitions(before: date, drop=False) -> list[str]:
+    """
+    Отсоединяет секции месяцев раньше `before`; с `drop` — удаляет.
+    """
+    qn = connection.ops.quote_name
+    detached = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        for name, month in partitions():
+            if month >= before:
+                break
+            cursor.execute(f'ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}')
+            if drop:
+                cursor.execute(f'DROP TABLE {qn(name)}')
+            detached.append(name)
+    return detached
+
+
+def maintain(months_ahead=None, retention_months=None, drop=False):
+    """
+    Создаёт будущие секции и отсоединяет устаревшие.
+    None, если таблица не секционирована.
+    """
+    if not is_partitioned():
+        return None
+    retention_months = _retention_months() if retention_months is None else retention_months
+    created = ensure_partitions(months_ahead)
+    detached = []
+    if retention_months:
+        detached = detach_partitions(add_months(current_month(), -retention_months), drop)
+    return {'created': created, 'detached': detached}
+
+
+def convert(months_ahead=None) -> list[str]:
+    """
+    Переводит Booking в секционированную таблицу с переносом данных.
+
+    Одна транзакция под ACCESS EXCLUSIVE: на время переноса таблица
+    недоступна, запускать в окно обслуживания. Индексы, внешние ключи
+    и триггеры переносятся на родительскую таблицу, первичный ключ и
+    ограничения-исключения — на каждую секцию, поэтому пересечения броней
+    из разных месяцев после перевода отсекают только проверки
+    `easybook.admission` и `easybook.bulk` (см. docstring модуля).
+    Возвращает созданные секции.
+    """
+    months_ahead = _months_ahead() if months_ahead is None else months_ahead
+    qn = connection.ops.quote_name
+    legacy = f'{TABLE}_unpartitioned'
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned():
+            return []
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(f'LOCK TABLE {qn(TABLE)} IN ACCESS EXCLUSIVE MODE')
+        # Индексы, кроме индексов ограничений (PK, исключения)
+        cursor.execute(
+            "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x"
+            " JOIN pg_class i ON i.oid = x.indexrelid"
+            " WHERE x.indrelid = %s::regclass"
+            " AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)",
+            [TABLE],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint"
+            " WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT pg_get_triggerdef(oid) FROM pg_trigger"
+            " WHERE tgrelid = %s::regclass AND NOT tgisinternal",
+            [TABLE],
+        )
+        triggers = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            f'SELECT min(lower("timerange")), max("id") FROM {qn(TABLE)}'
+        )
+        first_start, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} RENAME TO {qn(legacy)}')
+        # Имена индексов глобальны в схеме — освобождаем их для новой таблицы
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {qn(name)}')
+        # Последовательность (identity или serial) удаляется, её имя займёт новая
+        sequence = f'{TABLE}_id_seq'
+        cursor.execute(f'ALTER TABLE {qn(legacy)} ALTER COLUMN "id" DROP IDENTITY IF EXISTS')
+        cursor.execute(f'ALTER TABLE {qn(legacy)} ALTER COLUMN "id" DROP DEFAULT')
+        cursor.execute(f'DROP SEQUENCE IF EXISTS {qn(sequence)}')
+
+        cursor.execute(
+            f'CREATE TABLE {qn(TABLE)} (LIKE {qn(legacy)} INCLUDING DEFAULTS)'
+            f' PARTITION BY RANGE (lower("timerange"))'
+        )
+        cursor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(TABLE)}."id"')
+        cursor.execute(
+            f'ALTER TABLE {qn(TABLE)} ALTER COLUMN "id" SET DEFAULT nextval(%s)',
+            [sequence],
+        )
+        if max_id is not None:
+            cursor.execute('SELECT setval(%s, %s)', [sequence, max_id])
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}')
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for definition in triggers:
+            cursor.execute(definition)
+
+        cursor.execute(f'CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {qn(TABLE)} DEFAULT')
+        _add_partition_constraints(cursor, DEFAULT_PARTITION)
+
+        first = current_month()
+        if first_start is not None:
+            first = min(first, first_start.astimezone(dt_timezone.utc).date().replace(day=1))
+        last = add_months(current_month(), months_ahead)
+        created = []
+        month = first
+        while month <= last:
+            created.append(create_partition(month))
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO {qn(TABLE)} SELECT * FROM {qn(legacy)}')
+        cursor.execute(f'DROP TABLE {qn(legacy)}')
+    return created
@@ -0,0 +1,113 @@
+"""
+Напоминания о предстоящих бронях.
+
+Вместо ETA-задачи на каждую бронь (миллионы отложенных сообщений в
+брокере, которые к тому же надо снимать при переносе и удалении) beat-задача
+`send_booking_reminders_task` раз в BOOKING_REMINDER_SWEEP_SECONDS секунд
+выбирает брони, начинающиеся в ближайшие BOOKING_REMINDER_HOURS часов и
+ещё не напомненные. Запрос идёт по частичному индексу
+`booking_remind_start_idx` (lower(timerange), id WHERE reminded_at IS NULL):
+стоимость прохода зависит от числа ожидающих напоминания броней в окне,
+а не от размера таблицы, у секционированной таблицы читаются только секции
+окна.
+
+Пачка выбирается со `FOR UPDATE SKIP LOCKED` и помечается `reminded_at`:
+параллельные проходы не берут одни и те же брони, повторный проход уже
+помеченные не видит. Письма ставятся в `send_email_task` только после
+коммита отметок (`transaction.on_commit`) — откат не оставляет
+поставленных писем без отметки. Если брокер недоступен, отметки
+непоставленных писем снимаются и они уходят со следующим проходом; процесс,
+упавший между коммитом и постановкой, напоминания этой пачки теряет
+(не более одного напоминания на бронь).
+Перенос брони сбрасывает отметку (`signals.remember_previous_booking`).
+"""
+import logging
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from easybook import mail
+from easybook.models import Booking
+from easybook.outbox import BROKER_ERRORS
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+SUBJECT = 'Booking reminder'
+
+
+def lead_time():
+    """
+    За сколько до начала напоминать; None, если напоминания выключены.
+    """
+    hours = getattr(settings, 'BOOKING_REMINDER_HOURS', 0)
+    return timedelta(hours=hours) if hours else None
+
+
+def due(now, lead):
+    return Booking.objects.filter(
+        reminded_at__isnull=True,
+        timerange__startswith__gte=now,
+        timerange__startswith__lt=now + lead,
+    )
+
+
+def _message(booking_id, email, resource_name, timerange):
+    start = timezone.localtime(timerange.lower)
+    end = timezone.localtime(timerange.upper)
+    return (
+        SUBJECT,
+        f'{resource_name}: {start:%Y-%m-%d %H:%M} - {end:%H:%M}, booking #{booking_id}',
+        email,
+    )
+
+
+def _queue(pks, messages):
+    """
+    Ставит письма пачками; при недоступном брокере снимает отметки
+    `reminded_at` с непоставленных, чтобы их подобрал следующий проход.
+    """
+    from easybook.tasks import send_email_task
+
+    offset = 0
+    for batch in mail.batches(messages):
+        try:
+            send_email_task.delay(batch)
+        except BROKER_ERRORS:
+            logger.exception('Broker unavailable, reminders wait for the next sweep')
+            Booking.objects.filter(pk__in=pks[offset:]).update(reminded_at=None)
+            return
+        offset += len(batch)
+
+
+def send_due(now=None, lead=None, batch_size=BATCH_SIZE) -> int | None:
+    """
+    Ставит напоминания о бронях, начинающихся в [now, now + lead), после
+    коммита отметок. Возвращает число напомненных; None, если напоминания
+    выключены.
+    """
+    lead = lead or lead_time()
+    if lead is None:
+        return None
+    now = now or timezone.now()
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                due(now, lead).select_for_update(skip_locked=True, of=('self',))
+                .order_by('timerange__startswith', 'id')
+                .values_list('pk', 'user__email', 'resource__name', 'timerange')[:batch_size]
+            )
+            if not rows:
+                return total
+            pks = [row[0] for row in rows]
+            Booking.objects.filter(pk__in=pks).update(reminded_at=timezone.now())
+            messages = [_message(*row) for row in rows]
+            transaction.on_commit(partial(_queue, pks, messages))
+        total += len(rows)
+        if len(rows) < batch_size:
+            return total
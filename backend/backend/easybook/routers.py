@@ -0,0 +1,83 @@
+"""
+Маршрутизация чтений на реплику.
+
+Включается настройкой REPLICA_DATABASE (алиас в DATABASES). На реплику
+уходят чтения моделей из REPLICA_MODELS — доступность, каталог и списки
+бронирований, — кроме случаев, когда важна свежесть:
+
+- открыт `transaction.atomic` на primary (приём брони, перенос и т. п.);
+- блок `use_primary()` — задачи Celery и заполнение кэшей, чтобы не
+  закэшировать отставание реплики;
+- read-your-writes: после записи в запросе `ReplicaPinMiddleware`
+  ставит cookie, и следующие REPLICA_STICKY_SECONDS секунд запросы этого
+  клиента читают с primary.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA_MODELS = {
+    'availabilityrule', 'capacitywindow', 'slotavailability',
+    'company', 'category', 'resource', 'resourcecategory', 'resourcestaff', 'staff',
+    'booking', 'archivedbooking',
+}
+
+# Принудительное чтение с primary
+_pinned: ContextVar[bool] = ContextVar('easybook_db_pinned', default=False)
+# Изменяемый флаг «в запросе была запись» (виден и из sync_to_async-потоков)
+_writes: ContextVar[dict | None] = ContextVar('easybook_db_writes', default=None)
+
+
+def replica_alias():
+    return getattr(settings, 'REPLICA_DATABASE', None)
+
+
+@contextmanager
+def use_primary():
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+@contextmanager
+def track_writes(pinned=False):
+    """
+    Область запроса: `pinned` — читать с primary (cookie read-your-writes).
+    Отдаёт словарь, в котором после блока `wrote` — была ли запись.
+    """
+    state = {'wrote': False}
+    tokens = (_pinned.set(pinned or _pinned.get()), _writes.set(state))
+    try:
+        yield state
+    finally:
+        _writes.reset(tokens[1])
+        _pinned.reset(tokens[0])
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = replica_alias()
+        if (
+            replica is None
+            or model._meta.app_label != 'easybook'
+            or model._meta.model_name not in REPLICA_MODELS
+            or _pinned.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        state = _writes.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика — копия primary, объекты с обеих сторон совместимы
+        return True
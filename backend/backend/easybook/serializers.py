@@ -1,42 +1,105 @@
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
 from rest_framework import serializers
-from easybook.models import User, Resource, Booking
+from easybook.models import ArchivedBooking, User, Resource, Booking, Company, Staff
 
-class UserSerializer(serializers.HyperlinkedModelSerializer):
-    url = serializers.HyperlinkedIdentityField(
-        view_name='user-detail',
-        lookup_field='userID'
-    )
 
+USER_FIELDS = ["id", "email", "first_name", "last_name", "phone_number"]
+RESOURCE_FIELDS = [
+    "id", "company", "name", "description", "max_capacity", "requires_staff",
+    "price", "old_price", "pricing_type", "is_active",
+]
+BOOKING_FIELDS = [
+    "id", "user", "resource", "staff", "start", "end",
+    "quantity", "is_confirmed", "additional_info",
+]
+
+
+# Контакты видят только сам пользователь и персонал
+USER_CONTACT_FIELDS = ("email", "phone_number")
+
+
+class UserContactsMixin:
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        viewer = getattr(self.context.get("request"), "user", None)
+        if not (viewer and (viewer.is_staff or viewer.pk == instance.pk)):
+            for field in USER_CONTACT_FIELDS:
+                data.pop(field, None)
+        return data
+
+
+class UserSerializer(UserContactsMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = User
-        fields = ["url", "userID", "email", "name", "surname"]
+        fields = ["url", *USER_FIELDS]
+
+
+class CompactUserSerializer(UserContactsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = USER_FIELDS
+
 
 class ResourceSerializer(serializers.HyperlinkedModelSerializer):
-    url = serializers.HyperlinkedIdentityField(
-        view_name='resource-detail',
-        lookup_field='resourseID' 
+    # У компаний нет своего endpoint'а — отдаём id
+    company = serializers.PrimaryKeyRelatedField(
+        queryset=Company.objects.all(), allow_null=True, required=False
     )
 
     class Meta:
         model = Resource
-        fields = ["url", "resourseID", "name", "description", "schedule"]
+        fields = ["url", *RESOURCE_FIELDS]
 
-class BookingSerializer(serializers.HyperlinkedModelSerializer):
-    url = serializers.HyperlinkedIdentityField(
-        view_name='booking-detail',
-        lookup_field='bookingID'
-    )
-    user = serializers.HyperlinkedRelatedField(
-        view_name='user-detail',
-        lookup_field='userID',
-        queryset=User.objects.all()
-    )
-    resource = serializers.HyperlinkedRelatedField(
-        view_name='resource-detail',
-        lookup_field='resourseID', 
-        queryset=Resource.objects.all()
+
+class CompactResourceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Resource
+        fields = RESOURCE_FIELDS
+
+
+class BookingTimerangeMixin(serializers.Serializer):
+    """
+    timerange [start, end) в виде двух полей.
+    """
+    start = serializers.DateTimeField(source='timerange.lower')
+    end = serializers.DateTimeField(source='timerange.upper')
+
+    def validate(self, attrs):
+        if 'timerange' in attrs:
+            current = self.instance.timerange if self.instance else None
+            lower = attrs['timerange'].get('lower', current and current.lower)
+            upper = attrs['timerange'].get('upper', current and current.upper)
+            if lower is None or upper is None:
+                raise serializers.ValidationError(
+                    '`start` and `end` must be set.'
+                )
+            if lower >= upper:
+                raise serializers.ValidationError(
+                    '`timerange.start` must be less than `timerange.end`.'
+                )
+            attrs['timerange'] = DateTimeTZRange(lower, upper)
+        return attrs
+
+
+class BookingSerializer(BookingTimerangeMixin, serializers.HyperlinkedModelSerializer):
+    # У сотрудников нет своего endpoint'а — отдаём id
+    staff = serializers.PrimaryKeyRelatedField(
+        queryset=Staff.objects.all(), allow_null=True, required=False
     )
 
     class Meta:
         model = Booking
-        fields = ["url", "bookingID", "user", "resource", "start_time", "end_time", "is_confirmed"]
\ No newline at end of file
+        fields = ["url", *BOOKING_FIELDS]
+
+
+class CompactBookingSerializer(BookingTimerangeMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Booking
+        fields = BOOKING_FIELDS
+
+
+class ArchivedBookingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedBooking
+        fields = [*BOOKING_FIELDS, "archived_at"]
+        read_only_fields = fields
@@ -0,0 +1,143 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from easybook import catalog, feeds, materialization, model_cache, outbox
+from easybook.models import (
+    AvailabilityRule, Booking, BookingEvent, CapacityWindow, Category, Company, Resource,
+    ResourceCategory, ResourceStaff, Staff,
+)
+
+
+@receiver([post_save, post_delete], sender=AvailabilityRule)
+def invalidate_availability_rules(sender, instance, **kwargs):
+    model_cache.invalidate('rules', instance.resource_id)
+    if materialization.is_enabled():
+        if instance.specific_date is not None:
+            day = instance.specific_date
+            materialization.schedule_refresh(instance.resource_id, day, day)
+        else:
+            materialization.schedule_refresh(instance.resource_id)
+
+
+@receiver(pre_save, sender=CapacityWindow)
+def remember_previous_range(sender, instance, **kwargs):
+    # При переносе брони/окна пересчитать нужно и старый интервал
+    if materialization.is_enabled() and instance.pk:
+        instance._previous_range = sender.objects.filter(
+            pk=instance.pk
+        ).values_list('resource_id', 'timerange').first()
+
+
+@receiver(pre_save, sender=Booking)
+def remember_previous_booking(sender, instance, **kwargs):
+    # При переносе брони обновляются и старые ресурс/сотрудник/интервал
+    if instance.pk:
+        previous = Booking.objects.filter(pk=instance.pk).values_list(
+            'resource_id', 'staff_id', 'timerange', 'is_confirmed', 'reminded_at'
+        ).first()
+        if previous is not None:
+            resource_id, staff_id, timerange, is_confirmed, reminded_at = previous
+            instance._previous_range = (resource_id, timerange)
+            instance._previous_owners = (resource_id, staff_id)
+            instance._was_confirmed = is_confirmed
+            # Отметку ставит easybook.reminders в обход save(): берём её из
+            # базы, а перенесённой брони напомним заново
+            instance.reminded_at = reminded_at if timerange == instance.timerange else None
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def touch_schedules(sender, instance, **kwargs):
+    resource_ids, staff_ids = {instance.resource_id}, {instance.staff_id}
+    previous = getattr(instance, '_previous_owners', None)
+    if previous is not None:
+        resource_ids.add(previous[0])
+        staff_ids.add(previous[1])
+    feeds.touch(resource_ids, staff_ids)
+
+
+@receiver(post_save, sender=Booking)
+def record_booking_saved(sender, instance, created, **kwargs):
+    # Booking.save() атомарен — событие коммитится вместе с бронью
+    previous_range = getattr(instance, '_previous_range', None)
+    if created:
+        kind = BookingEvent.Kind.CREATED
+    elif instance.is_confirmed and not getattr(instance, '_was_confirmed', True):
+        kind = BookingEvent.Kind.CONFIRMED
+    else:
+        kind = BookingEvent.Kind.UPDATED
+    if previous_range == (instance.resource_id, instance.timerange):
+        previous_range = None
+    outbox.record(kind, instance, previous_range)
+
+
+@receiver(post_delete, sender=Booking)
+def record_booking_deleted(sender, instance, **kwargs):
+    outbox.record(BookingEvent.Kind.DELETED, instance)
+
+
+# Материализованные слоты броней пересчитывает ретранслятор outbox
+@receiver([post_save, post_delete], sender=CapacityWindow)
+def refresh_materialized_slots(sender, instance, **kwargs):
+    if not materialization.is_enabled():
+        return
+    ranges = {(instance.resource_id, instance.timerange)}
+    previous = getattr(instance, '_previous_range', None)
+    if previous is not None:
+        ranges.add(previous)
+    for resource_id, timerange in ranges:
+        dates = materialization.dates_of(timerange)
+        if dates is not None:
+            materialization.schedule_refresh(resource_id, *dates)
+
+
+@receiver(pre_save, sender=Company)
+def remember_previous_slug(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_slug = Company.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Company)
+def invalidate_company_catalog(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_previous_slug', None)} - {None}
+    for slug in slugs:
+        model_cache.invalidate('company', slug)
+    catalog.invalidate(slugs=slugs)
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Resource)
+@receiver(pre_save, sender=Staff)
+def remember_previous_company(sender, instance, **kwargs):
+    # Перенос в другую компанию меняет два каталога
+    if instance.pk:
+        instance._previous_company = sender.objects.filter(
+            pk=instance.pk
+        ).values_list('company_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Resource)
+@receiver([post_save, post_delete], sender=Staff)
+def invalidate_catalog(sender, instance, **kwargs):
+    if sender is Resource:
+        model_cache.invalidate('resource', instance.pk)
+    catalog.invalidate({instance.company_id, getattr(instance, '_previous_company', None)})
+
+
+@receiver([post_save, post_delete], sender=ResourceCategory)
+@receiver([post_save, post_delete], sender=ResourceStaff)
+def invalidate_catalog_links(sender, instance, **kwargs):
+    catalog.invalidate(
+        Resource.objects.filter(pk=instance.resource_id).values_list('company_id', flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=ResourceCategory)
+@receiver(m2m_changed, sender=ResourceStaff)
+def invalidate_catalog_m2m(sender, instance, action, **kwargs):
+    # resource.category.add(...) / staff.resources.remove(...) идут в обход save()
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    catalog.invalidate({instance.company_id})
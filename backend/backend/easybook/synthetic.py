@@ -0,0 +1,258 @@
+"""
+Синтетические данные для нагрузочных тестов и бенчмарков.
+
+`generate()` создаёт компании с деревьями категорий, ресурсы, сотрудников,
+правила доступности, окна вместимости и бронирования в заданном масштабе.
+Генерация детерминирована `seed`: один и тот же seed даёт те же данные,
+а slug'и и email'ы содержат его, поэтому наборы с разными seed уживаются
+в одной базе.
+
+Справочники пишутся `bulk_create` пачками, бронирования — через COPY
+(`easybook.bulk.copy_rows`). Брони одного ресурса идут подряд по сетке
+его слотов (без учёта часов работы) и не пересекаются, у каждого
+сотрудника ровно один ресурс — так данные проходят ограничения-исключения
+Booking без проверок в Python.
+Сигналы не срабатывают: кэши и материализованные слоты после генерации
+не пересчитываются.
+"""
+import csv
+import io
+import random
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
+
+from easybook.bulk import copy_rows
+from easybook.models import (
+    AvailabilityRule, Booking, CapacityWindow, Category, Company, Resource,
+    ResourceCategory, ResourceStaff, Staff, User,
+)
+
+
+BATCH_SIZE = 5000
+BOOKING_COLUMNS = (
+    'user_id', 'resource_id', 'staff_id', 'timerange',
+    'is_confirmed', 'quantity', 'additional_info',
+)
+SLOT_SIZES = (30, 60, 60, 90, 120)
+CAPACITIES = (1, 1, 1, 2, 5, 10)
+
+
+@dataclass
+class Scale:
+    companies: int = 10
+    resources: int = 100
+    users: int = 1000
+    bookings: int = 10_000
+    # Категорий на компанию и глубина дерева
+    categories: int = 12
+    category_depth: int = 3
+    # Доля ресурсов, требующих сотрудника (у каждого — свой сотрудник)
+    staff_share: float = 0.3
+    # Доля ресурсов с окнами вместимости
+    window_share: float = 0.2
+    # Брони раскладываются на [сегодня - past_days, сегодня + future_days)
+    past_days: int = 365
+    future_days: int = 90
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _bulk(model, objects, batch_size):
+    created = []
+    for batch in _batches(objects, batch_size):
+        created.extend(model.objects.bulk_create(batch))
+    return created
+
+
+def _categories(rng, companies, scale, prefix, batch_size):
+    """
+    По уровням: родители должны получить id раньше детей.
+    """
+    by_company = {}
+    parents = {company.pk: [None] for company in companies}
+    per_level = max(1, scale.categories // max(1, scale.category_depth))
+    for level in range(scale.category_depth):
+        level_objects = [
+            Category(
+                company=company,
+                parent=rng.choice(parents[company.pk]),
+                name=f'Category {level}.{i}',
+                slug=f'{prefix}-{company.pk}-{level}-{i}',
+                sort_order=i,
+            )
+            for company in companies for i in range(per_level)
+        ]
+        created = _bulk(Category, level_objects, batch_size)
+        parents = {}
+        for category in created:
+            parents.setdefault(category.company_id, []).append(category)
+        for company_id, categories in parents.items():
+            by_company.setdefault(company_id, []).extend(categories)
+    Category.objects.rebuild_paths()
+    return by_company
+
+
+def _rules(rng, resource, slot_size, today, future_days):
+    weekdays = sorted(rng.sample(range(7), rng.randint(5, 7)))
+    opens, closes = rng.choice(((8, 20), (9, 18), (10, 22), (0, 24)))
+    end = time(closes - 1, 59) if closes == 24 else time(closes)
+    for weekday in weekdays:
+        yield AvailabilityRule(
+            resource=resource, weekday=weekday,
+            start_time=time(opens), end_time=end, slot_size=slot_size,
+        )
+    # Пара «особых» дней: сокращённый график
+    for _ in range(2):
+        yield AvailabilityRule(
+            resource=resource,
+            specific_date=today + timedelta(days=rng.randrange(max(1, future_days))),
+            start_time=time(opens), end_time=time(opens + 4), slot_size=slot_size,
+        )
+
+
+def _windows(rng, resource, start, weeks):
+    for week in range(weeks):
+        lower = start + timedelta(weeks=week)
+        yield CapacityWindow(
+            resource=resource,
+            capacity=rng.randint(1, resource.max_capacity),
+            timerange=DateTimeTZRange(lower, lower + timedelta(weeks=1)),
+        )
+
+
+def _bookings(rng, resources, staff_by_resource, user_ids, count, start, days):
+    """
+    Строки COPY: у ресурса — `count / len(resources)` броней подряд по
+    сетке его слотов, случайные промежутки между ними.
+    """
+    per_resource, extra = divmod(count, len(resources))
+    total_minutes = days * 24 * 60
+    for index, (resource, slot_size) in enumerate(resources):
+        n = per_resource + (index < extra)
+        if not n:
+            continue
+        slots = total_minutes // slot_size
+        # Средний шаг по сетке так, чтобы n броней уложились в горизонт
+        step = max(1, slots // n)
+        position = rng.randrange(step)
+        staff_id = staff_by_resource.get(resource.pk)
+        for _ in range(n):
+            lower = start + timedelta(minutes=position * slot_size)
+            upper = lower + timedelta(minutes=slot_size)
+            yield (
+                rng.choice(user_ids), resource.pk, staff_id,
+                f'[{lower.isoformat()},{upper.isoformat()})',
+                rng.random() < 0.8, 1, '',
+            )
+            position += rng.randint(1, 2 * step - 1) if step > 1 else 1
+
+
+def _copy_bookings(rows, batch_size):
+    table = Booking._meta.db_table
+    total = 0
+    for batch in _batches(rows, batch_size * 10):
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(batch)
+        buffer.seek(0)
+        with transaction.atomic(), connection.cursor() as cursor:
+            copy_rows(cursor, table, BOOKING_COLUMNS, buffer)
+        total += len(batch)
+    return total
+
+
+def generate(scale=None, seed=0, batch_size=BATCH_SIZE):
+    """
+    Создаёт набор данных масштаба `scale` (Scale). Возвращает число
+    созданных объектов по моделям.
+    """
+    scale = scale or Scale()
+    rng = random.Random(seed)
+    prefix = f'synthetic-{seed}'
+    today = timezone.localdate()
+    start = datetime.combine(
+        today - timedelta(days=scale.past_days), time(), tzinfo=dt_timezone.utc
+    )
+    days = scale.past_days + scale.future_days
+
+    password = make_password(None)
+    users = _bulk(User, (
+        User(email=f'{prefix}-{i}@example.com', password=password)
+        for i in range(scale.users)
+    ), batch_size)
+    companies = _bulk(Company, (
+        Company(name=f'Company {i}', slug=f'{prefix}-{i}')
+        for i in range(scale.companies)
+    ), batch_size)
+    categories = _categories(rng, companies, scale, prefix, batch_size)
+
+    resources = _bulk(Resource, (
+        Resource(
+            company=companies[i % len(companies)],
+            name=f'Resource {i}',
+            max_capacity=rng.choice(CAPACITIES),
+            requires_staff=rng.random() < scale.staff_share,
+        )
+        for i in range(scale.resources)
+    ), batch_size)
+    _bulk(ResourceCategory, (
+        ResourceCategory(resource=resource, category=category)
+        for resource in resources
+        for category in rng.sample(
+            categories[resource.company_id], min(2, len(categories[resource.company_id]))
+        )
+    ), batch_size)
+
+    staffed = [resource for resource in resources if resource.requires_staff]
+    staff = _bulk(Staff, (
+        Staff(company_id=resource.company_id, display_name=f'Staff {i}')
+        for i, resource in enumerate(staffed)
+    ), batch_size)
+    _bulk(ResourceStaff, (
+        ResourceStaff(resource=resource, staff=member)
+        for resource, member in zip(staffed, staff)
+    ), batch_size)
+    staff_by_resource = {resource.pk: member.pk for resource, member in zip(staffed, staff)}
+
+    slot_sizes = [rng.choice(SLOT_SIZES) for _ in resources]
+    rules = _bulk(AvailabilityRule, (
+        rule
+        for resource, slot_size in zip(resources, slot_sizes)
+        for rule in _rules(rng, resource, slot_size, today, scale.future_days)
+    ), batch_size)
+    windowed = [
+        resource for resource in resources
+        if resource.max_capacity > 1 and rng.random() < scale.window_share
+    ]
+    windows = _bulk(CapacityWindow, (
+        window
+        for resource in windowed
+        for window in _windows(rng, resource, start, days // 7)
+    ), batch_size)
+
+    bookings = _copy_bookings(
+        _bookings(
+            rng, list(zip(resources, slot_sizes)), staff_by_resource,
+            [user.pk for user in users], scale.bookings, start, days,
+        ),
+        batch_size,
+    )
+    return {
+        'users': len(users),
+        'companies': len(companies),
+        'categories': sum(len(c) for c in categories.values()),
+        'resources': len(resources),
+        'staff': len(staff),
+        'rules': len(rules),
+        'capacity_windows': len(windows),
+        'bookings': bookings,
+    }
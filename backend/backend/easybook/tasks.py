@@ -1,25 +1,131 @@
-from django.core.mail import send_mail
 from celery import shared_task
-from django.conf import settings
+from celery.utils.time import get_exponential_backoff_interval
+
+
+EMAIL_RETRY_BACKOFF = 30
+EMAIL_RETRY_BACKOFF_MAX = 3600
+
+
+@shared_task(bind=True, max_retries=8)
+def send_email_task(self, messages, message=None, recipient=None):
+    """
+    Send a batch of [subject, body, recipient] emails over one mail
+    connection (see easybook.mail).
+
+    Unsent messages are retried with exponential backoff; messages over
+    a recipient's rate limit are re-queued for the next window. The
+    single-message form send_email_task(subject, message, recipient) is
+    still accepted for tasks queued by older code.
+    """
+    from easybook import mail
+
+    if recipient is not None:
+        messages = [(messages, message, recipient)]
+    try:
+        result = mail.send_batch(messages)
+    except OSError as exc:  # SMTPException is an OSError
+        raise self.retry(
+            args=(getattr(exc, 'unsent', messages),),
+            kwargs={},
+            exc=exc,
+            countdown=get_exponential_backoff_interval(
+                factor=EMAIL_RETRY_BACKOFF,
+                retries=self.request.retries,
+                maximum=EMAIL_RETRY_BACKOFF_MAX,
+                full_jitter=True,
+            ),
+        )
+    if result['deferred']:
+        send_email_task.apply_async((result['deferred'],), countdown=mail.rate_window())
+    return result['sent']
+
+
+@shared_task
+def refresh_availability_task(resource_id, start_date=None, end_date=None):
+    """
+    Incrementally refresh materialized slots of a resource
+    for the given ISO dates (the whole horizon by default).
+    """
+    from datetime import date
+    from easybook import materialization
+
+    return materialization.refresh(
+        resource_id,
+        start_date and date.fromisoformat(start_date),
+        end_date and date.fromisoformat(end_date),
+    )
+
+
+@shared_task
+def rebuild_availability_task():
+    """
+    Roll the materialized horizon forward; meant for a nightly beat schedule.
+    """
+    from easybook import materialization
+
+    if materialization.is_enabled():
+        return materialization.rebuild()
+    return 0
+
+
+@shared_task
+def maintain_booking_partitions_task():
+    """
+    Create upcoming booking partitions and detach expired ones
+    (no-op unless the booking table is partitioned).
+    """
+    from easybook import partitioning
+
+    return partitioning.maintain()
+
+
+@shared_task
+def archive_bookings_task():
+    """
+    Move bookings past BOOKING_ARCHIVE_AFTER_DAYS and detached booking
+    partitions into the archive table (no-op when archiving is disabled).
+    """
+    from easybook import archive
+
+    return archive.run()
 
 
 @shared_task
-def send_email_task(subject, message, recipient):
-    """
-    A Celery task to send an email.
-    """
-    if message and subject and recipient:
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.EMAIL_HOST_USER,
-                [recipient],
-                fail_silently=False,
-            )
-        except Exception as e:
-            return f'Error: {e}'
-
-        return True
-    
-    return False
+def relay_booking_events_task():
+    """
+    Fan out pending booking events from the outbox to email, webhook and
+    materialized-slot consumers, then purge old processed events.
+    """
+    from easybook import outbox
+
+    relayed = outbox.relay()
+    outbox.purge()
+    return relayed
+
+
+@shared_task(
+    autoretry_for=(OSError,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    max_retries=8,
+)
+def deliver_webhook_task(url, events):
+    """
+    POST a batch of booking events to a webhook, retrying with exponential
+    backoff on network errors and non-2xx responses.
+    """
+    from easybook import outbox
+
+    return outbox.post_webhook(url, events)
+
+
+@shared_task
+def send_booking_reminders_task():
+    """
+    Sweep bookings starting within BOOKING_REMINDER_HOURS that have not
+    been reminded yet and queue their reminder emails in batches
+    (no-op when reminders are disabled).
+    """
+    from easybook import reminders
+
+    return reminders.send_due()
@@ -1,11 +1,34 @@
 # from django.shortcuts import render
-from django.http import HttpResponse
-from django.views.decorators.csrf import csrf_exempt
+from datetime import date, timedelta
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from django.views.decorators.http import require_POST
 from django.http import JsonResponse
-from easybook.tasks import send_email_task
-from rest_framework import viewsets
-from easybook.models import Booking, User, Resource 
-from easybook.serializers import BookingSerializer, UserSerializer, ResourceSerializer 
+from easybook import (
+    admission, availability, bulk, catalog, export, feeds, materialization, metrics,
+    model_cache,
+)
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.models import F
+import hmac
+import io
+import ipaddress
+import json
+from rest_framework import permissions, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from easybook.models import ArchivedBooking, Booking, User, Resource, Category, Staff
+from easybook.pagination import BookingPagination, KeysetPagination
+from easybook.serializers import (
+    BookingSerializer, UserSerializer, ResourceSerializer,
+    CompactBookingSerializer, CompactUserSerializer, CompactResourceSerializer,
+    ArchivedBookingSerializer,
+)
 
 def index(request):
     return HttpResponse("Hi!")
@@ -22,30 +45,412 @@ def bookings(request, bookingID):
 def resource_info(request, resourceID):
     return HttpResponse(" %s." % resourceID)
 
+# Ограничение длины диапазона календаря, дней
+CALENDAR_MAX_DAYS = 366
+
+def slot_source(start_date, end_date):
+    """
+    Материализованная таблица, если она включена и покрывает даты,
+    иначе расчёт на лету.
+    """
+    if materialization.is_enabled() and materialization.in_horizon(start_date, end_date):
+        return materialization
+    return availability
+
+def _calendar_range(request):
+    """
+    (start, end) из ?start=YYYY-MM-DD&end=YYYY-MM-DD или JsonResponse с ошибкой.
+    """
+    try:
+        start = date.fromisoformat(request.GET['start']) \
+            if 'start' in request.GET else date.today()
+        end = date.fromisoformat(request.GET['end']) \
+            if 'end' in request.GET else start + timedelta(days=6)
+    except ValueError:
+        return JsonResponse(
+            {"error": "`start` and `end` must be dates in YYYY-MM-DD format."},
+            status=400
+        )
+    if end < start or (end - start).days >= CALENDAR_MAX_DAYS:
+        return JsonResponse(
+            {"error": f"`end` must be within {CALENDAR_MAX_DAYS} days after `start`."},
+            status=400
+        )
+    return start, end
+
 def calendar(request, resourceID):
-    return HttpResponse(" %s." % resourceID)
+    """
+    Свободные слоты ресурса на [start, end] (?start=YYYY-MM-DD&end=YYYY-MM-DD).
+    По умолчанию — неделя, начиная с сегодняшнего дня.
+    """
+    resource = model_cache.resource_by_id(resourceID)
+    if resource is None:
+        raise Http404
+    dates = _calendar_range(request)
+    if isinstance(dates, JsonResponse):
+        return dates
+    start, end = dates
+
+    return JsonResponse({
+        "resource": resource.pk,
+        "start": start,
+        "end": end,
+        "slots": slot_source(start, end).free_slots(resource, start, end),
+    })
+
+async def calendar_async(request, resourceID):
+    """
+    То же, что `calendar`, на async ORM — ожидание базы не занимает воркер.
+    """
+    resource = await sync_to_async(model_cache.resource_by_id)(resourceID)
+    if resource is None:
+        raise Http404
+    dates = _calendar_range(request)
+    if isinstance(dates, JsonResponse):
+        return dates
+    start, end = dates
+
+    return JsonResponse({
+        "resource": resource.pk,
+        "start": start,
+        "end": end,
+        "slots": await slot_source(start, end).afree_slots(resource, start, end),
+    })
+
+@require_POST
+async def create_booking_async(request):
+    """
+    Бронь от имени текущего пользователя. Тело — JSON:
+    {"resource": id, "staff": id | null, "start": ISO 8601, "end": ISO 8601,
+     "quantity": 1, "additional_info": ""}.
+
+    Проверки — как у массового импорта (`bulk.validate_row`), приём —
+    `admission.admit` в потоке: транзакции и advisory-блокировки async
+    ORM не поддерживает.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+    if not await user.ahas_perm('easybook.add_booking'):
+        return JsonResponse({"error": "Permission denied."}, status=403)
+    try:
+        row = json.loads(request.body)
+    except ValueError:
+        row = None
+    if not isinstance(row, dict):
+        return JsonResponse({"error": "Body must be a JSON object."}, status=400)
+    row = {**row, 'user': user.pk, 'is_confirmed': False}
+
+    context = await sync_to_async(bulk.load_context)([row])
+    values, errors = bulk.validate_row(row, {user.pk: user.pk}, context)
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
+    user_id, resource_id, staff_id, timerange, is_confirmed, quantity, info = values
+    resource = await sync_to_async(model_cache.resource_by_id)(resource_id)
+    booking = Booking(
+        user_id=user_id,
+        resource=resource,
+        staff_id=staff_id,
+        timerange=timerange,
+        is_confirmed=is_confirmed,
+        quantity=quantity,
+        additional_info=info,
+    )
+
+    def admit():
+        with context:
+            return admission.admit(booking)
+
+    try:
+        await sync_to_async(admit)()
+    except ValidationError as e:
+        return JsonResponse({"errors": e.messages}, status=400)
+    return JsonResponse({
+        "id": booking.pk,
+        "resource": resource_id,
+        "staff": staff_id,
+        "start": timerange.lower,
+        "end": timerange.upper,
+        "quantity": quantity,
+        "is_confirmed": is_confirmed,
+    }, status=201)
+
+def search(request):
+    """
+    Ресурсы компании (?company=<slug>) или поддерева категории
+    (?category=<id>), свободные на окне [start, end) для `quantity` мест.
+    """
+    try:
+        lower = parse_datetime(request.GET.get('start', ''))
+        upper = parse_datetime(request.GET.get('end', ''))
+        quantity = int(request.GET.get('quantity', 1))
+    except ValueError:
+        lower = upper = None
+    if lower is None or upper is None or lower >= upper or quantity < 1:
+        return JsonResponse(
+            {"error": "`start` < `end` (ISO 8601) and `quantity` >= 1 are required."},
+            status=400
+        )
+    if timezone.is_naive(lower):
+        lower = timezone.make_aware(lower)
+    if timezone.is_naive(upper):
+        upper = timezone.make_aware(upper)
+
+    resources = Resource.objects.filter(is_active=True)
+    if 'category' in request.GET:
+        try:
+            category_id = int(request.GET['category'])
+        except ValueError:
+            return JsonResponse({"error": "`category` must be an id."}, status=400)
+        resources = resources.filter(
+            category__in=Category.objects.subtree(category_id).values('pk')
+        ).distinct()
+    elif 'company' in request.GET:
+        resources = resources.filter(company__slug=request.GET['company'])
+    else:
+        return JsonResponse(
+            {"error": "Either `company` or `category` must be set."},
+            status=400
+        )
+
+    return JsonResponse({
+        "start": lower,
+        "end": upper,
+        "resources": [
+            {
+                "id": resource.pk,
+                "name": resource.name,
+                "capacity": capacity,
+                "free": free,
+            }
+            for resource, capacity, free in slot_source(
+                timezone.localdate(lower), timezone.localdate(upper)
+            ).search_available(resources, lower, upper, quantity)
+        ],
+    })
+
+def company_catalog(request, slug):
+    """
+    Каталог компании (категории, ресурсы, сотрудники) из кэша.
+    """
+    data = catalog.get_json(slug)
+    if data is None:
+        return JsonResponse({"error": "Not found."}, status=404)
+    return HttpResponse(data, content_type='application/json')
+
+def _ics_feed(request, model, kind, pk, name_field, filters):
+    """
+    ICS-фид с условным GET: сначала только счётчик изменений,
+    бронирования читаются, лишь если ETag/Last-Modified не совпали.
+    """
+    state = model.objects.filter(pk=pk).values_list(
+        name_field, 'schedule_version', 'schedule_changed_at'
+    ).first()
+    if state is None:
+        return JsonResponse({"error": "Not found."}, status=404)
+    name, version, changed_at = state
+    etag = feeds.etag(kind, pk, version)
+    last_modified = changed_at and int(changed_at.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(
+            feeds.render(feeds.bookings_for(**filters), name, changed_at or timezone.now()),
+            content_type='text/calendar; charset=utf-8',
+        )
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+def resource_ics(request, resourceID):
+    return _ics_feed(request, Resource, 'resource', resourceID, 'name', {'resource_id': resourceID})
+
+def staff_ics(request, staffID):
+    return _ics_feed(request, Staff, 'staff', staffID, 'display_name', {'staff_id': staffID})
+
+def export_bookings(request):
+    """
+    Потоковая выгрузка бронирований (?format=ndjson|csv) с фильтрами
+    company=<slug>, resource, staff и окном [start, end). Только для staff.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Staff access required."}, status=403)
+
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in export.FORMATS:
+        return JsonResponse({"error": "`format` must be `ndjson` or `csv`."}, status=400)
+    filters = {'company': request.GET.get('company')}
+    for name in ('resource', 'staff'):
+        value = request.GET.get(name)
+        if value is not None and not value.isdigit():
+            return JsonResponse({"error": f"`{name}` must be an id."}, status=400)
+        filters[name] = value and int(value)
+    for name in ('start', 'end'):
+        value = request.GET.get(name)
+        filters[name] = value and parse_datetime(value)
+        if value is not None and filters[name] is None:
+            return JsonResponse({"error": f"`{name}` must be ISO 8601."}, status=400)
+        if filters[name] is not None and timezone.is_naive(filters[name]):
+            filters[name] = timezone.make_aware(filters[name])
 
-@csrf_exempt
-def send_email_confirmation(request):
-    task = send_email_task.delay(
-        "Subject",
-        "Message",
-        "konishchevslava03@gmail.com"
+    response = StreamingHttpResponse(
+        export.render(export.bookings_rows(**filters), fmt),
+        content_type=export.CONTENT_TYPES[fmt],
     )
-    return JsonResponse({"task_id": task.id}, status=202)
+    response['Content-Disposition'] = f'attachment; filename="bookings.{fmt}"'
+    return response
 
 
-class UserViewSet(viewsets.ModelViewSet):
+def _metrics_allowed(request) -> bool:
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and hmac.compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in getattr(settings, 'METRICS_ALLOWED_NETWORKS', ())
+    )
+
+
+def prometheus_metrics(request):
+    """
+    Метрики для Prometheus: только адресам METRICS_ALLOWED_NETWORKS или
+    с `Authorization: Bearer <METRICS_TOKEN>`. Снаружи ещё и закрыто в nginx.
+    """
+    if not _metrics_allowed(request):
+        return HttpResponse(status=403)
+    data, content_type = metrics.render()
+    return HttpResponse(data, content_type=content_type)
+
+
+class CompactMixin:
+    """
+    `?compact=1` — плоский сериализатор с id вместо ссылок
+    (без reverse() на каждое поле каждой строки).
+    """
+    compact_serializer_class = None
+
+    def get_serializer_class(self):
+        if self.request is not None and self.request.query_params.get('compact') in ('1', 'true'):
+            return self.compact_serializer_class
+        return super().get_serializer_class()
+
+
+def filter_by_ids(queryset, params, fields):
+    """
+    Фильтры вида ?resource=1&user=2 по целочисленным полям.
+    """
+    for field in fields:
+        value = params.get(field)
+        if value is None:
+            continue
+        if not value.isdigit():
+            raise serializers.ValidationError({field: 'Must be an integer id.'})
+        queryset = queryset.filter(**{f'{field}_id': int(value)})
+    return queryset
+
+
+class UserViewSet(CompactMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    lookup_field = 'userID'
+    compact_serializer_class = CompactUserSerializer
+    pagination_class = KeysetPagination
+    # Без анонимного чтения: список пользователей — персональные данные
+    permission_classes = [permissions.DjangoModelPermissions]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            # Остальным — только своя запись
+            queryset = queryset.filter(pk=self.request.user.pk)
+        return queryset
+
 
-class ResourceViewSet(viewsets.ModelViewSet):
+class ResourceViewSet(CompactMixin, viewsets.ModelViewSet):
     queryset = Resource.objects.all()
     serializer_class = ResourceSerializer
-    lookup_field = 'resourseID' 
+    compact_serializer_class = CompactResourceSerializer
+    pagination_class = KeysetPagination
 
-class BookingViewSet(viewsets.ModelViewSet):
-    queryset = Booking.objects.all()
+    def get_queryset(self):
+        return filter_by_ids(super().get_queryset(), self.request.query_params, ('company',))
+
+
+class BookingViewSet(CompactMixin, viewsets.ModelViewSet):
+    # start = lower(timerange) — ключ пагинации (индекс booking_start_id_idx)
+    queryset = Booking.objects.annotate(start=F('timerange__startswith'))
     serializer_class = BookingSerializer
-    lookup_field = 'bookingID' 
+    compact_serializer_class = CompactBookingSerializer
+    pagination_class = BookingPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # Без начала бронь не попадает в порядок страниц
+            queryset = filter_by_ids(
+                queryset.filter(timerange__isnull=False),
+                self.request.query_params,
+                ('resource', 'user', 'staff'),
+            )
+        return queryset
+
+    def perform_create(self, serializer):
+        self._admit(Booking(**serializer.validated_data), serializer)
+
+    def perform_update(self, serializer):
+        booking = serializer.instance
+        for field, value in serializer.validated_data.items():
+            setattr(booking, field, value)
+        self._admit(booking, serializer)
+
+    @action(
+        detail=False, methods=['post'], url_path='import',
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def bulk_import(self, request):
+        """
+        Массовый импорт: тело — NDJSON (по умолчанию) или CSV (text/csv).
+        Только для staff: строки задают любого пользователя и идут мимо
+        `admission`.
+        """
+        stream = io.StringIO(request.body.decode('utf-8'))
+        if request.content_type == 'text/csv':
+            rows = bulk.parse_csv(stream)
+        else:
+            rows = bulk.parse_ndjson(stream)
+        report = bulk.import_bookings(rows)
+        return Response(
+            report,
+            status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK
+        )
+
+    def _admit(self, booking, serializer):
+        # Вместимость проверяется под блокировкой вместе с вставкой
+        try:
+            serializer.instance = admission.admit(booking)
+        except ValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+
+class ArchivedBookingViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    История из архива (`easybook.archive`): своя — пользователю,
+    любая — персоналу (фильтры ?user=, ?resource=, ?staff=).
+    """
+    queryset = ArchivedBooking.objects.all()
+    serializer_class = ArchivedBookingSerializer
+    pagination_class = BookingPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return filter_by_ids(queryset, self.request.query_params, ('resource', 'user', 'staff'))
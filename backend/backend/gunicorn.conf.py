@@ -0,0 +1,120 @@
+"""
+Конфигурация gunicorn (подхватывается из рабочего каталога автоматически).
+
+Все параметры задаются переменными окружения GUNICORN_*:
+
+    GUNICORN_APP            booking_system.wsgi:application
+                            (ASGI: booking_system.asgi:application)
+    GUNICORN_WORKER_CLASS   sync | gthread | uvicorn_worker.UvicornWorker
+    GUNICORN_WORKERS        по умолчанию 2 * CPU + 1
+    GUNICORN_THREADS        > 1 переключает sync на gthread
+    GUNICORN_KEEPALIVE      только для gthread и асинхронных воркеров:
+                            sync закрывает соединение после каждого ответа
+    GUNICORN_RELOAD         1 — только для разработки, отключает preload
+
+С PROMETHEUS_MULTIPROC_DIR метрики воркеров пишутся в файлы этого
+каталога, и `/metrics` любого воркера отдаёт сумму по всем.
+"""
+import multiprocessing
+import os
+import shutil
+
+
+def env(key, default):
+    return os.environ.get(key, default)
+
+
+wsgi_app = env('GUNICORN_APP', 'booking_system.wsgi:application')
+bind = env('GUNICORN_BIND', '0.0.0.0:8000')
+
+workers = int(env('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(env('GUNICORN_THREADS', '1'))
+worker_class = env('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+
+# Код и импорты грузятся в мастере один раз и делятся с воркерами
+# через copy-on-write; несовместимо с reload
+reload = env('GUNICORN_RELOAD', '0') == '1'
+preload_app = not reload
+
+# Перезапуск воркеров против утечек памяти; jitter — чтобы не все разом
+max_requests = int(env('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(env('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+timeout = int(env('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(env('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+# Больше, чем keepalive_timeout апстрима в nginx (60s): закрывать
+# соединение первым должен nginx, иначе он ловит обрыв посреди запроса.
+# Действует только для gthread и асинхронных воркеров (uvicorn): sync-воркер
+# keep-alive не поддерживает и отвечает с Connection: close, так что
+# соединения nginx -> gunicorn переиспользуются лишь при GUNICORN_THREADS > 1
+# или ASGI-профиле
+keepalive = int(env('GUNICORN_KEEPALIVE', '75'))
+
+accesslog = env('GUNICORN_ACCESSLOG', '-')
+loglevel = env('GUNICORN_LOGLEVEL', 'info')
+
+# Сколько компаний прогревать в кэше при старте воркера
+WARMUP_COMPANIES = int(env('GUNICORN_WARMUP_COMPANIES', '50'))
+
+
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def on_starting(server):
+    """
+    Мастер: чистит каталог метрик от прошлого запуска.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def when_ready(server):
+    """
+    Мастер: импортирует URLconf, а с ним представления, DRF и NumPy, —
+    до fork, чтобы воркеры получили их готовыми.
+    """
+    if not preload_app:
+        return
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+    server.log.info('Preloaded URLconf and views')
+
+
+def post_worker_init(worker):
+    """
+    Воркер: прогревает кэш моделей и каталогов активных компаний.
+    Соединения открываются уже после fork, общие с мастером не делятся.
+    """
+    if not WARMUP_COMPANIES:
+        return
+    from django.db import connections
+
+    from easybook import catalog, model_cache
+    from easybook.models import Company
+
+    try:
+        slugs = list(
+            Company.objects.filter(is_active=True).order_by('pk').values_list(
+                'slug', flat=True
+            )[:WARMUP_COMPANIES]
+        )
+        for slug in slugs:
+            model_cache.company_by_slug(slug)
+            catalog.get_json(slug)
+        worker.log.info('Warmed caches for %d companies', len(slugs))
+    except Exception:  # прогрев не должен мешать старту
+        worker.log.exception('Cache warmup failed')
+    finally:
+        connections.close_all()
+
+
+def child_exit(server, worker):
+    """
+    Мастер: убирает live-gauge файлы умершего воркера.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -2,8 +2,36 @@ import pytest
 #from django.urls import reverse
 #from datetime import datetime, date, time
 from easybook.models import Booking, User, Resource, Company, Staff, ResourceStaff
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.db import connections
 
 
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    """
+    Вторая локальная база — «реплика» для тестов ReplicaRouter
+    (без репликации: тесты сами пишут в неё через `.using('replica')`).
+    Роутер включается только в тестах с фикстурой `replica`.
+    """
+    if 'replica' in settings.DATABASES:
+        return
+    default = settings.DATABASES['default']
+    replica = {
+        **default,
+        'NAME': f"{default['NAME']}_replica",
+        'TEST': {'NAME': f"test_{default['NAME']}_replica"},
+    }
+    settings.DATABASES['replica'] = replica
+    connections.settings = connections.configure_settings(settings.DATABASES)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    django_cache.clear()
+    yield
+    django_cache.clear()
+
 @pytest.fixture
 def user(db):
     return User.objects.create(
@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.utils.timezone import make_aware
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from easybook.models import Booking, CapacityWindow, User
+from easybook.admission import admit_booking
+
+
+def rng(start, hours=1):
+    return DateTimeTZRange(start, start + timedelta(hours=hours))
+
+
+@pytest.fixture
+def start():
+    return make_aware(datetime(2025, 1, 1, 10, 0))
+
+
+@pytest.fixture
+def users(db):
+    return [
+        User.objects.create(email=f'client{i}@example.com', password='123')
+        for i in range(40)
+    ]
+
+
+@pytest.mark.django_db
+def test_admission_enforces_capacity(users, resource, start):
+    CapacityWindow.objects.create(
+        resource=resource, timerange=rng(start, 2), capacity=3
+    )
+    admit_booking(user=users[0], resource=resource, timerange=rng(start), quantity=2)
+    admit_booking(user=users[1], resource=resource, timerange=rng(start), quantity=1)
+
+    with pytest.raises(ValidationError, match='Not enough capacity'):
+        admit_booking(user=users[2], resource=resource, timerange=rng(start))
+    # Вне окна действует max_capacity
+    admit_booking(
+        user=users[2], resource=resource,
+        timerange=rng(start + timedelta(hours=2)), quantity=10
+    )
+    assert Booking.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_partly_covering_window_does_not_lift_max_capacity(users, resource, start):
+    # max_capacity 10, окно 11:00-14:00 на 30 мест; бронь 10:00-12:00
+    CapacityWindow.objects.create(
+        resource=resource, timerange=rng(start + timedelta(hours=1), 3), capacity=30
+    )
+
+    with pytest.raises(ValidationError, match='Not enough capacity'):
+        admit_booking(user=users[0], resource=resource, timerange=rng(start, 2), quantity=25)
+    admit_booking(user=users[0], resource=resource, timerange=rng(start, 2), quantity=10)
+    # Внутри окна действует его вместимость
+    admit_booking(
+        user=users[1], resource=resource,
+        timerange=rng(start + timedelta(hours=2)), quantity=20
+    )
+
+
+@pytest.mark.django_db
+def test_admission_reports_overlap_as_validation_error(user, resource, start):
+    admit_booking(user=user, resource=resource, timerange=rng(start))
+
+    with pytest.raises(ValidationError, match='overlaps an existing booking'):
+        admit_booking(user=user, resource=resource, timerange=rng(start, 2))
+
+
+@pytest.mark.django_db
+def test_admission_enforces_max_duration(settings, user, resource, start):
+    settings.BOOKING_MAX_DURATION_DAYS = 1
+
+    with pytest.raises(ValidationError, match='maximum duration'):
+        admit_booking(user=user, resource=resource, timerange=rng(start, 25))
+    admit_booking(user=user, resource=resource, timerange=rng(start, 24))
+
+
+def run_concurrently(users, resource, starts):
+    def book(args):
+        user, begin = args
+        try:
+            admit_booking(user=user, resource=resource, timerange=rng(begin))
+            return True
+        except ValidationError:
+            return False
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        return list(pool.map(book, zip(users, starts)))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_clients_never_overbook_popular_slot(users, resource, start):
+    results = run_concurrently(users, resource, [start] * len(users))
+
+    assert sum(results) == resource.max_capacity
+    assert sum(
+        Booking.objects.filter(resource=resource).values_list('quantity', flat=True)
+    ) == resource.max_capacity
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import make_aware
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from rest_framework.test import APIClient
+from easybook.models import Booking, User
+from easybook.serializers import CompactUserSerializer
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def bookings(db, resource):
+    start = make_aware(datetime(2025, 1, 1, 10, 0))
+    users = User.objects.bulk_create(
+        User(email=f'client{i}@example.com', password='123') for i in range(7)
+    )
+    # По два бронирования на одно время — проверяем разрешение ничьих по id
+    return Booking.objects.bulk_create(
+        Booking(
+            user=user,
+            resource=resource,
+            timerange=DateTimeTZRange(
+                start + timedelta(hours=i // 2), start + timedelta(hours=i // 2 + 1)
+            ),
+        )
+        for i, user in enumerate(users)
+    )
+
+
+def fetch_all(client, url):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append(response.json()['results'])
+        url = response.json()['next']
+    return pages
+
+
+@pytest.mark.django_db
+def test_bookings_keyset_pages_cover_all_rows_in_order(api_client, bookings):
+    pages = fetch_all(api_client, '/bookings/?page_size=3')
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    ids = [row['id'] for page in pages for row in page]
+    expected = sorted(bookings, key=lambda b: (b.timerange.lower, b.pk))
+    assert ids == [booking.pk for booking in expected]
+
+
+@pytest.mark.django_db
+def test_bookings_page_query_count_does_not_grow(api_client, bookings):
+    with CaptureQueriesContext(connection) as first:
+        response = api_client.get('/bookings/?page_size=2')
+    with CaptureQueriesContext(connection) as later:
+        api_client.get(response.json()['next'])
+
+    assert len(first) == len(later) == 1
+    assert 'OFFSET' not in later[0]['sql']
+
+
+@pytest.mark.django_db
+def test_bookings_compact_and_filters(api_client, bookings, resource, other_resource):
+    response = api_client.get(f'/bookings/?compact=1&resource={resource.pk}')
+    row = response.json()['results'][0]
+
+    assert 'url' not in row
+    assert row['resource'] == resource.pk
+    assert row['start'] is not None
+    assert len(response.json()['results']) == len(bookings)
+    assert api_client.get(f'/bookings/?resource={other_resource.pk}').json()['results'] == []
+    assert api_client.get('/bookings/?resource=x').status_code == 400
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_is_404(api_client, bookings):
+    assert api_client.get('/bookings/?cursor=bm9wZQ==').status_code == 404
+
+
+@pytest.mark.django_db
+def test_create_booking_via_api(api_client, resource):
+    admin = User.objects.create_superuser(email='admin@example.com', password='123')
+    api_client.force_authenticate(admin)
+
+    response = api_client.post('/bookings/?compact=1', {
+        'user': admin.pk,
+        'resource': resource.pk,
+        'start': '2025-01-01T10:00:00Z',
+        'end': '2025-01-01T11:00:00Z',
+    }, format='json')
+    assert response.status_code == 201, response.json()
+    booking = Booking.objects.get(pk=response.json()['id'])
+    assert booking.timerange.upper - booking.timerange.lower == timedelta(hours=1)
+
+    response = api_client.post('/bookings/?compact=1', {
+        'user': admin.pk,
+        'resource': resource.pk,
+        'start': '2025-01-01T11:00:00Z',
+        'end': '2025-01-01T10:00:00Z',
+    }, format='json')
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_users_are_private(api_client, user, bookings):
+    assert api_client.get('/users/').status_code in (401, 403)
+
+    api_client.force_authenticate(user)
+    [row] = api_client.get('/users/?compact=1').json()['results']
+    assert (row['id'], row['email']) == (user.pk, user.email)
+    assert api_client.get(f'/users/{bookings[0].user_id}/').status_code == 404
+
+    staff = User.objects.create_user(email='staff@example.com', password='123', is_staff=True)
+    api_client.force_authenticate(staff)
+    rows = fetch_all(api_client, '/users/?compact=1')
+    assert sum(len(page) for page in rows) == User.objects.count()
+
+
+def test_user_contacts_are_hidden_from_other_users(rf, user):
+    request = rf.get('/')
+    request.user = User(pk=user.pk + 1)
+    data = CompactUserSerializer(user, context={'request': request}).data
+
+    assert 'email' not in data and 'phone_number' not in data
+    assert data['first_name'] == user.first_name
@@ -0,0 +1,98 @@
+from datetime import timedelta
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from django.utils import timezone
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from rest_framework.test import APIClient
+from easybook import archive, partitioning
+from easybook.models import ArchivedBooking, Booking, User
+
+
+def days_ago(days, hours=1):
+    start = timezone.now() - timedelta(days=days)
+    return DateTimeTZRange(start, start + timedelta(hours=hours))
+
+
+@pytest.fixture
+def other_user(db):
+    return User.objects.create_user(email='other@example.com', password='123')
+
+
+@pytest.fixture
+def bookings(user, other_user, resource):
+    return [
+        Booking.objects.create(user=user, resource=resource, timerange=days_ago(400)),
+        Booking.objects.create(user=user, resource=resource, timerange=days_ago(200)),
+        Booking.objects.create(user=other_user, resource=resource, timerange=days_ago(300)),
+        Booking.objects.create(user=user, resource=resource, timerange=days_ago(10)),
+        # Закончится только через день
+        Booking.objects.create(user=other_user, resource=resource, timerange=days_ago(100, 24 * 101)),
+    ]
+
+
+@pytest.mark.django_db
+def test_archive_moves_only_finished_bookings(
+    bookings, resource, django_capture_on_commit_callbacks
+):
+    version = resource.schedule_version
+
+    with django_capture_on_commit_callbacks(execute=True):
+        moved = archive.archive_bookings(archive.horizon(days=30), batch_size=2)
+
+    assert moved == 3
+    assert set(Booking.objects.values_list('pk', flat=True)) == {b.pk for b in bookings[3:]}
+    archived = ArchivedBooking.objects.get(pk=bookings[0].pk)
+    assert (archived.user_id, archived.resource_id, archived.quantity) == \
+        (bookings[0].user_id, resource.pk, 1)
+    assert (archived.start, archived.end) == \
+        (bookings[0].timerange.lower, bookings[0].timerange.upper)
+    resource.refresh_from_db()
+    # Пачки по 2: ETag лент сменился при каждой
+    assert resource.schedule_version == version + 2
+
+
+@pytest.mark.django_db
+def test_detached_partitions_are_archived_and_dropped(bookings):
+    partitioning.convert(months_ahead=0)
+    detached = partitioning.detach_partitions(
+        partitioning.add_months(partitioning.current_month(), -9)
+    )
+    assert detached
+
+    result = archive.run(days=365)
+
+    assert set(result['partitions']) == set(detached)
+    assert sum(result['partitions'].values()) == 2
+    assert result['bookings'] == 0
+    assert partitioning.detached_partitions() == []
+    assert ArchivedBooking.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_command_respects_settings(settings, bookings):
+    with pytest.raises(CommandError):
+        call_command('archive_bookings')
+
+    settings.BOOKING_ARCHIVE_AFTER_DAYS = 250
+    call_command('archive_bookings')
+    assert ArchivedBooking.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_history_api_is_scoped_to_the_user(bookings, user, other_user):
+    archive.archive_bookings(archive.horizon(days=30))
+    client = APIClient()
+    url = reverse('archived-booking-list')
+
+    assert client.get(url).status_code in (401, 403)
+
+    client.force_authenticate(user)
+    results = client.get(url).json()['results']
+    assert [row['id'] for row in results] == [bookings[0].pk, bookings[1].pk]
+
+    user.is_staff = True
+    user.save()
+    results = client.get(url, {'user': other_user.pk}).json()['results']
+    assert [row['id'] for row in results] == [bookings[2].pk]
@@ -0,0 +1,63 @@
+from datetime import time
+import pytest
+from django.urls import reverse
+from easybook.models import AvailabilityRule, Booking, ResourceStaff, User
+
+
+@pytest.mark.django_db
+def test_async_calendar_matches_sync(client, resource):
+    AvailabilityRule.objects.create(
+        resource=resource, weekday=0, start_time=time(10, 0), end_time=time(12, 0),
+        slot_size=60,
+    )
+    params = {'start': '2025-07-14', 'end': '2025-07-20'}
+    sync = client.get(reverse('calendar', args=[resource.pk]), params)
+    response = client.get(reverse('calendar_async', args=[resource.pk]), params)
+
+    assert response.status_code == 200
+    assert response.json() == sync.json()
+    assert len(response.json()['slots']) == 2
+    assert client.get(reverse('calendar_async', args=[0])).status_code == 404
+
+
+@pytest.fixture
+def admin_client(client, db):
+    admin = User.objects.create_superuser(email='admin@example.com', password='123')
+    client.force_login(admin)
+    return client
+
+
+@pytest.mark.django_db
+def test_async_create_booking(admin_client, resource, staff):
+    ResourceStaff.objects.create(resource=resource, staff=staff)
+    url = reverse('create_booking_async')
+    body = {
+        'resource': resource.pk,
+        'staff': staff.pk,
+        'start': '2025-07-14T10:00:00Z',
+        'end': '2025-07-14T11:00:00Z',
+        'quantity': 2,
+    }
+    response = admin_client.post(url, body, content_type='application/json')
+
+    assert response.status_code == 201, response.json()
+    booking = Booking.objects.get(pk=response.json()['id'])
+    assert (booking.staff_id, booking.quantity) == (staff.pk, 2)
+
+    # Тот же сотрудник на то же время — отказ exclusion-ограничения
+    response = admin_client.post(url, body, content_type='application/json')
+    assert response.status_code == 400
+    assert 'overlaps' in response.json()['errors'][0]
+
+
+@pytest.mark.django_db
+def test_async_create_booking_validation(client, admin_client, resource):
+    url = reverse('create_booking_async')
+    response = admin_client.post(url, {
+        'resource': resource.pk, 'start': 'nope', 'end': '2025-07-14T11:00:00Z',
+    }, content_type='application/json')
+    assert response.status_code == 400
+    assert response.json()['errors'] == ['`start` and `end` must be ISO 8601 datetimes.']
+
+    client.logout()
+    assert client.post(url, {}, content_type='application/json').status_code == 401
@@ -0,0 +1,208 @@
+from datetime import datetime, time, date
+import pytest
+from django.urls import reverse
+from django.utils.timezone import make_aware
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from easybook.models import (
+    AvailabilityRule, Booking, CapacityWindow, Category, Resource
+)
+from easybook.availability import free_slots, resource_slots, search_available
+
+
+def rng(day, start_hour, end_hour):
+    return DateTimeTZRange(
+        make_aware(datetime.combine(day, time(start_hour))),
+        make_aware(datetime.combine(day, time(end_hour)))
+    )
+
+
+@pytest.mark.django_db
+def test_weekly_rule_expands_into_slots(resource):
+    # 2025-07-14 — понедельник
+    AvailabilityRule.objects.create(
+        resource=resource,
+        weekday=0,
+        start_time=time(10, 0),
+        end_time=time(13, 0),
+        slot_size=60
+    )
+    slots = free_slots(resource, date(2025, 7, 14), date(2025, 7, 27))
+
+    assert len(slots) == 6
+    assert slots[0]['start'] == make_aware(datetime(2025, 7, 14, 10, 0))
+    assert slots[0]['end'] == make_aware(datetime(2025, 7, 14, 11, 0))
+    assert slots[-1]['start'] == make_aware(datetime(2025, 7, 21, 12, 0))
+    assert all(slot['free'] == resource.max_capacity for slot in slots)
+
+
+@pytest.mark.django_db
+def test_specific_date_rule_overrides_weekly(resource):
+    AvailabilityRule.objects.create(
+        resource=resource,
+        weekday=5,
+        start_time=time(10, 0),
+        end_time=time(18, 0),
+        slot_size=60
+    )
+    AvailabilityRule.objects.create(
+        resource=resource,
+        specific_date=date(2025, 7, 19),
+        start_time=time(9, 0),
+        end_time=time(11, 0)
+    )
+    slots = free_slots(resource, date(2025, 7, 19), date(2025, 7, 19))
+
+    assert len(slots) == 1
+    assert slots[0]['start'] == make_aware(datetime(2025, 7, 19, 9, 0))
+    assert slots[0]['end'] == make_aware(datetime(2025, 7, 19, 11, 0))
+
+
+@pytest.mark.django_db
+def test_bookings_and_capacity_windows_reduce_free_capacity(user, resource):
+    day = date(2025, 7, 14)
+    AvailabilityRule.objects.create(
+        resource=resource,
+        weekday=0,
+        start_time=time(10, 0),
+        end_time=time(14, 0),
+        slot_size=60
+    )
+    CapacityWindow.objects.create(
+        resource=resource,
+        timerange=rng(day, 12, 14),
+        capacity=3
+    )
+    Booking.objects.create(
+        user=user, resource=resource, timerange=rng(day, 10, 12), quantity=4
+    )
+    Booking.objects.create(
+        user=user, resource=resource, timerange=rng(day, 13, 14), quantity=3
+    )
+    slots = resource_slots(resource, day, day)
+
+    assert list(slots.capacity) == [10, 10, 3, 3]
+    assert list(slots.booked) == [4, 4, 0, 3]
+    assert list(slots.free) == [6, 6, 3, 0]
+    assert len(free_slots(resource, day, day)) == 3
+
+
+@pytest.mark.django_db
+def test_partly_covering_window_falls_back_to_max_capacity(user, resource, other_resource):
+    day = date(2025, 7, 14)
+    AvailabilityRule.objects.create(
+        resource=resource, weekday=0, start_time=time(10, 0), end_time=time(14, 0),
+        slot_size=120,
+    )
+    AvailabilityRule.objects.create(
+        resource=other_resource, weekday=0, start_time=time(10, 0), end_time=time(14, 0),
+    )
+    # Окна покрывают только вторую половину первого слота / окна поиска
+    CapacityWindow.objects.create(resource=resource, timerange=rng(day, 11, 14), capacity=30)
+    CapacityWindow.objects.create(
+        resource=other_resource, timerange=rng(day, 11, 14), capacity=50
+    )
+
+    assert list(resource_slots(resource, day, day).capacity) == [10, 30]
+    found = search_available(
+        Resource.objects.filter(pk__in=[resource.pk, other_resource.pk]),
+        rng(day, 10, 12).lower, rng(day, 10, 12).upper,
+    )
+    assert sorted((r.pk, capacity) for r, capacity, _ in found) == [
+        (resource.pk, 10), (other_resource.pk, 20)
+    ]
+
+
+@pytest.mark.django_db
+def test_slots_use_fixed_number_of_queries(resource, django_assert_num_queries):
+    AvailabilityRule.objects.create(
+        resource=resource,
+        weekday=2,
+        start_time=time(8, 0),
+        end_time=time(20, 0),
+        slot_size=30
+    )
+    with django_assert_num_queries(3):
+        slots = resource_slots(resource, date(2025, 1, 1), date(2025, 3, 31))
+
+    assert len(slots) == 13 * 24
+
+
+@pytest.mark.django_db
+def test_calendar_view(client, resource):
+    AvailabilityRule.objects.create(
+        resource=resource,
+        weekday=0,
+        start_time=time(10, 0),
+        end_time=time(12, 0),
+        slot_size=60
+    )
+    url = reverse('calendar', args=[resource.pk])
+
+    response = client.get(url, {'start': '2025-07-14', 'end': '2025-07-20'})
+    assert response.status_code == 200
+    assert len(response.json()['slots']) == 2
+
+    response = client.get(url, {'start': '2025-07-20', 'end': '2025-07-14'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_search_available_across_resources(
+    user, company, resource, other_resource, django_assert_num_queries
+):
+    day = date(2025, 7, 14)
+    for res in (resource, other_resource):
+        AvailabilityRule.objects.create(
+            resource=res,
+            weekday=0,
+            start_time=time(9, 0),
+            end_time=time(18, 0),
+            slot_size=60
+        )
+    closed = Resource.objects.create(company=company, name='Closed', max_capacity=5)
+    AvailabilityRule.objects.create(
+        resource=closed,
+        weekday=0,
+        start_time=time(14, 0),
+        end_time=time(18, 0)
+    )
+    Booking.objects.create(
+        user=user, resource=resource, timerange=rng(day, 10, 11), quantity=8
+    )
+    CapacityWindow.objects.create(
+        resource=other_resource, timerange=rng(day, 0, 23), capacity=4
+    )
+    lower, upper = rng(day, 10, 12).lower, rng(day, 10, 12).upper
+
+    with django_assert_num_queries(4):
+        found = search_available(
+            Resource.objects.filter(company=company), lower, upper, quantity=3
+        )
+    assert [(r.pk, capacity, free) for r, capacity, free in found] == [
+        (other_resource.pk, 4, 4)
+    ]
+
+
+@pytest.mark.django_db
+def test_search_view_by_category_subtree(client, company, resource, other_resource):
+    root = Category.objects.create(company=company, name='Root', slug='root')
+    child = Category.objects.create(
+        company=company, parent=root, name='Child', slug='child'
+    )
+    resource.category.add(child)
+    for res in (resource, other_resource):
+        AvailabilityRule.objects.create(
+            resource=res,
+            weekday=0,
+            start_time=time(9, 0),
+            end_time=time(18, 0)
+        )
+    response = client.get(reverse('search'), {
+        'category': root.pk,
+        'start': '2025-07-14T10:00:00',
+        'end': '2025-07-14T12:00:00',
+    })
+
+    assert response.status_code == 200
+    assert [r['id'] for r in response.json()['resources']] == [resource.pk]
+    assert client.get(reverse('search'), {'category': root.pk}).status_code == 400
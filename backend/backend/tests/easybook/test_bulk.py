@@ -0,0 +1,175 @@
+import io
+import json
+from datetime import datetime
+import pytest
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils.timezone import make_aware
+from easybook.models import Booking, CapacityWindow, ResourceStaff, User
+from easybook import bulk
+
+
+def ndjson(*rows):
+    return io.StringIO('\n'.join(json.dumps(row) for row in rows))
+
+
+@pytest.mark.django_db
+def test_import_reports_rows_instead_of_aborting(user, resource, staff, other_company_staff):
+    ResourceStaff.objects.create(resource=resource, staff=staff)
+    rows = bulk.parse_ndjson(ndjson(
+        {'user': user.pk, 'resource': resource.pk, 'staff': staff.pk,
+         'start': '2025-01-01T10:00:00', 'end': '2025-01-01T11:00:00'},
+        # та же сотрудница в пересекающееся время — exclusion-ограничение
+        {'user': user.email, 'resource': resource.pk, 'staff': staff.pk,
+         'start': '2025-01-01T10:30:00', 'end': '2025-01-01T11:30:00'},
+        {'user': user.email, 'resource': resource.pk,
+         'start': '2025-01-02T10:00:00', 'end': '2025-01-02T11:00:00', 'quantity': 2},
+        {'user': user.pk, 'resource': resource.pk, 'staff': other_company_staff.pk,
+         'start': '2025-01-03T10:00:00', 'end': '2025-01-03T11:00:00'},
+        {'user': 'nobody@example.com', 'resource': resource.pk,
+         'start': '2025-01-04T11:00:00', 'end': '2025-01-04T10:00:00'},
+    ))
+    report = bulk.import_bookings(rows, batch_size=3)
+
+    assert report['created'] == 2
+    assert [error['line'] for error in report['errors']] == [2, 4, 5]
+    assert report['errors'][0]['errors'] == ['Booking overlaps an existing booking.']
+    assert 'same company' in report['errors'][1]['errors'][0]
+    assert report['errors'][2]['errors'] == [
+        'Unknown user.', '`timerange.start` must be less than `timerange.end`.'
+    ]
+    assert sorted(Booking.objects.values_list('quantity', flat=True)) == [1, 2]
+
+
+@pytest.mark.django_db
+def test_import_batch_costs_constant_queries(user, resource, django_assert_max_num_queries):
+    rows = list(bulk.parse_csv(io.StringIO(
+        'user,resource,start,end,is_confirmed\n' + ''.join(
+            f'{user.pk},{resource.pk},2025-01-{day:02d}T10:00:00,'
+            f'2025-01-{day:02d}T11:00:00,true\n'
+            for day in range(1, 29)
+        )
+    )))
+    with django_assert_max_num_queries(12):
+        report = bulk.import_bookings(rows)
+
+    assert report == {'created': 28, 'errors': []}
+    assert Booking.objects.filter(is_confirmed=True).count() == 28
+
+
+@pytest.mark.django_db
+def test_import_bookings_command(tmp_path, user, resource, capsys):
+    path = tmp_path / 'bookings.ndjson'
+    path.write_text(
+        json.dumps({'user': user.pk, 'resource': resource.pk,
+                    'start': '2025-01-01T10:00:00', 'end': '2025-01-01T11:00:00'})
+        + '\nnot json\n'
+    )
+    call_command('import_bookings', str(path))
+
+    out, err = capsys.readouterr()
+    assert 'Created 1 bookings, 1 rows rejected.' in out
+    assert '"line": 2' in err
+
+
+@pytest.mark.django_db
+def test_import_endpoint_requires_permission(client, user, resource):
+    body = json.dumps({'user': user.pk, 'resource': resource.pk,
+                       'start': '2025-01-01T10:00:00', 'end': '2025-01-01T11:00:00'})
+    url = '/bookings/import/'
+
+    response = client.post(url, body, content_type='application/x-ndjson')
+    assert response.status_code in (401, 403)
+
+    # Права add_booking недостаточно
+    user.user_permissions.add(Permission.objects.get(codename='add_booking'))
+    client.force_login(user)
+    response = client.post(url, body, content_type='application/x-ndjson')
+    assert response.status_code == 403
+
+    user.is_staff = True
+    user.save()
+    response = client.post(url, body, content_type='application/x-ndjson')
+    assert response.status_code == 201
+    assert response.json() == {'created': 1, 'errors': []}
+
+
+@pytest.mark.django_db
+def test_import_enforces_max_duration(settings, user, resource):
+    settings.BOOKING_MAX_DURATION_DAYS = 1
+    report = bulk.import_bookings(bulk.parse_ndjson(ndjson(
+        {'user': user.pk, 'resource': resource.pk,
+         'start': '2025-01-01T10:00:00', 'end': '2025-01-03T10:00:00'},
+    )))
+
+    assert report == {'created': 0, 'errors': [
+        {'line': 1, 'errors': ['Booking is longer than the allowed maximum duration.']}
+    ]}
+
+
+@pytest.mark.django_db
+def test_rejected_rows_do_not_reject_later_rows(user, resource):
+    Booking.objects.create(
+        user=user, resource=resource,
+        timerange=DateTimeTZRange(
+            make_aware(datetime(2025, 1, 1, 9, 0)), make_aware(datetime(2025, 1, 1, 10, 30))
+        ),
+    )
+
+    def row(day, start, end):
+        return {'user': user.pk, 'resource': resource.pk,
+                'start': f'2025-01-0{day}T{start}', 'end': f'2025-01-0{day}T{end}'}
+
+    report = bulk.import_bookings(bulk.parse_ndjson(ndjson(
+        row(1, '10:00', '11:00'),  # A: пересекает сохранённую бронь
+        row(1, '10:45', '11:30'),  # B: пересекает только A
+        row(1, '12:00', '13:00'),  # C: ни с чем
+        row(2, '10:00', '11:00'),  # цепочка внутри пачки: D
+        row(2, '10:30', '11:30'),  # E пересекает D
+        row(2, '11:15', '12:00'),  # F пересекает только отклонённую E
+    )))
+
+    assert report['created'] == 4
+    assert [error['line'] for error in report['errors']] == [1, 5]
+
+
+@pytest.mark.django_db
+def test_import_checks_capacity(user, resource):
+    # max_capacity = 10; на 2 января окно сужает вместимость до 3
+    owner = User.objects.create(email='owner@g.com', password='123')
+    other = User.objects.create(email='other@g.com', password='123')
+    Booking.objects.create(
+        user=owner, resource=resource, quantity=6,
+        timerange=DateTimeTZRange(
+            make_aware(datetime(2025, 1, 1, 10, 0)), make_aware(datetime(2025, 1, 1, 11, 0))
+        ),
+    )
+    CapacityWindow.objects.create(
+        resource=resource, capacity=3,
+        timerange=DateTimeTZRange(
+            make_aware(datetime(2025, 1, 2)), make_aware(datetime(2025, 1, 3))
+        ),
+    )
+
+    def row(day, start, end, quantity, user=user):
+        return {'user': user.pk, 'resource': resource.pk, 'quantity': quantity,
+                'start': f'2025-01-0{day}T{start}', 'end': f'2025-01-0{day}T{end}'}
+
+    report = bulk.import_bookings(bulk.parse_ndjson(ndjson(
+        row(1, '10:30', '11:30', 3),  # 6 + 3 ≤ 10
+        row(1, '10:45', '12:00', 2, other),  # 6 + 3 + 2 > 10
+        row(1, '11:30', '12:00', 7, other),  # пересекает только первую строку
+        row(2, '10:00', '11:00', 4),  # окно: 4 > 3
+        row(2, '10:00', '11:00', 3),
+    )))
+
+    assert report['created'] == 3
+    assert report['errors'] == [
+        {'line': 2, 'errors': [
+            'Not enough capacity: requested 2, already used 9, limit 10'
+        ]},
+        {'line': 4, 'errors': [
+            'Not enough capacity: requested 4, already used 0, limit 3'
+        ]},
+    ]
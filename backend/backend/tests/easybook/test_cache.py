@@ -0,0 +1,73 @@
+from datetime import time, date, timedelta
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from easybook import availability
+from easybook.models import AvailabilityRule
+
+
+@pytest.fixture
+def rules(resource):
+    return [
+        AvailabilityRule.objects.create(
+            resource=resource,
+            weekday=5,
+            start_time=time(10, 0),
+            end_time=time(18, 0),
+            slot_size=60
+        ),
+        AvailabilityRule.objects.create(
+            resource=resource,
+            specific_date=date(2025, 7, 19),
+            start_time=time(9, 0),
+            end_time=time(12, 0)
+        ),
+    ]
+
+
+@pytest.mark.django_db
+def test_effective_for_day_is_a_single_query(resource, rules, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        specific = list(
+            AvailabilityRule.objects.effective_for_day(resource, date(2025, 7, 19))
+        )
+    with django_assert_num_queries(1):
+        weekly = list(
+            AvailabilityRule.objects.effective_for_day(resource, date(2025, 7, 26))
+        )
+
+    assert [rule.pk for rule in specific] == [rules[1].pk]
+    assert [rule.pk for rule in weekly] == [rules[0].pk]
+
+
+def rule_queries(queries):
+    return [q for q in queries if 'easybook_availabilityrule' in q['sql']]
+
+
+@pytest.mark.django_db
+def test_slot_generation_reads_rules_through_model_cache(
+    resource, django_capture_on_commit_callbacks
+):
+    """
+    Правила для слотов берутся из `model_cache.availability_rule_rows`,
+    а не запросом `effective_for_day` на каждый день.
+    """
+    today = timezone.localdate()
+    week = (today, today + timedelta(days=6))
+    rule = AvailabilityRule.objects.create(
+        resource=resource, weekday=today.weekday(),
+        start_time=time(10, 0), end_time=time(12, 0), slot_size=60,
+    )
+    assert len(availability.resource_slots(resource, *week).start) == 2
+
+    with CaptureQueriesContext(connection) as queries:
+        assert len(availability.resource_slots(resource, *week).start) == 2
+    assert rule_queries(queries) == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        rule.end_time = time(13, 0)
+        rule.save()
+    with CaptureQueriesContext(connection) as queries:
+        assert len(availability.resource_slots(resource, *week).start) == 3
+    assert len(rule_queries(queries)) == 1
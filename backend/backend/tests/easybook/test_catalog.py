@@ -0,0 +1,58 @@
+import pytest
+from easybook.models import Category, ResourceCategory, ResourceStaff
+
+
+@pytest.fixture
+def catalog_data(company, resource, other_resource, staff):
+    root = Category.objects.create(company=company, name='Root', slug='root')
+    ResourceCategory.objects.create(resource=resource, category=root)
+    ResourceStaff.objects.create(resource=resource, staff=staff)
+    return root
+
+
+@pytest.mark.django_db
+def test_catalog_contents(client, company, resource, staff, catalog_data):
+    response = client.get(f'/companies/{company.slug}/catalog/')
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data['company']['slug'] == company.slug
+    assert data['categories'][0]['resources'] == [resource.pk]
+    by_id = {item['id']: item for item in data['resources']}
+    assert by_id[resource.pk]['staff'] == [staff.pk]
+    assert data['staff'] == [{'id': staff.pk, 'display_name': staff.display_name}]
+
+
+@pytest.mark.django_db
+def test_catalog_hit_skips_database(client, company, catalog_data, django_assert_num_queries):
+    client.get(f'/companies/{company.slug}/catalog/')
+
+    with django_assert_num_queries(0):
+        response = client.get(f'/companies/{company.slug}/catalog/')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_catalog_invalidated_by_signals(
+    client, company, resource, other_resource, staff, catalog_data,
+    django_capture_on_commit_callbacks,
+):
+    url = f'/companies/{company.slug}/catalog/'
+    client.get(url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        resource.price = 100
+        resource.save()
+    by_id = {item['id']: item for item in client.get(url).json()['resources']}
+    assert by_id[resource.pk]['price'] == '100.00'
+
+    with django_capture_on_commit_callbacks(execute=True):
+        other_resource.staff_members.add(staff)
+    by_id = {item['id']: item for item in client.get(url).json()['resources']}
+    assert by_id[other_resource.pk]['staff'] == [staff.pk]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        company.slug = 'renamed'
+        company.save()
+    assert client.get(url).status_code == 404
+    assert client.get('/companies/renamed/catalog/').status_code == 200
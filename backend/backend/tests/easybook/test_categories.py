@@ -0,0 +1,100 @@
+import io
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from easybook.models import Category
+
+
+@pytest.fixture
+def tree(db, company):
+    """
+    root
+    ├── a
+    │   └── a1
+    │       └── a2
+    └── b
+    """
+    root = Category.objects.create(company=company, name='Root', slug='root')
+    a = Category.objects.create(company=company, parent=root, name='A', slug='a')
+    a1 = Category.objects.create(company=company, parent=a, name='A1', slug='a1')
+    a2 = Category.objects.create(company=company, parent=a1, name='A2', slug='a2')
+    b = Category.objects.create(company=company, parent=root, name='B', slug='b')
+    return root, a, a1, a2, b
+
+
+@pytest.mark.django_db
+def test_paths_are_maintained_on_create(tree):
+    root, a, a1, a2, b = tree
+    a2.refresh_from_db()
+
+    assert a2.path == [root.pk, a.pk, a1.pk, a2.pk]
+    assert sorted(Category.objects.subtree_ids(a.pk)) == sorted([a.pk, a1.pk, a2.pk])
+
+
+@pytest.mark.django_db
+def test_ancestors_are_one_query(tree, django_assert_num_queries):
+    root, a, a1, a2, b = tree
+
+    with django_assert_num_queries(1):
+        assert list(Category.objects.ancestors(a2.pk)) == [root, a, a1, a2]
+    with django_assert_num_queries(1):
+        assert a2.ancestors(include_self=False) == [root, a, a1]
+
+
+@pytest.mark.django_db
+def test_move_rewrites_subtree_paths(tree):
+    root, a, a1, a2, b = tree
+    a1.parent = b
+    a1.save()
+
+    a2.refresh_from_db()
+    assert a2.path == [root.pk, b.pk, a1.pk, a2.pk]
+    assert sorted(Category.objects.subtree_ids(b.pk)) == sorted([b.pk, a1.pk, a2.pk])
+    assert Category.objects.subtree_ids(a.pk) == [a.pk]
+
+
+@pytest.mark.django_db
+def test_saving_stale_category_keeps_moved_paths(tree):
+    root, a, a1, a2, b = tree
+    stale = Category.objects.get(pk=a1.pk)
+    a.parent = b
+    a.save()
+
+    stale.name = 'A1 renamed'
+    stale.save()
+
+    a2.refresh_from_db()
+    assert stale.path == [root.pk, b.pk, a.pk, a1.pk]
+    assert a2.path == [root.pk, b.pk, a.pk, a1.pk, a2.pk]
+
+
+@pytest.mark.django_db
+def test_cycle_check_uses_parent_path(tree, django_assert_num_queries):
+    root, a, a1, a2, b = tree
+    a.parent = a2
+
+    # Одна загрузка родителя, без обхода цепочки предков
+    with django_assert_num_queries(1):
+        with pytest.raises(ValidationError, match='Circular reference'):
+            a.clean()
+
+    a.parent = a
+    with pytest.raises(ValidationError, match='its own parent'):
+        a.clean()
+
+    a.parent = b
+    a.clean()
+
+
+@pytest.mark.django_db
+def test_rebuild_paths_command(tree):
+    root, a, a1, a2, b = tree
+    # Запись в обход save() — путь устаревает
+    Category.objects.filter(pk=a1.pk).update(parent=b)
+
+    out = io.StringIO()
+    call_command('rebuild_category_paths', stdout=out)
+
+    assert 'Updated 2 category paths' in out.getvalue()
+    a2.refresh_from_db()
+    assert a2.path == [root.pk, b.pk, a1.pk, a2.pk]
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.utils.timezone import make_aware
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from easybook import export
+from easybook.models import Booking, User
+
+
+START = make_aware(datetime(2025, 1, 1, 10, 0))
+
+
+@pytest.fixture
+def bookings(db, resource, other_resource):
+    users = User.objects.bulk_create(
+        User(email=f'client{i}@example.com', password='123') for i in range(5)
+    )
+    return Booking.objects.bulk_create(
+        Booking(
+            user=user,
+            resource=resource if i % 2 == 0 else other_resource,
+            timerange=DateTimeTZRange(
+                START + timedelta(hours=i), START + timedelta(hours=i + 1)
+            ),
+            additional_info='заметка, "с кавычками"',
+        )
+        for i, user in enumerate(users)
+    )
+
+
+@pytest.fixture
+def staff_client(db):
+    admin = User.objects.create_superuser(email='admin@example.com', password='123')
+    client = Client()
+    client.force_login(admin)
+    return client
+
+
+def read(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_export_ndjson_streams_filtered_rows(staff_client, bookings, resource):
+    response = staff_client.get('/bookings/export/', {
+        'resource': resource.pk,
+        'start': (START + timedelta(hours=1)).isoformat(),
+    })
+    assert response.status_code == 200
+    assert response.streaming
+    rows = [json.loads(line) for line in read(response).splitlines()]
+
+    assert [row['id'] for row in rows] == [bookings[2].pk, bookings[4].pk]
+    assert rows[0]['user_email'] == 'client2@example.com'
+    assert rows[0]['additional_info'] == 'заметка, "с кавычками"'
+
+
+@pytest.mark.django_db
+def test_export_csv(staff_client, bookings, company):
+    response = staff_client.get('/bookings/export/', {
+        'format': 'csv', 'company': company.slug,
+    })
+    rows = list(csv.DictReader(io.StringIO(read(response))))
+
+    assert response['Content-Type'] == 'text/csv'
+    assert [int(row['id']) for row in rows] == [booking.pk for booking in bookings]
+    assert rows[0]['start'] == START.isoformat()
+
+
+@pytest.mark.django_db
+def test_export_requires_staff(client, bookings):
+    assert client.get('/bookings/export/').status_code == 403
+
+
+@pytest.mark.django_db
+def test_export_command(bookings, staff, tmp_path):
+    path = tmp_path / 'bookings.csv'
+    call_command('export_bookings', '-o', str(path), '--chunk-size', '2')
+    rows = list(csv.DictReader(path.open(encoding='utf-8')))
+    assert len(rows) == len(bookings)
+
+    out = io.StringIO()
+    call_command('export_bookings', '--staff', staff.pk, stdout=out)
+    assert out.getvalue() == ''
+    call_command('export_bookings', '--company', 'company_name', stdout=out)
+    assert len(out.getvalue().splitlines()) == len(bookings)
+
+
+@pytest.mark.django_db
+def test_export_pages_by_key_without_server_side_cursors(bookings, monkeypatch):
+    monkeypatch.setitem(connection.settings_dict, 'DISABLE_SERVER_SIDE_CURSORS', True)
+    rows = list(export.bookings_rows(chunk_size=2))
+
+    assert [row[0] for row in rows] == [booking.pk for booking in bookings]
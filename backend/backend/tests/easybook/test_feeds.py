@@ -0,0 +1,92 @@
+from datetime import timedelta
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from easybook.admission import admit_booking
+from easybook.feeds import render, touch
+from easybook.models import Resource, ResourceStaff, Staff
+
+
+@pytest.fixture
+def start():
+    return timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+
+@pytest.fixture
+def booked(user, resource, staff, start, django_capture_on_commit_callbacks):
+    ResourceStaff.objects.create(resource=resource, staff=staff)
+    with django_capture_on_commit_callbacks(execute=True):
+        return admit_booking(
+            user=user, resource=resource, staff=staff,
+            timerange=DateTimeTZRange(start, start + timedelta(hours=1)),
+        )
+
+
+@pytest.mark.django_db
+def test_resource_feed_renders_bookings(client, booked, resource, start):
+    response = client.get(f'/resources/{resource.pk}/calendar.ics')
+    body = response.content.decode()
+
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/calendar')
+    assert response['ETag'] == f'"resource-{resource.pk}-1"'
+    assert 'Last-Modified' in response
+    assert f'UID:booking-{booked.pk}@easybook' in body
+    assert f"DTSTART:{start.strftime('%Y%m%dT%H%M%SZ')}" in body
+    assert 'DESCRIPTION:John Doe' in body
+
+
+@pytest.mark.django_db
+def test_feed_not_modified_without_booking_query(client, booked, staff):
+    url = f'/staff/{staff.pk}/calendar.ics'
+    etag = client.get(url)['ETag']
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert len(queries) == 1
+    assert 'easybook_booking' not in queries[0]['sql']
+
+
+@pytest.mark.django_db
+def test_booking_changes_bump_version(
+    client, booked, resource, staff, other_resource, django_capture_on_commit_callbacks
+):
+    etag = client.get(f'/resources/{resource.pk}/calendar.ics')['ETag']
+    ResourceStaff.objects.create(resource=other_resource, staff=staff)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        booked.resource = other_resource
+        booked.save()
+
+    response = client.get(f'/resources/{resource.pk}/calendar.ics', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert f'booking-{booked.pk}' not in response.content.decode()
+    assert Resource.objects.get(pk=other_resource.pk).schedule_version == 1
+    assert Staff.objects.get(pk=staff.pk).schedule_version == 2
+
+
+def test_render_escapes_and_folds_long_lines(start):
+    timerange = DateTimeTZRange(start, start + timedelta(hours=1))
+    body = render([(1, timerange, 'Зал; ' * 30, None, 2, False)], 'Feed, test', start)
+
+    assert 'X-WR-CALNAME:Feed\\, test' in body
+    assert 'STATUS:TENTATIVE' in body
+    assert all(len(line.encode()) <= 75 for line in body.split('\r\n'))
+    assert '\r\n ' in body
+
+
+@pytest.mark.django_db
+def test_saving_stale_instance_keeps_version(resource, django_capture_on_commit_callbacks):
+    stale = Resource.objects.get(pk=resource.pk)
+    with django_capture_on_commit_callbacks(execute=True):
+        touch(resource_ids=[resource.pk])
+
+    stale.name = 'Renamed'
+    stale.save()
+
+    resource.refresh_from_db()
+    assert (resource.name, resource.schedule_version) == ('Renamed', 1)
+    assert resource.schedule_changed_at is not None
@@ -0,0 +1,134 @@
+"""
+Планы запросов на объёме: индексы должны совпадать с формой запросов
+`resource = X AND timerange && R`.
+
+По умолчанию 20 000 броней — быстро для обычного прогона; полный
+бенчмарк: EASYBOOK_INDEX_BOOKINGS=1000000 pytest tests/easybook/test_indexes.py
+"""
+import os
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+import pytest
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from easybook import availability, reminders
+from easybook.models import AvailabilityRule, Booking, CapacityWindow, Resource
+
+
+BOOKINGS = int(os.environ.get('EASYBOOK_INDEX_BOOKINGS', '20000'))
+RESOURCES = 20
+BASE = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def volume(user, company, staff):
+    """
+    BOOKINGS часовых броней по RESOURCES ресурсам подряд; у первого
+    ресурса — с сотрудником.
+    """
+    resources = Resource.objects.bulk_create(
+        Resource(company=company, name=f'Room {i}', max_capacity=1) for i in range(RESOURCES)
+    )
+    ids = [r.pk for r in resources]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {Booking._meta.db_table}
+                (user_id, resource_id, staff_id, timerange, is_confirmed, quantity, additional_info)
+            SELECT %(user)s, (%(ids)s::bigint[])[1 + i %% %(n)s],
+                CASE WHEN i %% %(n)s = 0 THEN %(staff)s END,
+                tstzrange(
+                    %(base)s + (i / %(n)s) * interval '1 hour',
+                    %(base)s + (i / %(n)s + 1) * interval '1 hour'
+                ),
+                false, 1, ''
+            FROM generate_series(0, %(count)s - 1) AS i
+            """,
+            {'user': user.pk, 'ids': ids, 'n': RESOURCES, 'staff': staff.pk,
+             'base': BASE, 'count': BOOKINGS},
+        )
+    # Часовые окна вместимости и разовые правила на каждый день истории;
+    # строки ресурсов вперемешку, как при живой записи
+    days = BOOKINGS // RESOURCES // 24 + 1
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {CapacityWindow._meta.db_table} (resource_id, timerange, capacity)
+            SELECT r, tstzrange(%(base)s + h * interval '1 hour', %(base)s + (h + 1) * interval '1 hour'), 1
+            FROM generate_series(0, %(hours)s - 1) AS h, unnest(%(ids)s::bigint[]) AS r
+            """,
+            {'ids': ids, 'base': BASE, 'hours': BOOKINGS // RESOURCES},
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {AvailabilityRule._meta.db_table}
+                (resource_id, weekday, specific_date, start_time, end_time, slot_size)
+            SELECT r, NULL, %(base)s::date + d, time '09:00', time '18:00', 60
+            FROM generate_series(0, %(days)s - 1) AS d, unnest(%(ids)s::bigint[]) AS r
+            UNION ALL
+            SELECT r, w, NULL, time '09:00', time '18:00', 60
+            FROM unnest(%(ids)s::bigint[]) AS r, generate_series(0, 6) AS w
+            """,
+            {'ids': ids, 'base': BASE, 'days': days},
+        )
+    with connection.cursor() as cursor:
+        for model in (Booking, CapacityWindow, AvailabilityRule):
+            cursor.execute(f'ANALYZE {model._meta.db_table}')
+    return resources
+
+
+def window(hours=24):
+    middle = BASE + timedelta(hours=BOOKINGS // RESOURCES // 2)
+    return DateTimeTZRange(middle, middle + timedelta(hours=hours))
+
+
+@pytest.mark.django_db
+def test_resource_overlap_uses_composite_gist(volume):
+    resource = volume[RESOURCES // 2]
+    _, bookings = availability._window_querysets(
+        resource, window().lower.date(), window().lower.date(), dt_timezone.utc
+    )
+
+    assert 'booking_resource_range_gist' in bookings.explain()
+
+
+@pytest.mark.skipif(
+    BOOKINGS < 1_000_000,
+    reason='на малых объёмах планировщику выгоднее btree-индекс внешнего ключа',
+)
+@pytest.mark.django_db
+def test_capacity_overlap_uses_constraint_index(volume):
+    resource = volume[RESOURCES // 2]
+    capacity, _ = availability._window_querysets(
+        resource, window().lower.date(), window().lower.date(), dt_timezone.utc
+    )
+
+    assert 'prevent_capacity_windows_overlap' in capacity.explain()
+
+
+@pytest.mark.django_db
+def test_staff_overlap_uses_constraint_index(volume, staff):
+    plan = Booking.objects.filter(staff=staff, timerange__overlap=window()).explain()
+
+    assert 'prevent_staff_double_booking' in plan
+
+
+@pytest.mark.django_db
+def test_rules_use_resource_indexes(volume):
+    resource = volume[0]
+    weekly = AvailabilityRule.objects.filter(resource=resource, weekday=2)
+    dated = AvailabilityRule.objects.filter(resource=resource, specific_date=date(2024, 1, 3))
+
+    assert 'rule_resource_weekday_idx' in weekly.explain()
+    assert 'rule_resource_date_idx' in dated.explain()
+
+
+@pytest.mark.django_db
+def test_reminder_sweep_uses_partial_index(volume):
+    # Уже напомненные (прошедшие) брони из частичного индекса выпадают
+    now = window().lower
+    Booking.objects.filter(timerange__startswith__lt=now).update(reminded_at=now)
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {Booking._meta.db_table}')
+    due = reminders.due(now, timedelta(hours=24)).order_by('timerange__startswith', 'id')
+
+    assert 'booking_remind_start_idx' in due[:reminders.BATCH_SIZE].explain()
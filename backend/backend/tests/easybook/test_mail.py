@@ -0,0 +1,126 @@
+from smtplib import SMTPServerDisconnected
+import pytest
+from django.core.mail.backends.locmem import EmailBackend
+from easybook import mail
+from easybook.tasks import send_email_task
+
+
+def messages(count, recipient='user{}@example.com'):
+    return [
+        (f'Subject {i}', f'Body {i}', recipient.format(i))
+        for i in range(count)
+    ]
+
+
+class FlakyBackend(EmailBackend):
+    """
+    locmem, который рвёт соединение на письме номер `fail_on` (один раз).
+    """
+    def __init__(self, fail_on, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_on = fail_on
+        self.calls = 0
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+
+    def send_messages(self, messages):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise SMTPServerDisconnected('Connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+    get_connection = mail.get_connection
+
+    def counting(**kwargs):
+        connection = get_connection(**kwargs)
+        opened.append(connection)
+        return connection
+
+    monkeypatch.setattr(mail, 'get_connection', counting)
+    return opened
+
+
+@pytest.fixture
+def requeued(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        send_email_task, 'apply_async', lambda args, countdown: calls.append((args, countdown))
+    )
+    return calls
+
+
+def test_batch_uses_one_connection(settings, mailoutbox, connections):
+    settings.EMAIL_HOST_USER = 'noreply@example.com'
+    batch = messages(250) + [('No body', '', 'x@example.com')]
+
+    assert send_email_task.apply((batch,)).get() == 250
+
+    assert len(connections) == 1
+    assert len(mailoutbox) == 250
+    assert (mailoutbox[0].subject, mailoutbox[0].to, mailoutbox[0].from_email) == \
+        ('Subject 0', ['user0@example.com'], 'noreply@example.com')
+
+
+def test_single_message_form_is_still_accepted(mailoutbox):
+    assert send_email_task.apply(('Subject', 'Body', 'old@example.com')).get() == 1
+    assert mailoutbox[0].to == ['old@example.com']
+
+
+def test_recipient_rate_limit_defers_extra_messages(settings, mailoutbox, requeued):
+    settings.EMAIL_RATE_LIMIT = 2
+    settings.EMAIL_RATE_WINDOW = 60
+    batch = messages(3, 'busy@example.com') + messages(1, 'quiet@example.com')
+
+    assert send_email_task.apply((batch,)).get() == 3
+
+    assert [m.to for m in mailoutbox].count(['busy@example.com']) == 2
+    [(args, countdown)] = requeued
+    assert args == ([batch[2]],)
+    assert countdown == 60
+
+    # Окно ещё не закончилось
+    assert mail.send_batch([batch[2]])['deferred'] == [batch[2]]
+
+
+def test_retry_sends_only_unsent_messages(settings, mailoutbox, monkeypatch):
+    settings.EMAIL_RATE_LIMIT = 0
+    backends = []
+
+    def flaky(**kwargs):
+        backends.append(FlakyBackend(fail_on=3 if not backends else None))
+        return backends[-1]
+
+    monkeypatch.setattr(mail, 'get_connection', flaky)
+    batch = messages(5)
+
+    # Под eager-выполнением retry() сразу перезапускает задачу
+    send_email_task.apply((batch,))
+
+    assert len(backends) == 2
+    assert [m.subject for m in mailoutbox] == [subject for subject, _, _ in batch]
+
+
+def test_send_errors_propagate():
+    backend = FlakyBackend(fail_on=2)
+
+    with pytest.raises(SMTPServerDisconnected) as error:
+        mail.send_batch(messages(4), connection=backend)
+
+    assert error.value.unsent == messages(4)[1:]
+
+
+def test_unsent_messages_do_not_use_up_rate_limit(settings):
+    settings.EMAIL_RATE_LIMIT = 2
+    batch = messages(2, 'busy@example.com')
+
+    with pytest.raises(SMTPServerDisconnected) as error:
+        mail.send_batch(batch, connection=FlakyBackend(fail_on=2))
+
+    assert mail.send_batch(error.value.unsent, connection=FlakyBackend(fail_on=None)) == \
+        {'sent': 1, 'skipped': 0, 'deferred': []}
@@ -0,0 +1,157 @@
+from datetime import datetime, time, timedelta
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.timezone import make_aware
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.urls import reverse
+from easybook.models import (
+    AvailabilityRule, Booking, CapacityWindow, Resource, SlotAvailability, User,
+)
+from easybook import availability, materialization, outbox
+from easybook.tasks import refresh_availability_task
+
+
+@pytest.fixture
+def enabled(settings, monkeypatch):
+    settings.AVAILABILITY_MATERIALIZATION = True
+    settings.AVAILABILITY_MATERIALIZATION_DAYS = 14
+    # Выполняем задачу синхронно вместо отправки в брокер
+    monkeypatch.setattr(
+        refresh_availability_task, 'delay',
+        lambda *args: refresh_availability_task.apply(args).get()
+    )
+
+
+@pytest.fixture
+def today():
+    return timezone.localdate()
+
+
+@pytest.fixture
+def rule(resource, today):
+    return AvailabilityRule.objects.create(
+        resource=resource,
+        weekday=today.weekday(),
+        start_time=time(10, 0),
+        end_time=time(14, 0),
+        slot_size=60
+    )
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_on_the_fly_slots(enabled, resource, rule, today):
+    call_command('rebuild_availability')
+    last = today + timedelta(days=13)
+
+    assert SlotAvailability.objects.filter(resource=resource).count() == 8
+    assert materialization.free_slots(resource, today, last) == \
+        availability.free_slots(resource, today, last)
+
+
+@pytest.mark.django_db
+def test_booking_changes_refresh_slots(enabled, user, resource, rule, today):
+    materialization.rebuild()
+    start = make_aware(datetime.combine(today, time(11, 0)))
+    booking = Booking.objects.create(
+        user=user,
+        resource=resource,
+        timerange=DateTimeTZRange(start, start + timedelta(hours=1)),
+        quantity=4
+    )
+    outbox.relay(consumers=[outbox.refresh_materialized_slots])
+    slot = SlotAvailability.objects.get(resource=resource, start=start)
+    assert slot.booked == 4
+
+    booking.delete()
+    outbox.relay(consumers=[outbox.refresh_materialized_slots])
+    slot = SlotAvailability.objects.get(resource=resource, start=start)
+    assert slot.booked == 0
+
+
+@pytest.mark.django_db
+def test_search_reads_materialized_slots(
+    enabled, user, company, resource, other_resource, rule, today
+):
+    AvailabilityRule.objects.create(
+        resource=other_resource,
+        weekday=today.weekday(),
+        start_time=time(10, 0),
+        end_time=time(12, 0),
+        slot_size=60
+    )
+    start = make_aware(datetime.combine(today, time(10, 0)))
+    Booking.objects.create(
+        user=user,
+        resource=resource,
+        timerange=DateTimeTZRange(start, start + timedelta(hours=1)),
+        quantity=9
+    )
+    materialization.rebuild()
+
+    found = materialization.search_available(
+        Resource.objects.filter(company=company),
+        start, start + timedelta(hours=2), quantity=2
+    )
+    assert [(r.pk, capacity, free) for r, capacity, free in found] == [
+        (other_resource.pk, 20, 20)
+    ]
+    found = materialization.search_available(
+        Resource.objects.filter(company=company),
+        start, start + timedelta(hours=3), quantity=1
+    )
+    assert [r.pk for r, _, _ in found] == [resource.pk]
+
+
+@pytest.mark.django_db
+def test_refresh_holds_resource_lock(enabled, resource, rule, today):
+    with transaction.atomic():
+        materialization.refresh(resource.pk, today, today)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT objid FROM pg_locks"
+                " WHERE locktype = 'advisory' AND objsubid = 1 AND pid = pg_backend_pid()"
+            )
+            locked = [row[0] for row in cursor.fetchall()]
+
+    assert locked == [resource.pk]
+
+
+@pytest.mark.django_db
+def test_search_does_not_depend_on_materialization(
+    enabled, settings, client, company, resource, other_resource, rule, today
+):
+    AvailabilityRule.objects.create(
+        resource=other_resource, weekday=today.weekday(),
+        start_time=time(10, 0), end_time=time(14, 0), slot_size=60,
+    )
+    def at(hour):
+        return make_aware(datetime.combine(today, time(hour, 0)))
+
+    # Две брони в разных слотах окна: по слотам свободно 4, по окну — 0
+    for i, hour in enumerate((10, 11)):
+        user = User.objects.create(email=f'guest{i}@example.com', password='123')
+        Booking.objects.create(
+            user=user, resource=resource,
+            timerange=DateTimeTZRange(at(hour), at(hour + 1)), quantity=6,
+        )
+    # Окно покрывает лишь часть поиска — сверх max_capacity не поднимает
+    CapacityWindow.objects.create(
+        resource=other_resource, timerange=DateTimeTZRange(at(11), at(14)), capacity=50
+    )
+    materialization.rebuild()
+
+    def search(quantity):
+        return client.get(reverse('search'), {
+            'company': company.slug, 'quantity': quantity,
+            'start': at(10).isoformat(), 'end': at(12).isoformat(),
+        }).json()['resources']
+
+    for quantity in (1, 20, 21):
+        settings.AVAILABILITY_MATERIALIZATION = True
+        materialized = search(quantity)
+        settings.AVAILABILITY_MATERIALIZATION = False
+        assert search(quantity) == materialized
+    assert [(r['id'], r['capacity'], r['free']) for r in search(1)] == \
+        [(other_resource.pk, 20, 20)]
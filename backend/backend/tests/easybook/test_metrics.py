@@ -0,0 +1,108 @@
+import logging
+from datetime import time
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from easybook.models import AvailabilityRule
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def rules(resource):
+    return AvailabilityRule.objects.create(
+        resource=resource, weekday=0, start_time=time(10, 0), end_time=time(12, 0),
+        slot_size=60,
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('view', ['calendar', 'calendar_async'])
+def test_request_is_recorded_by_view_name(client, resource, rules, view):
+    requests = sample(
+        'easybook_http_requests_total', view=view, method='GET', status='200'
+    )
+    queries = sample('easybook_db_queries_per_request_sum', view=view)
+    misses = sample('easybook_cache_lookups_total', view=view, cache='model', result='miss')
+
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(
+            reverse(view, args=[resource.pk]), {'start': '2025-07-14', 'end': '2025-07-20'}
+        )
+
+    assert response.status_code == 200
+    assert sample(
+        'easybook_http_requests_total', view=view, method='GET', status='200'
+    ) == requests + 1
+    assert sample('easybook_db_queries_per_request_sum', view=view) == \
+        queries + len(captured)
+    # Ресурс из кэша моделей
+    assert sample('easybook_cache_lookups_total', view=view, cache='model', result='miss') == \
+        misses + 1
+    assert sample('easybook_http_request_duration_seconds_count', view=view) >= 1
+
+
+@pytest.mark.django_db
+def test_cache_hits_and_misses(client, company):
+    url = reverse('company_catalog', args=[company.slug])
+    before = {
+        result: sample('easybook_cache_lookups_total',
+                       view='company_catalog', cache='catalog', result=result)
+        for result in ('hit', 'miss')
+    }
+
+    client.get(url)
+    client.get(url)
+
+    for result in ('hit', 'miss'):
+        assert sample(
+            'easybook_cache_lookups_total',
+            view='company_catalog', cache='catalog', result=result,
+        ) == before[result] + 1
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client, company):
+    client.get(reverse('company_catalog', args=[company.slug]))
+    client.get('/no-such-page/')
+
+    response = client.get(reverse('metrics'))
+
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain')
+    body = response.content.decode()
+    assert 'easybook_http_requests_total{method="GET",status="200",view="company_catalog"}' \
+        in body
+    assert 'view="<unresolved>"' in body
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_requires_allowed_network_or_token(settings, client):
+    url = reverse('metrics')
+    settings.METRICS_ALLOWED_NETWORKS = ['10.0.0.0/8']
+    settings.METRICS_TOKEN = 'scrape-secret'
+
+    assert client.get(url).status_code == 403
+    assert client.get(url, REMOTE_ADDR='10.1.2.3').status_code == 200
+    assert client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+    assert client.get(url, HTTP_AUTHORIZATION='Bearer scrape-secret').status_code == 200
+
+
+@pytest.mark.django_db
+def test_slow_request_log(settings, client, resource, rules, caplog):
+    url = reverse('calendar', args=[resource.pk])
+    client.get(url)
+    assert not caplog.records
+
+    settings.SLOW_REQUEST_MS = 0.001
+    with caplog.at_level(logging.WARNING, logger='easybook.slow_requests'):
+        client.get(url)
+
+    [record] = caplog.records
+    assert 'Slow request GET' in record.message
+    assert '(calendar)' in record.message
+    assert 'FROM "easybook_booking"' in record.message
@@ -0,0 +1,102 @@
+from datetime import date, time, timedelta
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from easybook import model_cache
+from easybook.models import AvailabilityRule
+
+
+@pytest.mark.django_db
+def test_resource_and_company_are_cached(company, resource, django_assert_num_queries):
+    assert model_cache.resource_by_id(resource.pk) == resource
+    assert model_cache.company_by_slug(company.slug) == company
+
+    with django_assert_num_queries(0):
+        assert model_cache.resource_by_id(resource.pk).name == resource.name
+        assert model_cache.company_by_slug(company.slug) == company
+
+
+@pytest.mark.django_db
+def test_saves_bump_generation(company, resource, django_capture_on_commit_callbacks):
+    model_cache.resource_by_id(resource.pk)
+    model_cache.company_by_slug(company.slug)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        resource.name = 'Renamed'
+        resource.save()
+        company.is_active = False
+        company.save()
+
+    assert model_cache.resource_by_id(resource.pk).name == 'Renamed'
+    assert model_cache.company_by_slug(company.slug) is None
+
+
+@pytest.mark.django_db
+def test_rule_rows_follow_rule_changes(
+    resource, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    today = timezone.localdate()
+    rule = AvailabilityRule.objects.create(
+        resource=resource, weekday=0, start_time=time(9, 0), end_time=time(18, 0)
+    )
+    week = (today, today + timedelta(days=6))
+
+    assert len(model_cache.availability_rule_rows(resource.pk, *week)) == 1
+    with django_assert_num_queries(0):
+        model_cache.availability_rule_rows(resource.pk, *week)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        AvailabilityRule.objects.create(
+            resource=resource, specific_date=today + timedelta(days=1),
+            start_time=time(10, 0), end_time=time(12, 0),
+        )
+        rule.delete()
+    rows = model_cache.availability_rule_rows(resource.pk, *week)
+    assert [row[1] for row in rows] == [today + timedelta(days=1)]
+    # Прошлое — мимо кэша
+    assert model_cache.availability_rule_rows(
+        resource.pk, date(2000, 1, 1), date(2000, 1, 7)
+    ) == []
+
+
+@pytest.mark.django_db
+def test_stale_generation_write_is_never_read(django_capture_on_commit_callbacks):
+    model_cache.cached('thing', 1, lambda: 'old')
+    with django_capture_on_commit_callbacks(execute=True):
+        model_cache.invalidate('thing', 1)
+        # До коммита поколение прежнее
+        assert model_cache.cached('thing', 1, lambda: 'new') == 'old'
+
+    assert model_cache.cached('thing', 1, lambda: 'new') == 'new'
+
+
+def test_expired_entry_is_refreshed_by_one_caller():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert model_cache.get_or_compute('key', compute, ttl=60) == 1
+    value, delta, _ = cache.get('key')
+    # Истёкшая запись, пересчитывает другой процесс: отдаём старое значение
+    cache.set('key', (value, delta, 0), 60)
+    cache.add('key:lock', 1)
+    assert model_cache.get_or_compute('key', compute, ttl=60) == 1
+    cache.delete('key:lock')
+    assert model_cache.get_or_compute('key', compute, ttl=60) == 2
+    assert len(calls) == 2
+
+
+def test_missing_entry_waits_for_lock_holder(monkeypatch):
+    cache.add('key:lock', 1)
+    monkeypatch.setattr(model_cache, 'LOCK_WAIT', 0.2)
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        cache.set('key', ('computed elsewhere', 0.0, 2 ** 40), 60)
+
+    monkeypatch.setattr(model_cache.time, 'sleep', sleep)
+    assert model_cache.get_or_compute('key', lambda: 'mine') == 'computed elsewhere'
+    assert waits
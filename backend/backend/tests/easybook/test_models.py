@@ -1,5 +1,6 @@
-from datetime import datetime, time, date
+from datetime import datetime, time, date, timedelta
 import pytest
+from easybook.checks import check_booking_max_duration
 from easybook.models import CapacityWindow, AvailabilityRule, Booking, Resource, Company
 from django.core.exceptions import ValidationError
 #from psycopg2.extras import DateTimeTZRange
@@ -250,3 +251,22 @@ def test_validation_fails_staff_from_another_company(
         booking.clean()
     
     assert 'Selected staff must belong to the same company' in str(excinfo.value)
+
+
+@pytest.mark.django_db
+def test_max_duration_is_validated_and_checked(settings, user, resource):
+    start = make_aware(datetime(2025, 1, 1, 10, 0))
+    long_booking = Booking.objects.create(
+        user=user, resource=resource,
+        timerange=DateTimeTZRange(start, start + timedelta(days=3)),
+    )
+    settings.BOOKING_MAX_DURATION_DAYS = 2
+
+    with pytest.raises(ValidationError, match='maximum duration'):
+        long_booking.clean()
+    [error] = check_booking_max_duration(None, databases=['default'])
+    assert error.id == 'easybook.E001'
+
+    long_booking.delete()
+    assert check_booking_max_duration(None, databases=['default']) == []
+    assert check_booking_max_duration(None) == []
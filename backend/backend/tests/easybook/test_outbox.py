@@ -0,0 +1,201 @@
+import hashlib
+import hmac
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
+from easybook import outbox
+from easybook.models import Booking, BookingEvent
+from easybook.tasks import deliver_webhook_task, relay_booking_events_task, send_email_task
+
+
+def hours_from_now(hours, length=1):
+    start = (timezone.now() + timedelta(hours=hours)).replace(microsecond=0)
+    return DateTimeTZRange(start, start + timedelta(hours=length))
+
+
+def kinds():
+    return list(BookingEvent.objects.order_by('id').values_list('kind', flat=True))
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """
+    Вызовы .delay() задач вместо отправки в брокер.
+    """
+    calls = {'email': [], 'webhook': []}
+    monkeypatch.setattr(
+        send_email_task, 'delay', lambda messages: calls['email'].extend(messages)
+    )
+    monkeypatch.setattr(
+        deliver_webhook_task, 'delay', lambda *args: calls['webhook'].append(args)
+    )
+    return calls
+
+
+@pytest.mark.django_db
+def test_booking_lifecycle_is_recorded(user, resource):
+    booking = Booking.objects.create(user=user, resource=resource, timerange=hours_from_now(2))
+    booking.is_confirmed = True
+    booking.save()
+    previous = booking.timerange
+    booking.timerange = hours_from_now(5)
+    booking.save()
+    pk = booking.pk
+    booking.delete()
+
+    assert kinds() == ['created', 'confirmed', 'updated', 'deleted']
+    updated = BookingEvent.objects.get(kind='updated')
+    assert updated.booking_id == pk
+    assert updated.payload['user'] == user.pk
+    assert updated.payload['is_confirmed'] is True
+    assert updated.payload['previous'] == {
+        'resource': resource.pk,
+        'start': previous.lower.isoformat().replace('+00:00', 'Z'),
+        'end': previous.upper.isoformat().replace('+00:00', 'Z'),
+    }
+
+
+@pytest.mark.django_db
+def test_events_roll_back_with_the_booking(user, resource):
+    with pytest.raises(RuntimeError), transaction.atomic():
+        Booking.objects.create(user=user, resource=resource, timerange=hours_from_now(2))
+        raise RuntimeError
+
+    assert not BookingEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_commit_queues_relay(monkeypatch, django_capture_on_commit_callbacks, user, resource):
+    queued = []
+    monkeypatch.setattr(relay_booking_events_task, 'delay', lambda: queued.append(True))
+    with django_capture_on_commit_callbacks(execute=True):
+        Booking.objects.create(user=user, resource=resource, timerange=hours_from_now(2))
+    assert queued
+
+    def broker_down():
+        raise ConnectionError('broker is down')
+
+    # Событие остаётся в outbox для beat, запрос не падает
+    monkeypatch.setattr(relay_booking_events_task, 'delay', broker_down)
+    with django_capture_on_commit_callbacks(execute=True):
+        Booking.objects.create(user=user, resource=resource, timerange=hours_from_now(5))
+    assert BookingEvent.objects.filter(processed_at__isnull=True).count() == 2
+
+
+@pytest.mark.django_db
+def test_relay_fans_out_in_batches(settings, sent, user, resource):
+    settings.BOOKING_WEBHOOK_URLS = ['http://hooks.example/a', 'http://hooks.example/b']
+    bookings = [
+        Booking.objects.create(user=user, resource=resource, timerange=hours_from_now(2 * i))
+        for i in range(1, 4)
+    ]
+    bookings[0].is_confirmed = True
+    bookings[0].save()
+    bookings[1].additional_info = 'window seat'
+    bookings[1].save()
+
+    assert outbox.relay(batch_size=2) == 5
+
+    # created x3 + confirmed; обычное изменение писем не шлёт
+    assert [subject for subject, _, _ in sent['email']] == [
+        'Booking created', 'Booking created', 'Booking created', 'Booking confirmed',
+    ]
+    assert {recipient for _, _, recipient in sent['email']} == {user.email}
+    # По вызову на адрес на каждую из трёх пачек
+    assert len(sent['webhook']) == 6
+    assert [event['kind'] for url, body in sent['webhook'][::2] for event in body] == \
+        ['created', 'created', 'created', 'confirmed', 'updated']
+    assert not BookingEvent.objects.filter(processed_at__isnull=True).exists()
+    assert outbox.relay() == 0
+
+
+@pytest.mark.django_db
+def test_broker_outage_does_not_use_up_attempts(sent, user, resource):
+    Booking.objects.create(user=user, resource=resource, timerange=hours_from_now(2))
+
+    def broker_down(events):
+        raise ConnectionError('broker is down')
+
+    for attempt in range(outbox.MAX_ATTEMPTS + 1):
+        assert outbox.relay(consumers=[outbox.notify_by_email, broker_down]) == 0
+
+    event = BookingEvent.objects.get()
+    assert (event.processed_at, event.attempts) == (None, 0)
+    assert outbox.relay() == 1
+
+
+@pytest.mark.django_db
+def test_poison_event_does_not_block_its_batch(sent, user, resource):
+    bookings = [
+        Booking.objects.create(user=user, resource=resource, timerange=hours_from_now(2 * i))
+        for i in range(1, 4)
+    ]
+    poison = bookings[1].pk
+
+    def picky(events):
+        if any(event.booking_id == poison for event in events):
+            raise ValueError('cannot handle this booking')
+
+    for attempt in range(outbox.MAX_ATTEMPTS):
+        outbox.relay(consumers=[picky])
+
+    pending = BookingEvent.objects.filter(processed_at__isnull=True)
+    assert [(event.booking_id, event.attempts) for event in pending] == \
+        [(poison, outbox.MAX_ATTEMPTS)]
+    # Исчерпавшие попытки больше не раздаются, пока их не вернут в очередь
+    assert outbox.relay() == 0
+
+    call_command('requeue_booking_events')
+    assert outbox.relay() == 1
+    assert not BookingEvent.objects.filter(processed_at__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_purge_keeps_recent_and_pending_events(user, resource):
+    for hours in (2, 4, 6):
+        Booking.objects.create(user=user, resource=resource, timerange=hours_from_now(hours))
+    old, recent, pending = BookingEvent.objects.order_by('id')
+    BookingEvent.objects.filter(pk=old.pk).update(
+        processed_at=timezone.now() - timedelta(days=8)
+    )
+    BookingEvent.objects.filter(pk=recent.pk).update(processed_at=timezone.now())
+
+    assert outbox.purge() == 1
+    assert set(BookingEvent.objects.values_list('pk', flat=True)) == {recent.pk, pending.pk}
+
+
+def test_webhook_is_signed(settings):
+    settings.BOOKING_WEBHOOK_SECRET = 'secret'
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            received.append((self.headers['X-Easybook-Signature'], body))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.handle_request)
+    thread.start()
+    try:
+        status = outbox.post_webhook(
+            f'http://127.0.0.1:{server.server_port}/', [{'kind': 'created'}]
+        )
+    finally:
+        thread.join(5)
+        server.server_close()
+
+    assert status == 204
+    [(signature, body)] = received
+    assert json.loads(body) == [{'kind': 'created'}]
+    assert signature == hmac.new(b'secret', body, hashlib.sha256).hexdigest()
@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+import pytest
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from easybook import bulk, partitioning
+from easybook.admission import admit_booking
+from easybook.models import Booking, ResourceStaff
+
+
+def month_range(month, day=1, hours=1):
+    start = datetime(month.year, month.month, day, 10, tzinfo=dt_timezone.utc)
+    return DateTimeTZRange(start, start + timedelta(hours=hours))
+
+
+def partition_of(booking):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT tableoid::regclass::text FROM {partitioning.TABLE} WHERE id = %s',
+            [booking.pk],
+        )
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture
+def this_month():
+    return partitioning.current_month()
+
+
+@pytest.fixture
+def history(user, resource, this_month):
+    """
+    Брони двухмесячной давности, текущего месяца и без timerange.
+    """
+    old = partitioning.add_months(this_month, -2)
+    return [
+        Booking.objects.create(user=user, resource=resource, timerange=month_range(old)),
+        Booking.objects.create(user=user, resource=resource, timerange=month_range(this_month)),
+        Booking.objects.create(user=user, resource=resource, timerange=None),
+    ]
+
+
+@pytest.mark.django_db
+def test_convert_keeps_rows_and_routes_them_by_month(history, user, resource, this_month):
+    assert partitioning.maintain() is None
+
+    created = partitioning.convert(months_ahead=1)
+
+    assert partitioning.is_partitioned()
+    assert created == [
+        partitioning.partition_name(partitioning.add_months(this_month, i))
+        for i in range(-2, 2)
+    ]
+    old, current, undated = history
+    assert partition_of(old) == created[0]
+    assert partition_of(current) == created[2]
+    assert partition_of(undated) == partitioning.DEFAULT_PARTITION
+    assert set(Booking.objects.values_list('pk', flat=True)) == {b.pk for b in history}
+
+    # Новые id продолжают старую последовательность
+    booking = Booking.objects.create(
+        user=user, resource=resource, timerange=month_range(this_month, day=2)
+    )
+    assert booking.pk > max(b.pk for b in history)
+    assert partition_of(booking) == created[2]
+
+
+@pytest.mark.django_db
+def test_exclusion_constraints_hold_per_partition(history, user, resource, this_month):
+    partitioning.convert(months_ahead=1)
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        Booking.objects.create(user=user, resource=resource, timerange=month_range(this_month))
+
+
+@pytest.mark.django_db
+def test_overlaps_across_partition_boundary_are_rejected(
+    user, resource, other_resource, staff, this_month
+):
+    ResourceStaff.objects.create(resource=resource, staff=staff)
+    ResourceStaff.objects.create(resource=other_resource, staff=staff)
+    partitioning.convert(months_ahead=1)
+    next_month = partitioning.add_months(this_month, 1)
+    boundary = datetime(next_month.year, next_month.month, 1, tzinfo=dt_timezone.utc)
+    # Начинается в этом месяце, заканчивается в следующем
+    admit_booking(
+        user=user, resource=resource, staff=staff,
+        timerange=DateTimeTZRange(boundary - timedelta(hours=1), boundary + timedelta(hours=1)),
+    )
+    after = DateTimeTZRange(boundary, boundary + timedelta(hours=2))
+
+    with pytest.raises(ValidationError, match='overlaps an existing booking'):
+        admit_booking(user=user, resource=resource, timerange=after)
+    with pytest.raises(ValidationError, match='overlaps an existing booking'):
+        admit_booking(user=user, resource=other_resource, staff=staff, timerange=after)
+
+    report = bulk.import_bookings([
+        (1, {'user': user.pk, 'resource': resource.pk,
+             'start': after.lower.isoformat(), 'end': after.upper.isoformat()}),
+        (2, {'user': user.pk, 'resource': other_resource.pk, 'staff': staff.pk,
+             'start': after.lower.isoformat(), 'end': after.upper.isoformat()}),
+        (3, {'user': user.pk, 'resource': other_resource.pk,
+             'start': after.lower.isoformat(), 'end': after.upper.isoformat()}),
+    ])
+    assert report['created'] == 1
+    assert [error['line'] for error in report['errors']] == [1, 2]
+    assert Booking.objects.filter(timerange__startswith__gte=boundary).count() == 1
+
+
+@pytest.mark.django_db
+def test_maintain_creates_future_and_detaches_old_partitions(
+    history, user, resource, this_month
+):
+    partitioning.convert(months_ahead=1)
+    # За горизонтом секций — попадает в DEFAULT
+    far = partitioning.add_months(this_month, 3)
+    booking = Booking.objects.create(user=user, resource=resource, timerange=month_range(far))
+    assert partition_of(booking) == partitioning.DEFAULT_PARTITION
+
+    result = partitioning.maintain(months_ahead=3, retention_months=1)
+
+    assert result['created'] == [
+        partitioning.partition_name(partitioning.add_months(this_month, i)) for i in (2, 3)
+    ]
+    assert partition_of(booking) == partitioning.partition_name(far)
+    old = partitioning.partition_name(partitioning.add_months(this_month, -2))
+    # Хранится текущий и один прошлый месяц
+    assert result['detached'] == [old]
+    assert not Booking.objects.filter(pk=history[0].pk).exists()
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM {old}')
+        assert cursor.fetchone()[0] == 1
+
+
+@pytest.mark.django_db
+def test_overlap_queries_skip_other_partitions(settings, history, resource, this_month):
+    settings.BOOKING_MAX_DURATION_DAYS = 7
+    partitioning.convert(months_ahead=2)
+
+    window = month_range(this_month, day=1, hours=24)
+    queryset = Booking.objects.overlapping(window).filter(resource=resource)
+    plan = queryset.explain()
+
+    assert partitioning.partition_name(this_month) in plan
+    assert partitioning.partition_name(partitioning.add_months(this_month, 1)) not in plan
+    assert partitioning.partition_name(partitioning.add_months(this_month, -2)) not in plan
+    assert list(queryset) == [history[1]]
+
+
+@pytest.mark.django_db
+def test_command_requires_conversion(history):
+    with pytest.raises(CommandError):
+        call_command('booking_partitions')
+
+    call_command('booking_partitions', '--convert', '--months-ahead', '0')
+    assert partitioning.is_partitioned()
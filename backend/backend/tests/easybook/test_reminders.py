@@ -0,0 +1,100 @@
+from datetime import timedelta
+import pytest
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
+from easybook import reminders
+from easybook.models import Booking, User
+from easybook.tasks import send_booking_reminders_task, send_email_task
+
+
+def starts_in(hours):
+    start = (timezone.now() + timedelta(hours=hours)).replace(microsecond=0)
+    return DateTimeTZRange(start, start + timedelta(hours=1))
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    messages = []
+    monkeypatch.setattr(send_email_task, 'delay', messages.extend)
+    return messages
+
+
+@pytest.fixture
+def send_due(django_capture_on_commit_callbacks):
+    """
+    `reminders.send_due` с выполнением on_commit-колбэков.
+    """
+    def send(**kwargs):
+        with django_capture_on_commit_callbacks(execute=True):
+            return reminders.send_due(**kwargs)
+    return send
+
+
+@pytest.fixture
+def bookings(user, resource):
+    other = User.objects.create_user(email='other@example.com', password='123')
+    return {
+        'soon': Booking.objects.create(user=user, resource=resource, timerange=starts_in(2)),
+        'later': Booking.objects.create(user=other, resource=resource, timerange=starts_in(20)),
+        'tomorrow': Booking.objects.create(user=user, resource=resource, timerange=starts_in(30)),
+        'past': Booking.objects.create(user=user, resource=resource, timerange=starts_in(-3)),
+    }
+
+
+@pytest.mark.django_db
+def test_sweep_reminds_once(settings, queued, send_due, bookings, user):
+    settings.BOOKING_REMINDER_HOURS = 24
+
+    assert send_due(batch_size=1) == 2
+    assert send_due() == 0
+
+    assert [(subject, recipient) for subject, _, recipient in queued] == [
+        ('Booking reminder', user.email), ('Booking reminder', 'other@example.com'),
+    ]
+    assert f"booking #{bookings['soon'].pk}" in queued[0][1]
+    assert set(Booking.objects.filter(reminded_at__isnull=False).values_list('pk', flat=True)) \
+        == {bookings['soon'].pk, bookings['later'].pk}
+
+
+@pytest.mark.django_db
+def test_rescheduling_resets_reminder(settings, queued, send_due, bookings):
+    settings.BOOKING_REMINDER_HOURS = 24
+    send_due()
+
+    # Устаревший экземпляр не затирает отметку
+    stale = bookings['soon']
+    stale.is_confirmed = True
+    stale.save()
+    moved = Booking.objects.get(pk=bookings['later'].pk)
+    moved.timerange = starts_in(10)
+    moved.save()
+
+    assert Booking.objects.get(pk=stale.pk).reminded_at is not None
+    assert send_due() == 1
+    assert len(queued) == 3
+
+
+@pytest.mark.django_db
+def test_reminders_can_be_disabled(settings, queued, bookings):
+    settings.BOOKING_REMINDER_HOURS = 0
+
+    assert send_booking_reminders_task.apply().get() is None
+    assert not queued
+
+
+@pytest.mark.django_db
+def test_reminders_are_queued_after_commit(settings, monkeypatch, send_due, bookings):
+    settings.BOOKING_REMINDER_HOURS = 24
+
+    def broker_down(messages):
+        raise ConnectionError('broker is down')
+
+    # Сбой брокера после коммита снимает отметки до следующего прохода
+    monkeypatch.setattr(send_email_task, 'delay', broker_down)
+    assert send_due() == 2
+    assert not Booking.objects.filter(reminded_at__isnull=False).exists()
+
+    queued = []
+    monkeypatch.setattr(send_email_task, 'delay', queued.extend)
+    assert send_due() == 2
+    assert len(queued) == 2
@@ -0,0 +1,77 @@
+from datetime import time
+import pytest
+from django.db import transaction
+from django.urls import reverse
+from easybook.models import AvailabilityRule, Company, Resource, User
+from easybook.routers import ReplicaRouter, use_primary
+
+# Без обёртки теста в транзакцию: внутри atomic роутер читает с primary
+pytestmark = pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+
+
+@pytest.fixture
+def replica(settings):
+    settings.REPLICA_DATABASE = 'replica'
+    return 'replica'
+
+
+@pytest.fixture
+def replicated(replica, resource):
+    """
+    Ресурс с правилом на primary и его копия без правил на «реплике»
+    (реплика отстаёт).
+    """
+    company = resource.company
+    Company.objects.using(replica).create(pk=company.pk, name=company.name, slug=company.slug)
+    Resource.objects.using(replica).create(
+        pk=resource.pk, company_id=company.pk, name=resource.name,
+        max_capacity=resource.max_capacity,
+    )
+    AvailabilityRule.objects.create(
+        resource=resource, weekday=0, start_time=time(10, 0), end_time=time(12, 0),
+        slot_size=60,
+    )
+    return resource
+
+
+def test_routing_rules(replica):
+    router = ReplicaRouter()
+
+    assert router.db_for_read(AvailabilityRule) == replica
+    assert router.db_for_read(User) == 'default'
+    assert router.db_for_write(AvailabilityRule) == 'default'
+    with transaction.atomic():
+        assert router.db_for_read(AvailabilityRule) == 'default'
+    with use_primary():
+        assert router.db_for_read(AvailabilityRule) == 'default'
+
+
+def test_router_is_inert_without_replica():
+    assert ReplicaRouter().db_for_read(AvailabilityRule) == 'default'
+
+
+def test_reads_go_to_replica(replicated):
+    assert AvailabilityRule.objects.filter(resource=replicated).count() == 0
+    with transaction.atomic():
+        assert AvailabilityRule.objects.filter(resource=replicated).count() == 1
+
+
+def test_write_pins_client_to_primary(client, replicated, user):
+    user.is_superuser = user.is_staff = True
+    user.save()
+    client.force_login(user)
+    url = reverse('calendar_async', args=[replicated.pk])
+    params = {'start': '2025-07-14', 'end': '2025-07-20'}
+
+    assert client.get(url, params).json()['slots'] == []
+    assert 'db_pin_primary' not in client.cookies
+
+    # Запись (создание брони) ставит cookie — дальше чтения с primary
+    response = client.post(reverse('create_booking_async'), {
+        'resource': replicated.pk,
+        'start': '2025-07-14T10:00:00Z',
+        'end': '2025-07-14T11:00:00Z',
+    }, content_type='application/json')
+    assert response.status_code == 201
+    assert client.cookies['db_pin_primary']['max-age'] == 5
+    assert len(client.get(url, params).json()['slots']) == 2
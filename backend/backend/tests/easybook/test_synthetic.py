@@ -0,0 +1,56 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from easybook import synthetic
+from easybook.models import (
+    AvailabilityRule, Booking, Category, Company, Resource, ResourceStaff, Staff, User,
+)
+
+
+SCALE = synthetic.Scale(
+    companies=3, resources=12, users=20, bookings=500, past_days=30, future_days=10,
+)
+
+
+def snapshot():
+    return list(Booking.objects.order_by('resource__name', 'timerange').values_list(
+        'resource__name', 'timerange', 'staff__display_name',
+    ))
+
+
+@pytest.mark.django_db
+def test_generates_requested_scale():
+    counts = synthetic.generate(SCALE, seed=1, batch_size=100)
+
+    assert counts['bookings'] == Booking.objects.count() == 500
+    assert Resource.objects.count() == 12
+    assert Company.objects.count() == 3
+    assert counts['rules'] == AvailabilityRule.objects.count()
+    # Путь категорий пересчитан после bulk_create
+    assert not Category.objects.filter(path=[]).exists()
+    assert Category.objects.exclude(parent=None).filter(path__len=1).count() == 0
+    # Брони ресурсов со штатом — с их сотрудником
+    assert Staff.objects.count() == ResourceStaff.objects.count() == counts['staff']
+    assert not Booking.objects.filter(resource__requires_staff=True, staff=None).exists()
+
+
+@pytest.mark.django_db
+def test_same_seed_gives_same_data():
+    synthetic.generate(SCALE, seed=7)
+    first = snapshot()
+    Booking.objects.all().delete()
+    Company.objects.all().delete()
+    User.objects.all().delete()
+
+    synthetic.generate(SCALE, seed=7)
+
+    assert snapshot() == first
+
+
+@pytest.mark.django_db
+def test_command_refuses_existing_seed():
+    call_command('generate_synthetic_data', '--resources', '2', '--bookings', '10', '--seed', '3')
+    assert Booking.objects.count() == 10
+
+    with pytest.raises(CommandError):
+        call_command('generate_synthetic_data', '--seed', '3')
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+import pytest
+from django.core.exceptions import ValidationError
+from django.utils.timezone import make_aware
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from easybook.models import (
+    Booking, Category, Resource, ResourceCategory, ResourceStaff, ValidationContext
+)
+
+
+@pytest.fixture
+def bookings(user, company, resource, staff):
+    ResourceStaff.objects.create(resource=resource, staff=staff)
+    resources = [resource] + [
+        Resource.objects.create(company=company, name=f'Room {i}')
+        for i in range(4)
+    ]
+    for other in resources[1:]:
+        ResourceStaff.objects.create(resource=other, staff=staff)
+    start = make_aware(datetime(2025, 1, 1, 10, 0))
+    return [
+        Booking(
+            user=user,
+            resource_id=res.pk,
+            staff_id=staff.pk,
+            timerange=DateTimeTZRange(
+                start + timedelta(hours=i), start + timedelta(hours=i + 1)
+            ),
+        )
+        for i, res in enumerate(resources * 5)
+    ]
+
+
+@pytest.mark.django_db
+def test_booking_clean_in_context_costs_constant_queries(
+    bookings, django_assert_num_queries
+):
+    # ресурсы, сотрудники, ResourceStaff
+    with django_assert_num_queries(3):
+        with ValidationContext.for_instances(bookings):
+            for booking in bookings:
+                booking.clean()
+
+
+@pytest.mark.django_db
+def test_booking_clean_without_context_skips_company_lookups(
+    bookings, django_assert_num_queries
+):
+    with django_assert_num_queries(3):
+        bookings[0].clean()
+
+
+@pytest.mark.django_db
+def test_context_reports_same_errors(
+    user, resource, staff, other_company_staff, django_assert_num_queries
+):
+    unassigned = Booking(user=user, resource=resource, staff=staff)
+    foreign = Booking(user=user, resource=resource, staff=other_company_staff)
+
+    with ValidationContext.for_instances([unassigned, foreign]):
+        with django_assert_num_queries(0):
+            with pytest.raises(ValidationError, match='not assigned to this resource'):
+                unassigned.clean()
+            with pytest.raises(ValidationError, match='same company'):
+                foreign.clean()
+
+
+@pytest.mark.django_db
+def test_resource_category_clean_in_context(
+    company, other_company, resource, django_assert_num_queries
+):
+    own = Category.objects.create(company=company, name='Own', slug='own')
+    foreign = Category.objects.create(company=other_company, name='Foreign', slug='foreign')
+    links = [
+        ResourceCategory(resource=resource, category=own),
+        ResourceCategory(resource=resource, category=foreign),
+    ]
+    with django_assert_num_queries(2):
+        with ValidationContext.for_instances(links):
+            links[0].clean()
+            with pytest.raises(ValidationError, match='same Company'):
+                links[1].clean()